@@ -1,17 +1,48 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file
 import os
 import math
-import random
-import heapq
 import itertools
-from collections import defaultdict, Counter
+import functools
+import collections
 import sys
 import json
-from decimal import Decimal, getcontext
+import io
+import zipfile
+import tarfile
+import tempfile
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 from utils.bpsk_simulation import run_bpsk_simulation
+from utils.bsc_channel import (
+    ALPHABET, BITS_PER_CHAR, text_to_indices, indices_to_text, encode_indices,
+    decode_bits, bsc_transmit, bsc_sweep, binary_entropy, joint_counts, channel_entropies
+)
+from utils.streaming import CHUNK_SIZE, iter_text_chunks, iter_byte_blocks, TextHead
+from utils.rng import make_rng
+from utils.result_cache import ResultCache, fingerprint
+from utils.prefix_codes import (
+    huffman_code_lengths, length_limited_code_lengths, canonical_codebook, shannon_fano_codebook
+)
+from utils.bitstream import (
+    BitWriter, BitReader, CodeTable, PrefixDecoder, pack_codes, bits_head, bits_preview
+)
+from utils.adaptive_huffman import AdaptiveHuffmanEncoder, AdaptiveHuffmanDecoder, adaptive_huffman_decode
+from utils.ans import RansTable, TansTable
+from utils.arithmetic import RangeEncoder, RangeDecoder, MAX_CONTEXT_ORDER
+from utils.container import (
+    METHOD_IDS, ContainerBlock, write_header, read_header, crc32_update,
+    pack_symbol_table, unpack_symbol_table
+)
+from utils.frequency import (
+    FrequencyCounter, MarkovEntropyEstimator, MAX_MARKOV_ORDER,
+    byte_histogram, histogram_to_dict, count_symbols, pmf_from_counts, entropy_from_counts,
+    sequence_entropy, text_to_codepoints
+)
 
 app = Flask(__name__)
-getcontext().prec = 50
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
@@ -19,6 +50,79 @@ if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Result cache for the deterministic analysis endpoints (byte budget)
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+result_cache = ResultCache(app.config['RESULT_CACHE_MAX_BYTES'])
+
+# Worker processes for /analyze_batch and block-parallel coding (defaults
+# to one per CPU core)
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))
+
+_batch_executor = None
+
+
+def get_batch_executor():
+    """Create the shared process pool on first use"""
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ProcessPoolExecutor(max_workers=app.config['BATCH_WORKERS'])
+    return _batch_executor
+
+
+@app.errorhandler(BrokenProcessPool)
+def broken_pool(error):
+    """A worker died (e.g. killed for memory); start a fresh pool next time"""
+    global _batch_executor
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False, cancel_futures=True)
+        _batch_executor = None
+    return jsonify({'error': 'A worker process failed; please retry'}), 503
+
+
+def imap_blocks(fn, arg_tuples):
+    """Run fn(*args) for every args tuple in the shared pool, yielding results in order
+
+    At most two blocks per worker are in flight, so large uploads are never
+    held in memory all at once.
+    """
+    executor = get_batch_executor()
+    in_flight = collections.deque()
+    for args in arg_tuples:
+        in_flight.append(executor.submit(fn, *args))
+        if len(in_flight) >= 2 * app.config['BATCH_WORKERS']:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def cached_result(view):
+    """Serve repeat requests from the result cache.
+
+    Responses are keyed by the endpoint, every form field and query
+    argument (including any seed) and the bytes of every uploaded file;
+    only successful responses are stored.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = fingerprint(request.path, request.values.items(multi=True),
+                          [f.stream for f in request.files.values()])
+        payload = result_cache.get(key)
+        if payload is not None:
+            return app.response_class(payload, mimetype='application/json', headers={'X-Cache': 'HIT'})
+
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'application/json':
+            result_cache.put(key, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Report result cache size and hit/miss counters"""
+    return jsonify(result_cache.stats())
+
 @app.route('/')
 def loading():
     """Render the loading page first"""
@@ -52,34 +156,78 @@ def analyze_text():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if file:
-        # Read the file content
-        text = file.read().decode('utf-8')
-
-        # Extract valid characters
-        valid_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ ,.123456789')
-        characters = [char for char in text if char in valid_chars]
+    try:
+        rng, seed = make_rng(request.values.get('seed'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        if not characters:
-            return jsonify({'error': 'No valid characters found in the file'}), 400
+    # Optional context length k for H(X_n | X_{n-k} ... X_{n-1}); 0 disables it
+    try:
+        markov_order = int(request.values.get('markov_order', 0))
+    except ValueError:
+        markov_order = -1
+    if not 0 <= markov_order <= MAX_MARKOV_ORDER:
+        return jsonify({'error': f'markov_order must be an integer between 0 and {MAX_MARKOV_ORDER}'}), 400
 
-        # Store original text
-        original_text = ''.join(characters)
+    if file:
+        channel_error_probability = 0.05  # p = 5%
+        bits_per_char = BITS_PER_CHAR
+
+        # Stream the upload in fixed-size blocks; every statistic below is
+        # accumulated per chunk so memory is bounded by the chunk size
+        index_counts = np.zeros(len(ALPHABET), dtype=np.int64)
+        joint = np.zeros((len(ALPHABET), len(ALPHABET)), dtype=np.int64)
+        total_bits = 0
+        num_errors = 0
+        correctly_decoded = 0
+        decoded_length = 0
+        original_head = TextHead(200)
+        decoded_head = TextHead(200)
+        encoded_head = TextHead(500)
+        received_head = TextHead(500)
+        markov = MarkovEntropyEstimator(len(ALPHABET), markov_order) if markov_order else None
 
-        # Count character frequencies
-        char_counts = defaultdict(int)
-        for char in characters:
-            char_counts[char] += 1
+        try:
+            for chunk in iter_text_chunks(file.stream):
+                # Extract valid characters
+                indices = text_to_indices(chunk)
+                if len(indices) == 0:
+                    continue
+
+                # Count character frequencies
+                index_counts += np.bincount(indices, minlength=len(ALPHABET))
+                if markov is not None:
+                    markov.update(indices)
+                original_head.feed(indices_to_text(indices[:201]))
+
+                # Converting text to bits (X -> X_coded) as a packed bit array
+                packed_bits, chunk_bits = encode_indices(indices)
+                total_bits += chunk_bits
+
+                # Flip each bit with probability p in one vectorized pass
+                received_packed, chunk_errors = bsc_transmit(packed_bits, chunk_bits, channel_error_probability, rng)
+                num_errors += chunk_errors
+                encoded_head.feed(bits_head(packed_bits, chunk_bits, 501))
+                received_head.feed(bits_head(received_packed, chunk_bits, 501))
+
+                # Decoding bits back to characters (Y_received -> Y) via the 64-entry table
+                decoded_indices = decode_bits(received_packed, len(indices))
+                decoded_head.feed(indices_to_text(decoded_indices[:201]))
+                decoded_length += len(decoded_indices)
+                correctly_decoded += int(np.count_nonzero(decoded_indices == indices))
+                joint += joint_counts(indices, decoded_indices)
+        except UnicodeDecodeError:
+            return jsonify({'error': 'File is not valid UTF-8 text'}), 400
+
+        total_chars = int(index_counts.sum())
+        if total_chars == 0:
+            return jsonify({'error': 'No valid characters found in the file'}), 400
 
         # Calculate PMF
-        total_chars = len(characters)
-        pmf = {char: count/total_chars for char, count in char_counts.items()}
+        pmf = {ALPHABET[i]: int(count)/total_chars for i, count in enumerate(index_counts) if count > 0}
 
         # Calculate entropy H(X)
-        entropy = 0
-        for char, prob in pmf.items():
-            if prob > 0:
-                entropy -= prob * math.log2(prob)
+        entropy = entropy_from_counts(index_counts)
 
         # Calculate relative entropy
         uniform_prob = 1 / len(pmf)
@@ -88,61 +236,18 @@ def analyze_text():
             if prob > 0:
                 relative_entropy += prob * math.log2(prob / uniform_prob)
 
-        channel_error_probability = 0.05  # p = 5%
-        bits_per_char = 6
-
-        # Create a mapping of characters to 6-bit codes
-        valid_chars_list = sorted(valid_chars)
-        char_to_bits = {char: format(i, '06b') for i, char in enumerate(valid_chars_list)}
-        bits_to_char = {bits: char for char, bits in char_to_bits.items()}
-
-        # Converting text to bits (X -> X_coded)
-        bit_sequence = ''.join([char_to_bits[char] for char in characters if char in char_to_bits])
-        total_bits = len(bit_sequence)
-
-        received_bits = []
-        error_positions = []
-        
-        for i, bit in enumerate(bit_sequence):
-            # For each bit, flip it with probability p
-            if random.random() < channel_error_probability:
-                flipped_bit = '0' if bit == '1' else '1'
-                received_bits.append(flipped_bit)
-                error_positions.append(i)
-            else:
-                received_bits.append(bit)
-        
-        received_bit_sequence = ''.join(received_bits)
-        num_errors = len(error_positions)
-
-        # Decoding bits back to characters (Y_received -> Y)
-        decoded_chars = []
-        for i in range(0, len(received_bit_sequence), bits_per_char):
-            if i + bits_per_char <= len(received_bit_sequence):
-                bits_chunk = received_bit_sequence[i:i+bits_per_char]
-                if bits_chunk in bits_to_char:
-                    decoded_chars.append(bits_to_char[bits_chunk])
-                else:
-                    decoded_chars.append('?')
-
-        decoded_text = ''.join(decoded_chars)
-
-        
         # Calculate conditional entropy H(Y|X) for binary symmetric channel
         # H(Y|X) = -p*log2(p) - (1-p)*log2(1-p) per bit
-        if 0 < channel_error_probability < 1:
-            h_p = (-channel_error_probability * math.log2(channel_error_probability) -
-                   (1 - channel_error_probability) * math.log2(1 - channel_error_probability))
-            conditional_entropy = bits_per_char * h_p
-        else:
-            conditional_entropy = 0
+        conditional_entropy = bits_per_char * float(binary_entropy(channel_error_probability))
 
         # Calculate joint entropy H(X,Y) = H(X) + H(Y|X)
         joint_entropy = entropy + conditional_entropy
+
+        # Measured H(X,Y), H(Y|X), H(X|Y) and I(X;Y) from the actual
+        # transmitted/received character pairs
+        measured = channel_entropies(joint)
         
-        total_characters = len(characters)
-        correctly_decoded = sum(1 for i in range(min(len(original_text), len(decoded_text)))
-                               if original_text[i] == decoded_text[i])
+        total_characters = total_chars
         
         # Bit-level error rate
         bit_error_rate = (num_errors / total_bits) * 100 if total_bits > 0 else 0
@@ -161,15 +266,15 @@ def analyze_text():
             'relative_entropy': relative_entropy,
             'joint_entropy': joint_entropy,
             'conditional_entropy': conditional_entropy,
-            'original_text': original_text[:200] + ('...' if len(original_text) > 200 else ''),
-            'original_length': len(original_text),
-            'encoded_bits': bit_sequence[:500] + ('...' if len(bit_sequence) > 500 else ''),
-            'encoded_length': len(bit_sequence),
-            'received_bits': received_bit_sequence[:500] + ('...' if len(received_bit_sequence) > 500 else ''),
-            'decoded_text': decoded_text[:200] + ('...' if len(decoded_text) > 200 else ''),
-            'decoded_length': len(decoded_text),
+            'original_text': original_head.preview(),
+            'original_length': total_chars,
+            'encoded_bits': encoded_head.preview(),
+            'encoded_length': total_bits,
+            'received_bits': received_head.preview(),
+            'decoded_text': decoded_head.preview(),
+            'decoded_length': decoded_length,
             'num_errors': num_errors,
-            'error_positions_count': len(error_positions),
+            'error_positions_count': num_errors,
             'correctly_decoded': correctly_decoded,
             'bit_error_rate': round(bit_error_rate, 2),
             'character_error_rate': round(character_error_rate, 2),
@@ -177,72 +282,183 @@ def analyze_text():
             'verification': chain_rule_verified,
             'chain_rule_lhs': round(joint_entropy, 4),
             'chain_rule_rhs': round(entropy + conditional_entropy, 4),
-            'channel_error_probability': channel_error_probability
+            'empirical_joint_entropy': measured['joint_entropy'],
+            'empirical_conditional_entropy': measured['conditional_entropy'],
+            'empirical_equivocation': measured['equivocation'],
+            'output_entropy': measured['output_entropy'],
+            'mutual_information': measured['mutual_information'],
+            'empirical_chain_rule_gap': round(measured['joint_entropy'] - joint_entropy, 4),
+            'channel_error_probability': channel_error_probability,
+            'seed': seed
         }
+        if markov is not None:
+            response_data['markov_entropies'] = markov.conditional_entropies()
 
         return jsonify(response_data)
 
 
+# Default crossover probabilities for /analyze_sweep
+DEFAULT_SWEEP_PROBABILITIES = [0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5]
+MAX_SWEEP_POINTS = 100
+
+
+@app.route('/analyze_sweep', methods=['POST'])
+def analyze_sweep():
+    """Sweep the BSC crossover probability p over one encoded text file"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    try:
+        rng, seed = make_rng(request.values.get('seed'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Comma-separated list of crossover probabilities, e.g. "0.01,0.05,0.1"
+    p_field = request.form.get('p_values', '')
+    try:
+        p_values = [float(p) for p in p_field.split(',')] if p_field else DEFAULT_SWEEP_PROBABILITIES
+    except ValueError:
+        return jsonify({'error': 'p_values must be a comma-separated list of numbers'}), 400
+
+    if not 0 < len(p_values) <= MAX_SWEEP_POINTS:
+        return jsonify({'error': f'Between 1 and {MAX_SWEEP_POINTS} p values are required'}), 400
+    if any(not 0 <= p <= 1 for p in p_values):
+        return jsonify({'error': 'Every p value must be in [0, 1]'}), 400
+
+    # Encode the text once to 6-bit alphabet indices
+    try:
+        indices = np.concatenate([text_to_indices(chunk) for chunk in iter_text_chunks(file.stream)] or
+                                 [np.zeros(0, dtype=np.uint8)])
+    except UnicodeDecodeError:
+        return jsonify({'error': 'File is not valid UTF-8 text'}), 400
+    total_chars = len(indices)
+    if total_chars == 0:
+        return jsonify({'error': 'No valid characters found in the file'}), 400
+
+    total_bits = total_chars * BITS_PER_CHAR
+    entropy = entropy_from_counts(np.bincount(indices, minlength=len(ALPHABET)))
+
+    # Simulate every p value in one batched pass over the bits
+    bit_errors, char_errors, joint = bsc_sweep(indices, p_values, rng)
+    conditional_entropy = BITS_PER_CHAR * binary_entropy(p_values)
+    measured = [channel_entropies(run) for run in joint]
+
+    response_data = {
+        'p_values': p_values,
+        'original_length': total_chars,
+        'encoded_length': total_bits,
+        'entropy': entropy,
+        'num_errors': bit_errors.tolist(),
+        'bit_error_rate': np.round(bit_errors / total_bits * 100, 4).tolist(),
+        'character_error_rate': np.round(char_errors / total_chars * 100, 4).tolist(),
+        'expected_bit_error_rate': [p * 100 for p in p_values],
+        'conditional_entropy': np.round(conditional_entropy, 6).tolist(),
+        'joint_entropy': np.round(entropy + conditional_entropy, 6).tolist(),
+        'empirical_conditional_entropy': [round(m['conditional_entropy'], 6) for m in measured],
+        'empirical_joint_entropy': [round(m['joint_entropy'], 6) for m in measured],
+        'mutual_information': [round(m['mutual_information'], 6) for m in measured],
+        'seed': seed
+    }
+
+    return jsonify(response_data)
+
+
 # ===============================================
 # PROJECT 2 - Source Coding Analysis
 # ===============================================
 
 # Huffman Code Implementation
 def build_huffman_code(freqs):
-    """Build a binary Huffman codebook from symbol frequencies."""
-    counter = itertools.count()
-    heap = [(w, next(counter), [[sym, ""]]) for sym, w in freqs.items()]
-    heapq.heapify(heap)
+    """Build a binary canonical Huffman codebook from symbol frequencies.
 
-    if len(heap) == 1:
-        sym = heap[0][2][0][0]
-        return {sym: "0"}
+    Code lengths come from the in-place Moffat-Katajainen method in O(n log n);
+    codewords are then assigned canonically from the lengths alone.
+    """
+    return canonical_codebook(huffman_code_lengths(freqs))
 
-    while len(heap) > 1:
-        w1, _, symcodes1 = heapq.heappop(heap)
-        w2, _, symcodes2 = heapq.heappop(heap)
 
-        for pair in symcodes1:
-            pair[1] = '0' + pair[1]
-        for pair in symcodes2:
-            pair[1] = '1' + pair[1]
+# Default cap on codeword length for length-limited Huffman codes
+DEFAULT_MAX_CODE_LENGTH = 12
 
-        merged_weight = w1 + w2
-        merged_symbols = symcodes1 + symcodes2
-        heapq.heappush(heap, (merged_weight, next(counter), merged_symbols))
 
-    _, _, code_pairs = heap[0]
-    return {sym: code for sym, code in code_pairs}
+def build_length_limited_huffman_code(freqs, max_length=DEFAULT_MAX_CODE_LENGTH):
+    """Build a canonical Huffman codebook whose codewords are at most max_length bits."""
+    return canonical_codebook(length_limited_code_lengths(freqs, max_length))
 
 
-# Shannon-Fano Code Implementation
-def build_fano_code(symbols_probs, prefix="", codebook=None):
-    """Recursive Shannon-Fano code assignment."""
-    if codebook is None:
-        codebook = {}
-
-    n = len(symbols_probs)
-    if n == 1:
-        sym, _ = symbols_probs[0]
-        codebook[sym] = prefix or "0"
-        return codebook
-
-    total = sum(p for _, p in symbols_probs)
-    cumulative = 0
-    split = 0
-    for i, (_, p) in enumerate(symbols_probs):
-        cumulative += p
-        if cumulative >= total / 2:
-            split = i + 1
-            break
+def parse_max_code_length():
+    """Read the optional 'max_code_length' request field (None when absent)"""
+    if 'max_code_length' not in request.values:
+        return None
+    try:
+        max_length = int(request.values['max_code_length'])
+    except ValueError:
+        max_length = 0
+    if not 1 <= max_length <= 32:
+        raise ValueError('max_code_length must be an integer between 1 and 32')
+    return max_length
+
+
+def code_length_limit(max_code_length, n_symbols):
+    """The requested codeword length limit; without one, the default raised
+    as far as n_symbols codewords need"""
+    if max_code_length is not None:
+        return max_code_length
+    return max(DEFAULT_MAX_CODE_LENGTH, (n_symbols - 1).bit_length())
+
+
+def parse_model_order():
+    """Read the optional 'model_order' request field (context order of the arithmetic coder)"""
+    try:
+        order = int(request.values.get('model_order', 0))
+    except ValueError:
+        order = -1
+    if not 0 <= order <= MAX_CONTEXT_ORDER:
+        raise ValueError(f'model_order must be an integer between 0 and {MAX_CONTEXT_ORDER}')
+    return order
+
+
+def form_flag(name):
+    """Read an optional on/off request field (1/true/yes/on)"""
+    return request.values.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Symbols an upload is coded as: UTF-8 characters, or raw byte values 0..255.
+# The adaptive Huffman coder sees the bytes as latin-1 text, which maps every
+# byte to the code point of the same value.
+CODING_MODES = {'text': 'utf-8', 'bytes': 'latin-1'}
+# Fixed alphabet of byte mode: every byte value codes as its own index
+BYTE_ALPHABET = range(256)
+
+
+def parse_coding_mode():
+    """Read the optional 'mode' request field ('text' or 'bytes')"""
+    mode = request.values.get('mode', 'text').strip().lower()
+    if mode not in CODING_MODES:
+        raise ValueError("mode must be 'text' or 'bytes'")
+    return mode
+
 
-    left = symbols_probs[:split]
-    right = symbols_probs[split:]
+def iter_blocks(stream, mode):
+    """Chunks of an upload: decoded text, or raw bytes in byte mode"""
+    return iter_byte_blocks(stream) if mode == 'bytes' else iter_text_chunks(stream)
 
-    build_fano_code(left, prefix + "0", codebook)
-    build_fano_code(right, prefix + "1", codebook)
 
-    return codebook
+def display_symbol(sym):
+    """Printable form of a character or byte value for code tables"""
+    if isinstance(sym, int):
+        return chr(sym) if 0x20 <= sym < 0x7f else f'0x{sym:02X}'
+    return repr(sym)[1:-1] if sym in ['\n', '\t', '\r'] else sym
+
+
+# Shannon-Fano Code Implementation
+def build_fano_code(symbols_probs):
+    """Shannon-Fano code assignment (prefix sums + binary-searched splits)."""
+    return shannon_fano_codebook(symbols_probs)
 
 
 # Fixed-length codes
@@ -262,31 +478,263 @@ def avg_length(codebook, probs):
     return sum(len(codebook[s]) * probs[s] for s in probs)
 
 
-def encode_sequence(sequence, codebook):
-    """Encode sequence using codebook."""
-    return ''.join(codebook[s] for s in sequence)
+def encode_sequence(sequence, codebook, table=None):
+    """Encode sequence using codebook into a packed bitstream.
+
+    Returns:
+        Tuple of (packed_bits, n_bits)
+    """
+    return (table or CodeTable(codebook)).encode(sequence)
+
+
+def decode_sequence(packed_bits, n_bits, codebook, decoder=None):
+    """Decode a packed bitstream using codebook (table-driven)."""
+    return (decoder or PrefixDecoder(codebook)).decode(packed_bits, n_bits)
+
+
+def encode_fixed_length(sequence, bits):
+    """Encode symbols '1'..'M' with fixed-length codes into a packed bitstream.
+
+    Returns:
+        Tuple of (packed_bits, n_bits)
+    """
+    values = np.array([int(s) - 1 for s in sequence], dtype=np.uint64)
+    return pack_codes(values, np.full(len(values), bits))
+
+
+def decode_fixed_length(packed_bits, n_bits, bits):
+    """Decode a fixed-length packed bitstream back to symbols '1'..'M'."""
+    reader = BitReader(packed_bits, n_bits)
+    return [str(reader.read(bits) + 1) for _ in range(n_bits // bits)]
+
+
+def count_stream(stream, mode='text'):
+    """Count character (or, in byte mode, byte value) frequencies of an
+    upload, one chunk at a time.
+
+    Returns:
+        Tuple of (char_counts, sample_text)
+    """
+    head = TextHead(200)
+    if mode == 'bytes':
+        counts = np.zeros(256, dtype=np.int64)
+        for block in iter_byte_blocks(stream):
+            counts += byte_histogram(block)
+            head.feed(byte_preview(block))
+        return histogram_to_dict(counts), head.preview()
+
+    counter = FrequencyCounter()
+    for chunk in iter_text_chunks(stream):
+        counter.update(chunk)
+        head.feed(chunk)
+    return counter.to_dict(), head.preview()
+
+
+def byte_preview(data, limit=201):
+    """Leading bytes of a block shown as text (invalid UTF-8 is replaced)"""
+    return data[:limit].decode('utf-8', errors='replace')
+
 
+def encode_block(text, codebook):
+    """Encode one block of text or bytes (runs in a worker process)
 
-def decode_sequence(bitstring, codebook):
-    """Decode bitstring using codebook."""
-    # Build decoding trie
-    trie = {}
-    for sym, code in codebook.items():
-        node = trie
-        for b in code:
-            node = node.setdefault(b, {})
-        node['_'] = sym
+    Returns:
+        Tuple of (packed_bytes, n_bits)
+    """
+    packed_bits, n_bits = CodeTable(codebook).encode(text)
+    return packed_bits.tobytes(), n_bits
+
+
+def decode_block(data, n_bits, codebook):
+    """Decode one packed block back to text, or to bytes for a byte-value
+    codebook (runs in a worker process)"""
+    decoder = PrefixDecoder(codebook)
+    decode = decoder.decode_bytes if decoder.is_bytes else decoder.decode_text
+    return decode(np.frombuffer(data, dtype=np.uint8), n_bits)
+
+
+def roundtrip_block(text, codebook):
+    """Encode, decode and compare one block of text or bytes (runs in a worker process)
+
+    Returns:
+        Tuple of (is_lossless, encoded_head, decoded_head)
+    """
+    packed_bits, n_bits = CodeTable(codebook).encode(text)
+    if isinstance(text, bytes):
+        decoded = PrefixDecoder(codebook).decode_bytes(packed_bits, n_bits)
+        return decoded == text, bits_head(packed_bits, n_bits, 201), byte_preview(decoded)
+    decoded = PrefixDecoder(codebook).decode_text(packed_bits, n_bits)
+    return decoded == text, bits_head(packed_bits, n_bits, 201), decoded[:201]
+
+
+def stream_roundtrip(stream, codebook, parallel=False, mode='text'):
+    """Encode and decode an upload chunk by chunk to verify losslessness.
+
+    Codewords never straddle chunk boundaries, so checking each chunk on
+    its own is equivalent to checking the whole text. With parallel=True
+    the chunks are independent blocks spread over the worker pool.
+
+    Returns:
+        Tuple of (is_lossless, encoded_sample, decoded_sample)
+    """
+    stream.seek(0)
+    blocks = ((chunk, codebook) for chunk in iter_blocks(stream, mode))
+    results = imap_blocks(roundtrip_block, blocks) if parallel else itertools.starmap(roundtrip_block, blocks)
+    is_lossless = True
+    encoded_head = TextHead(200)
+    decoded_head = TextHead(200)
+    for block_lossless, encoded, decoded in results:
+        is_lossless = is_lossless and block_lossless
+        encoded_head.feed(encoded)
+        decoded_head.feed(decoded)
+    return is_lossless, encoded_head.preview(), decoded_head.preview()
+
+
+def verify_block(text, codebooks):
+    """Encode and decode one block under every codebook (runs in a worker process)
+
+    Returns:
+        List of is_lossless flags, one per codebook
+    """
+    results = []
+    for codebook in codebooks:
+        data, n_bits = encode_block(text, codebook)
+        results.append(decode_block(data, n_bits, codebook) == text)
+    return results
+
+
+def stream_verify(stream, codebooks, mode='text'):
+    """Round-trip an upload through every codebook in one streamed pass
+
+    Each chunk is read once and checked against all codes in the worker
+    pool; only packed buffers of one block per worker are alive at a time.
+
+    Returns:
+        List of is_lossless flags, one per codebook
+    """
+    stream.seek(0)
+    lossless = [True] * len(codebooks)
+    for results in imap_blocks(verify_block, ((chunk, codebooks) for chunk in iter_blocks(stream, mode))):
+        lossless = [a and b for a, b in zip(lossless, results)]
+    return lossless
+
+
+def encoded_previews(stream, codebooks, mode='text', limit=200):
+    """First `limit` bits of the encoded upload under every codebook
+
+    Every codeword is at least one bit long, so only the first limit + 1
+    symbols of the upload are encoded.
+    """
+    stream.seek(0)
+    head = next(iter_blocks(stream, mode), '')[:limit + 1]
+    return [bits_preview(*CodeTable(codebook).encode(head), limit) for codebook in codebooks]
+
+
+def adaptive_roundtrip(stream, mode='text'):
+    """One-pass adaptive Huffman coding of an upload, verified by decoding.
+
+    The encoder consumes the text chunk by chunk as it is read, with no
+    counting pass, and its bytes are handed to a decoder running alongside;
+    only the text the decoder has not caught up with yet is kept for the
+    comparison.
+
+    Returns:
+        Tuple of (n_bits, is_lossless)
+    """
+    stream.seek(0)
+    encoder = AdaptiveHuffmanEncoder()
+    decoder = AdaptiveHuffmanDecoder()
+    unchecked = ''
+    is_lossless = True
+    for chunk in iter_text_chunks(stream, encoding=CODING_MODES[mode]):
+        decoded = decoder.feed(encoder.encode(chunk).take_bytes())
+        unchecked += chunk
+        is_lossless = is_lossless and unchecked.startswith(decoded)
+        unchecked = unchecked[len(decoded):]
+    try:
+        is_lossless = is_lossless and decoder.finish(encoder.finish(), encoder.bit_length) == unchecked
+    except ValueError:
+        is_lossless = False
+    return encoder.bit_length, is_lossless
+
+
+def adaptive_fields(stream, static_size, total_chars, mode='text'):
+    """Adaptive (one-pass) Huffman results reported next to static Huffman"""
+    adaptive_size, adaptive_lossless = adaptive_roundtrip(stream, mode)
+    return {
+        'adaptive_huffman_size': adaptive_size,
+        'avg_adaptive_huffman': round(adaptive_size / total_chars, 4),
+        'adaptive_overhead_bits': adaptive_size - static_size,
+        'adaptive_lossless': adaptive_lossless
+    }
+
+
+def ans_code_stream(chunks, counts):
+    """Static rANS and tANS coding of a stream of symbol chunks, each chunk
+    coded as one block and verified by decoding it
     
-    # Decode
-    res, node = [], trie
-    for b in bitstring:
-        if b not in node:
-            break
-        node = node[b]
-        if '_' in node:
-            res.append(node['_'])
-            node = trie
-    return res
+    Both coders use the frequency table given by counts, quantized once;
+    like the Huffman sizes, the reported sizes leave out the table itself.
+    
+    Args:
+        chunks: Iterable of chunks (strings, lists of characters, or bytes
+            in byte mode)
+        counts: {symbol: count} of every symbol in the stream
+        
+    Returns:
+        Dictionary with 'length', 'rans_bits', 'tans_bits' and 'is_lossless'
+    """
+    symbols = sorted(counts)
+    # Symbols are coded as indices into the sorted alphabet
+    keys = np.array([sym if isinstance(sym, int) else ord(sym) for sym in symbols])
+    weights = [counts[sym] for sym in symbols]
+    tables = {'rans': RansTable(weights), 'tans': TansTable(weights)}
+    sizes = dict.fromkeys(tables, 0)
+    length = 0
+    is_lossless = True
+    for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray)):
+            codes = np.frombuffer(chunk, dtype=np.uint8)
+        else:
+            codes = text_to_codepoints(''.join(chunk))
+        indices = np.searchsorted(keys, codes)
+        length += len(indices)
+        for name, table in tables.items():
+            data, n_bits = table.encode(indices)
+            sizes[name] += n_bits
+            is_lossless = is_lossless and np.array_equal(table.decode(data, n_bits, len(indices)), indices)
+    return {
+        'length': length,
+        'rans_bits': sizes['rans'],
+        'tans_bits': sizes['tans'],
+        'is_lossless': is_lossless
+    }
+
+
+def ans_fields(stream, char_counts, total_chars, mode='text'):
+    """Static rANS/tANS results reported next to static Huffman
+    
+    An alphabet too large for the ANS tables is reported in 'ans_error'.
+    """
+    stream.seek(0)
+    try:
+        coded = ans_code_stream(iter_blocks(stream, mode), char_counts)
+    except ValueError as e:
+        return {'ans_error': str(e)}
+    return {
+        'rans_size': coded['rans_bits'],
+        'avg_rans': round(coded['rans_bits'] / total_chars, 4),
+        'tans_size': coded['tans_bits'],
+        'avg_tans': round(coded['tans_bits'] / total_chars, 4),
+        'ans_lossless': coded['is_lossless']
+    }
+
+
+def ascii_bits(char_counts):
+    """Size in bits of format(ord(ch), '08b') over every counted character
+    (8 bits per byte value in byte mode)."""
+    return sum(count * (8 if isinstance(ch, int) else max(8, ord(ch).bit_length()))
+               for ch, count in char_counts.items())
 
 
 # ===============================================
@@ -295,6 +743,11 @@ def decode_sequence(bitstring, codebook):
 @app.route('/analyze_part1', methods=['POST'])
 def analyze_part1():
     """Part 1: Uniform distribution analysis for M=4,6,8"""
+    try:
+        rng, seed = make_rng(request.values.get('seed'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     results = {}
     
     for M in [4, 6, 8]:
@@ -311,16 +764,15 @@ def analyze_part1():
         avg_huff = avg_length(huff_codes, probs)
         
         # Generate random sequence (30 symbols as per requirement)
-        sequence = [str(random.randint(1, M)) for _ in range(30)]
+        sequence = [str(s) for s in rng.integers(1, M + 1, size=30)]
         
         # Encode
-        fixed_encoded = encode_sequence(sequence, fixed_codes)
-        huff_encoded = encode_sequence(sequence, huff_codes)
+        fixed_packed, fixed_size = encode_fixed_length(sequence, fixed_bits)
+        huff_packed, huff_size = encode_sequence(sequence, huff_codes)
         
         # Decode
-        decoded_fixed = [str(int(fixed_encoded[i:i+fixed_bits], 2) + 1)
-                       for i in range(0, len(fixed_encoded), fixed_bits)]
-        decoded_huff = decode_sequence(huff_encoded, huff_codes)
+        decoded_fixed = decode_fixed_length(fixed_packed, fixed_size, fixed_bits)
+        decoded_huff = decode_sequence(huff_packed, huff_size, huff_codes)
         
         # Check for losses
         fixed_lossless = decoded_fixed == sequence
@@ -335,14 +787,15 @@ def analyze_part1():
             'fixed_codes': fixed_codes,
             'huffman_codes': huff_codes,
             'sequence': ' '.join(sequence),
-            'fixed_encoded': fixed_encoded,
-            'huffman_encoded': huff_encoded,
-            'fixed_bits': len(fixed_encoded),
-            'huffman_bits': len(huff_encoded),
-            'compression_ratio': round(len(huff_encoded)/len(fixed_encoded), 3) if len(fixed_encoded) > 0 else 0,
+            'fixed_encoded': bits_head(fixed_packed, fixed_size, fixed_size),
+            'huffman_encoded': bits_head(huff_packed, huff_size, huff_size),
+            'fixed_bits': fixed_size,
+            'huffman_bits': huff_size,
+            'compression_ratio': round(huff_size/fixed_size, 3) if fixed_size > 0 else 0,
             'fixed_lossless': fixed_lossless,
             'huffman_lossless': huffman_lossless,
-            'observations': generate_part1_observations(M, H, avg_fixed, avg_huff)
+            'observations': generate_part1_observations(M, H, avg_fixed, avg_huff),
+            'seed': seed
         }
     
     return jsonify(results)
@@ -370,6 +823,12 @@ def generate_part1_observations(M, H, avg_fixed, avg_huff):
 @app.route('/analyze_part2', methods=['POST'])
 def analyze_part2():
     """Part 2: Analysis for distributions Y and Z"""
+    try:
+        rng, seed = make_rng(request.values.get('seed'))
+        max_code_length = parse_max_code_length()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     results = {}
     
     # Distribution Y: fY(y) = 0.5^y for y=1,2,3,4,5 and 0.5^5 for y=6
@@ -405,19 +864,26 @@ def analyze_part2():
         huff_codes = build_huffman_code(probs)
         avg_huff = avg_length(huff_codes, probs)
         
+        # Length-limited Huffman codes (package-merge)
+        max_length = code_length_limit(max_code_length, M)
+        try:
+            limited_codes = build_length_limited_huffman_code(probs, max_length)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        avg_limited = avg_length(limited_codes, probs)
+        
         # Generate weighted random sequence
         symbols = list(probs.keys())
         weights = list(probs.values())
-        sequence = random.choices(symbols, weights=weights, k=30)
+        sequence = rng.choice(symbols, size=30, p=weights).tolist()
         
         # Encode
-        fixed_encoded = encode_sequence(sequence, fixed_codes)
-        huff_encoded = encode_sequence(sequence, huff_codes)
+        fixed_packed, fixed_size = encode_fixed_length(sequence, fixed_bits)
+        huff_packed, huff_size = encode_sequence(sequence, huff_codes)
         
         # Decode
-        decoded_fixed = [str(int(fixed_encoded[i:i+fixed_bits], 2) + 1)
-                       for i in range(0, len(fixed_encoded), fixed_bits)]
-        decoded_huff = decode_sequence(huff_encoded, huff_codes)
+        decoded_fixed = decode_fixed_length(fixed_packed, fixed_size, fixed_bits)
+        decoded_huff = decode_sequence(huff_packed, huff_size, huff_codes)
         
         results[name] = {
             'distribution': name,
@@ -429,12 +895,17 @@ def analyze_part2():
             'huffman_efficiency': round(H / avg_huff * 100, 2) if avg_huff > 0 else 0,
             'fixed_codes': fixed_codes,
             'huffman_codes': huff_codes,
+            'max_code_length': max_length,
+            'max_huffman_length': max(len(c) for c in huff_codes.values()),
+            'avg_huffman_limited': round(avg_limited, 4),
+            'length_limit_penalty': round(avg_limited - avg_huff, 4),
+            'huffman_limited_codes': limited_codes,
             'sequence': ' '.join(sequence),
-            'fixed_encoded': fixed_encoded,
-            'huffman_encoded': huff_encoded,
-            'fixed_bits': len(fixed_encoded),
-            'huffman_bits': len(huff_encoded),
-            'compression_ratio': round(len(huff_encoded)/len(fixed_encoded), 3) if len(fixed_encoded) > 0 else 0,
+            'fixed_encoded': bits_head(fixed_packed, fixed_size, fixed_size),
+            'huffman_encoded': bits_head(huff_packed, huff_size, huff_size),
+            'fixed_bits': fixed_size,
+            'huffman_bits': huff_size,
+            'compression_ratio': round(huff_size/fixed_size, 3) if fixed_size > 0 else 0,
             'fixed_lossless': decoded_fixed == sequence,
             'huffman_lossless': decoded_huff == sequence,
             'observations': generate_part2_observations(name, H, avg_fixed, avg_huff, probs)
@@ -442,6 +913,7 @@ def analyze_part2():
     
     # Add comparison observations
     results['comparison'] = compare_part1_part2(results['Y'], results['Z'])
+    results['seed'] = seed
     
     return jsonify(results)
 
@@ -480,6 +952,7 @@ def compare_part1_part2(result_Y, result_Z):
 # PART 3: Huffman Compression for Text Files
 # ===============================================
 @app.route('/analyze_part3', methods=['POST'])
+@cached_result
 def analyze_part3():
     """Part 3: Huffman compression for text files"""
     if 'file' not in request.files:
@@ -489,18 +962,25 @@ def analyze_part3():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
+    try:
+        max_code_length = parse_max_code_length()
+        mode = parse_coding_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     if file:
-        text = file.read().decode('utf-8')
+        # Count character (or byte) frequencies
+        try:
+            char_counts, sample_text = count_stream(file.stream, mode)
+        except UnicodeDecodeError:
+            return jsonify({'error': "File is not valid UTF-8 text (use mode=bytes)"}), 400
+        total_chars = sum(char_counts.values())
         
-        if not text:
+        if not total_chars:
             return jsonify({'error': 'Empty file'}), 400
-
-        # Count character frequencies
-        char_counts = Counter(text)
-        total_chars = len(text)
         
         # Calculate PMF
-        pmf = {char: count/total_chars for char, count in char_counts.items()}
+        pmf = pmf_from_counts(char_counts)
         
         # Calculate entropy
         H = entropy_calc(pmf)
@@ -515,30 +995,31 @@ def analyze_part3():
         # Calculate average Huffman length
         avg_huffman = avg_length(huffman_codes, pmf)
         
-        # Encode text using Huffman
-        huffman_encoded = encode_sequence(text, huffman_codes)
+        # Length-limited Huffman codes trade a little average length for
+        # bounded codewords (fast table-driven decoding)
+        max_length = code_length_limit(max_code_length, M)
+        try:
+            limited_codes = build_length_limited_huffman_code(char_counts, max_length)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        avg_limited = avg_length(limited_codes, pmf)
         
-        # Encode using ASCII (8 bits per character)
-        ascii_encoded = ''.join(format(ord(ch), '08b') for ch in text)
-        
-        # Calculate sizes
-        huffman_size = len(huffman_encoded)
-        ascii_size = len(ascii_encoded)
+        # Calculate sizes (Huffman vs ASCII at 8 bits per character)
+        huffman_size = sum(count * len(huffman_codes[char]) for char, count in char_counts.items())
+        ascii_size = ascii_bits(char_counts)
         
         # Compression percentage
         compression_pct = (1 - huffman_size / ascii_size) * 100
         
-        # Decode and verify
-        decoded_text = ''.join(decode_sequence(huffman_encoded, huffman_codes))
-        is_lossless = decoded_text == text
+        # Encode, decode and verify in a second streamed pass
+        is_lossless, huffman_sample, decoded_sample = stream_roundtrip(file.stream, huffman_codes, parallel=True, mode=mode)
         
         # Prepare code table (top 20 most frequent characters)
         top_chars = sorted(char_counts.items(), key=lambda x: x[1], reverse=True)[:20]
         code_table = []
         for char, count in top_chars:
-            display_char = repr(char)[1:-1] if char in ['\n', '\t', '\r'] else char
             code_table.append({
-                'char': display_char,
+                'char': display_symbol(char),
                 'frequency': count,
                 'probability': round(pmf[char], 6),
                 'huffman_code': huffman_codes[char],
@@ -546,21 +1027,31 @@ def analyze_part3():
             })
         
         response_data = {
+            'mode': mode,
             'text_length': total_chars,
             'unique_chars': M,
             'entropy': round(H, 4),
             'avg_huffman': round(avg_huffman, 4),
             'huffman_efficiency': round(H / avg_huffman * 100, 2),
+            'max_code_length': max_length,
+            'max_huffman_length': max(len(c) for c in huffman_codes.values()),
+            'avg_huffman_limited': round(avg_limited, 4),
+            'length_limit_penalty': round(avg_limited - avg_huffman, 4),
+            'huffman_limited_size': sum(count * len(limited_codes[char]) for char, count in char_counts.items()),
             'ascii_size': ascii_size,
             'huffman_size': huffman_size,
             'compression_percentage': round(compression_pct, 2),
             'is_lossless': is_lossless,
             'code_table': code_table,
-            'sample_text': text[:200] + ('...' if len(text) > 200 else ''),
-            'huffman_sample': huffman_encoded[:200] + ('...' if len(huffman_encoded) > 200 else ''),
-            'decoded_sample': decoded_text[:200] + ('...' if len(decoded_text) > 200 else ''),
+            'sample_text': sample_text,
+            'huffman_sample': huffman_sample,
+            'decoded_sample': decoded_sample,
             'observations': generate_part3_observations(H, avg_huffman, compression_pct)
         }
+        if form_flag('adaptive'):
+            response_data.update(adaptive_fields(file.stream, huffman_size, total_chars, mode))
+        if form_flag('ans'):
+            response_data.update(ans_fields(file.stream, char_counts, total_chars, mode))
 
         return jsonify(response_data)
 
@@ -588,8 +1079,14 @@ def generate_part3_observations(H, avg_huffman, compression_pct):
 # PART 4: Shannon-Fano Compression for Text Files
 # ===============================================
 @app.route('/analyze_part4', methods=['POST'])
+@cached_result
 def analyze_part4():
-    """Part 4: Shannon-Fano compression for text files"""
+    """Part 4: Shannon-Fano compression for text files
+
+    Encoded sizes come from the frequency table (sum of count x code length)
+    and only the preview bits are encoded. The full encode/decode round trip
+    of both codes runs only with verify=1.
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
 
@@ -597,18 +1094,24 @@ def analyze_part4():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
+    try:
+        mode = parse_coding_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     if file:
-        text = file.read().decode('utf-8')
+        # Count character (or byte) frequencies
+        try:
+            char_counts, sample_text = count_stream(file.stream, mode)
+        except UnicodeDecodeError:
+            return jsonify({'error': "File is not valid UTF-8 text (use mode=bytes)"}), 400
+        total_chars = sum(char_counts.values())
         
-        if not text:
+        if not total_chars:
             return jsonify({'error': 'Empty file'}), 400
-
-        # Count character frequencies
-        char_counts = Counter(text)
-        total_chars = len(text)
         
         # Calculate PMF
-        pmf = {char: count/total_chars for char, count in char_counts.items()}
+        pmf = pmf_from_counts(char_counts)
         
         # Calculate entropy
         H = entropy_calc(pmf)
@@ -627,34 +1130,30 @@ def analyze_part4():
         avg_fano = avg_length(fano_codes, pmf)
         avg_huffman = avg_length(huffman_codes, pmf)
         
-        # Encode text using both methods
-        fano_encoded = encode_sequence(text, fano_codes)
-        huffman_encoded = encode_sequence(text, huffman_codes)
-        ascii_encoded = ''.join(format(ord(ch), '08b') for ch in text)
-        
         # Calculate sizes
-        fano_size = len(fano_encoded)
-        huffman_size = len(huffman_encoded)
-        ascii_size = len(ascii_encoded)
+        fano_size = sum(count * len(fano_codes[char]) for char, count in char_counts.items())
+        huffman_size = sum(count * len(huffman_codes[char]) for char, count in char_counts.items())
+        ascii_size = ascii_bits(char_counts)
         
         # Compression percentages
         fano_compression = (1 - fano_size / ascii_size) * 100
         huffman_compression = (1 - huffman_size / ascii_size) * 100
         
-        # Decode and verify
-        decoded_fano = ''.join(decode_sequence(fano_encoded, fano_codes))
-        decoded_huffman = ''.join(decode_sequence(huffman_encoded, huffman_codes))
-        
-        fano_lossless = decoded_fano == text
-        huffman_lossless = decoded_huffman == text
+        # Preview bits from the head of the upload; both codes are checked
+        # together in one streamed pass when verification is requested
+        fano_sample, huffman_sample = encoded_previews(file.stream, [fano_codes, huffman_codes], mode)
+        verify = form_flag('verify')
+        if verify:
+            fano_lossless, huffman_lossless = stream_verify(file.stream, [fano_codes, huffman_codes], mode)
+        else:
+            fano_lossless = huffman_lossless = None
         
         # Prepare code table (top 20 most frequent characters)
         top_chars = sorted(char_counts.items(), key=lambda x: x[1], reverse=True)[:20]
         code_table = []
         for char, count in top_chars:
-            display_char = repr(char)[1:-1] if char in ['\n', '\t', '\r'] else char
             code_table.append({
-                'char': display_char,
+                'char': display_symbol(char),
                 'frequency': count,
                 'probability': round(pmf[char], 6),
                 'fano_code': fano_codes[char],
@@ -664,6 +1163,7 @@ def analyze_part4():
             })
         
         response_data = {
+            'mode': mode,
             'text_length': total_chars,
             'unique_chars': M,
             'entropy': round(H, 4),
@@ -676,14 +1176,17 @@ def analyze_part4():
             'huffman_size': huffman_size,
             'fano_compression': round(fano_compression, 2),
             'huffman_compression': round(huffman_compression, 2),
+            'verified': verify,
             'fano_lossless': fano_lossless,
             'huffman_lossless': huffman_lossless,
             'code_table': code_table,
-            'sample_text': text[:200] + ('...' if len(text) > 200 else ''),
-            'fano_sample': fano_encoded[:200] + ('...' if len(fano_encoded) > 200 else ''),
-            'huffman_sample': huffman_encoded[:200] + ('...' if len(huffman_encoded) > 200 else ''),
+            'sample_text': sample_text,
+            'fano_sample': fano_sample,
+            'huffman_sample': huffman_sample,
             'observations': generate_part4_observations(fano_compression, huffman_compression, avg_fano, avg_huffman)
         }
+        if form_flag('adaptive'):
+            response_data.update(adaptive_fields(file.stream, huffman_size, total_chars, mode))
 
         return jsonify(response_data)
 
@@ -711,275 +1214,268 @@ def generate_part4_observations(fano_comp, huffman_comp, avg_fano, avg_huffman):
     return obs
     
 # ===============================================
-# PROJECT 3 - Universal Source Coding (Fixed)
+# BATCH - Multi-file Huffman / Shannon-Fano Analysis
 # ===============================================
-def initialize_adaptive_model(alphabet):
-    """Initialize probability model for adaptive arithmetic coding
+MAX_BATCH_FILES = 1000
+# Uncompressed size limits, per document and for the whole batch
+MAX_BATCH_FILE_BYTES = 16 * 1024 * 1024
+MAX_BATCH_TOTAL_BYTES = 64 * 1024 * 1024
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+
+def analyze_document(name, data):
+    """Huffman and Shannon-Fano analysis of one document (runs in a worker process)
     
     Args:
-        alphabet: List of unique symbols in the sequence
+        name: File name reported back in the result
+        data: Raw bytes of the document
         
     Returns:
-        Dictionary containing symbol statistics and cumulative probabilities
+        Dictionary of per-file metrics, or {'name', 'error'} on failure
     """
-    model = {}
-    total_symbols = len(alphabet)
-    
-    # Initialize each symbol with count=1 and equal probability
-    for symbol in alphabet:
-        model[symbol] = {
-            'count': 1, 
-            'probability': Decimal(1) / Decimal(total_symbols)
-        }
+    try:
+        char_counts, _ = count_stream(io.BytesIO(data))
+        if not char_counts:
+            return {'name': name, 'error': 'Empty file'}
 
-    # Calculate cumulative probabilities (sorted order for consistency)
-    cumulative_prob = Decimal(0)
-    for symbol in sorted(alphabet):
-        model[symbol]['cumulative_prob'] = cumulative_prob
-        cumulative_prob += model[symbol]['probability']
-    
-    return model
+        pmf = pmf_from_counts(char_counts)
+        H = entropy_calc(pmf)
+        huffman_codes = build_huffman_code(pmf)
+        fano_codes = build_fano_code(sorted(pmf.items(), key=lambda x: x[1], reverse=True))
 
+        ascii_size = ascii_bits(char_counts)
+        huffman_size = sum(count * len(huffman_codes[char]) for char, count in char_counts.items())
+        fano_size = sum(count * len(fano_codes[char]) for char, count in char_counts.items())
 
-def update_adaptive_model(model, symbol):
-    """Update the probability model after encoding/decoding a symbol
-    
-    Args:
-        model: Current probability model
-        symbol: The symbol that was just processed
-        
-    Returns:
-        Updated model with new probabilities
-    """
-    # Increment count for the observed symbol
-    model[symbol]['count'] += 1
-    
-    # Recalculate total count
-    total_count = sum(s['count'] for s in model.values())
-    
-    # Update all probabilities based on new counts
-    for s in model:
-        model[s]['probability'] = Decimal(model[s]['count']) / Decimal(total_count)
-    
-    # Recalculate cumulative probabilities
-    cumulative_prob = Decimal(0)
-    for s in sorted(model.keys()):
-        model[s]['cumulative_prob'] = cumulative_prob
-        cumulative_prob += model[s]['probability']
-    
-    return model
+        huffman_lossless, _, _ = stream_roundtrip(io.BytesIO(data), huffman_codes)
+        fano_lossless, _, _ = stream_roundtrip(io.BytesIO(data), fano_codes)
+    except UnicodeDecodeError:
+        return {'name': name, 'error': 'File is not valid UTF-8 text'}
+
+    return {
+        'name': name,
+        'text_length': sum(char_counts.values()),
+        'unique_chars': len(char_counts),
+        'entropy': round(H, 4),
+        'avg_huffman': round(avg_length(huffman_codes, pmf), 4),
+        'avg_fano': round(avg_length(fano_codes, pmf), 4),
+        'ascii_size': ascii_size,
+        'huffman_size': huffman_size,
+        'fano_size': fano_size,
+        'huffman_compression': round((1 - huffman_size / ascii_size) * 100, 2),
+        'fano_compression': round((1 - fano_size / ascii_size) * 100, 2),
+        'huffman_lossless': huffman_lossless,
+        'fano_lossless': fano_lossless
+    }
 
 
-def adaptive_arithmetic_encode(sequence):
-    """Encode a sequence using adaptive arithmetic coding
+class BatchTooLarge(ValueError):
+    """A batch document, or the batch as a whole, is over its size limit"""
+
+
+def read_batch_document(stream, name, size=None):
+    """Read one batch document, at most MAX_BATCH_FILE_BYTES of it
     
-    Args:
-        sequence: List of symbols to encode
-        
-    Returns:
-        Tuple of (binary_string, debug_info_dict)
+    size is the uncompressed size an archive declares for the member; it is
+    checked before reading, and the read is bounded anyway since archive
+    headers can lie.
     """
-    if not sequence:
-        return "", {}
-    
-    # Get unique alphabet from sequence
-    alphabet = sorted(list(set(sequence)))
-    model = initialize_adaptive_model(alphabet)
-    
-    # Initialize range [low, high)
-    low = Decimal(0)
-    high = Decimal(1)
-    
-    # Track ranges for debugging
-    ranges = []
-    
-    # Process each symbol
-    for symbol in sequence:
-        # Get symbol's probability range
-        symbol_low = Decimal(model[symbol]['cumulative_prob'])
-        symbol_high = symbol_low + Decimal(model[symbol]['probability'])
-        
-        # Narrow the range
-        range_width = high - low
-        high = low + range_width * symbol_high
-        low = low + range_width * symbol_low
-        
-        ranges.append((float(low), float(high)))
-        
-        # Update model for next symbol
-        model = update_adaptive_model(model, symbol)
-    
-    # Calculate the number of bits needed to represent the final range
-    # We need enough bits to ensure the value falls within the final range
-    range_width = high - low
-    if range_width > 0:
-        # Calculate how many bits we need to represent this range
-        bits_needed = max(1, int(-math.log2(float(range_width))) + 2)
-    else:
-        bits_needed = 50  # Default to a reasonable number of bits
-    
-    # Find a value in the final range
-    # We use the midpoint to ensure we're well within the range
-    final_value = (low + high) / 2
-    
-    # Convert to binary with sufficient precision
-    binary = decimal_to_binary(final_value, max_bits=bits_needed)
-    
-    # Calculate entropy and other metrics
-    char_counts = Counter(sequence)
-    total = len(sequence)
-    probs = [count/total for count in char_counts.values()]
-    entropy = -sum(p * math.log2(p) for p in probs if p > 0)
-    
-    return binary, {
-        'model': model, 
-        'ranges': ranges,
-        'final_range': (float(low), float(high)),
-        'alphabet': alphabet,
-        'entropy': entropy,
-        'bits_needed': bits_needed
-    }
+    if size is not None and size > MAX_BATCH_FILE_BYTES:
+        raise BatchTooLarge(f'{name} is larger than {MAX_BATCH_FILE_BYTES} bytes')
+    data = stream.read(MAX_BATCH_FILE_BYTES + 1)
+    if len(data) > MAX_BATCH_FILE_BYTES:
+        raise BatchTooLarge(f'{name} is larger than {MAX_BATCH_FILE_BYTES} bytes')
+    return data
 
 
-def decimal_to_binary(value, max_bits=50):
-    """Convert decimal value in [0,1] to binary representation
+def iter_batch_documents(files):
+    """Yield (name, bytes) for every uploaded file, expanding zip/tar archives
     
-    Args:
-        value: Decimal value between 0 and 1
-        max_bits: Maximum number of bits to generate
-        
-    Returns:
-        Binary string representation
+    Raises:
+        BatchTooLarge: If a document or the batch total is over its limit
     """
-    if value <= 0:
-        return "0"
-    if value >= 1:
-        return "1" * max_bits
-    
-    binary = ""
-    remaining = Decimal(value)
-    
-    for _ in range(max_bits):
-        remaining *= 2
-        if remaining >= 1:
-            binary += "1"
-            remaining -= 1
+    total = 0
+    for name, data in _iter_batch_members(files):
+        total += len(data)
+        if total > MAX_BATCH_TOTAL_BYTES:
+            raise BatchTooLarge(f'Batch is larger than {MAX_BATCH_TOTAL_BYTES} bytes uncompressed')
+        yield name, data
+
+
+def _iter_batch_members(files):
+    for file in files:
+        filename = file.filename.lower()
+        if filename.endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        name = f'{file.filename}/{info.filename}'
+                        with archive.open(info) as member:
+                            yield name, read_batch_document(member, name, info.file_size)
+        elif filename.endswith(ARCHIVE_EXTENSIONS):
+            with tarfile.open(fileobj=file.stream, mode='r:*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        name = f'{file.filename}/{member.name}'
+                        yield name, read_batch_document(archive.extractfile(member), name, member.size)
         else:
-            binary += "0"
-        
-        # Stop if we've captured enough precision
-        if remaining == 0:
-            break
-    
-    return binary
+            yield file.filename, read_batch_document(file.stream, file.filename)
 
 
-def binary_to_decimal(binary):
-    """Convert binary string to decimal value in [0,1]
-    
-    Args:
-        binary: String of '0' and '1' characters
-        
-    Returns:
-        Decimal value
-    """
-    if not binary:
-        return Decimal(0)
-    
-    value = Decimal(0)
-    for i, bit in enumerate(binary):
-        if bit == '1':
-            value += Decimal(1) / (Decimal(2) ** (i + 1))
-    
-    return value
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many text files (or zip/tar archives of them) in a worker pool"""
+    files = [f for f in request.files.getlist('files') + request.files.getlist('file') if f.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
 
+    try:
+        documents = list(itertools.islice(iter_batch_documents(files), MAX_BATCH_FILES + 1))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        return jsonify({'error': f'Invalid archive: {e}'}), 400
+    except BatchTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+
+    if not documents:
+        return jsonify({'error': 'No files found in the upload'}), 400
+    if len(documents) > MAX_BATCH_FILES:
+        return jsonify({'error': f'At most {MAX_BATCH_FILES} files per batch'}), 400
+
+    names, payloads = zip(*documents)
+    results = list(get_batch_executor().map(analyze_document, names, payloads))
+
+    # Corpus-wide totals over the files that were analyzed
+    analyzed = [r for r in results if 'error' not in r]
+    ascii_total = sum(r['ascii_size'] for r in analyzed)
+    huffman_total = sum(r['huffman_size'] for r in analyzed)
+    fano_total = sum(r['fano_size'] for r in analyzed)
+    totals = {
+        'files': len(results),
+        'analyzed': len(analyzed),
+        'failed': len(results) - len(analyzed),
+        'text_length': sum(r['text_length'] for r in analyzed),
+        'ascii_size': ascii_total,
+        'huffman_size': huffman_total,
+        'fano_size': fano_total,
+        'huffman_compression': round((1 - huffman_total / ascii_total) * 100, 2) if ascii_total else 0,
+        'fano_compression': round((1 - fano_total / ascii_total) * 100, 2) if ascii_total else 0,
+        'all_lossless': all(r['huffman_lossless'] and r['fano_lossless'] for r in analyzed)
+    }
 
-def adaptive_arithmetic_decode(binary, num_symbols, alphabet):
-    """Decode binary string using adaptive arithmetic coding
-    
-    Args:
-        binary: Binary string to decode
-        num_symbols: Number of symbols to decode
-        alphabet: List of symbols in the alphabet
-        
-    Returns:
-        List of decoded symbols
-    """
-    if not binary or num_symbols <= 0 or not alphabet:
-        return []
-    
-    # Convert binary to decimal value
-    value = binary_to_decimal(binary)
-    
-    # Initialize model with same alphabet
-    alphabet = sorted(alphabet)
-    model = initialize_adaptive_model(alphabet)
-    
-    decoded = []
-    
-    # Decode each symbol
-    for _ in range(num_symbols):
-        # Find which symbol's range contains the current value
-        for symbol in sorted(model.keys()):
-            symbol_low = Decimal(model[symbol]['cumulative_prob'])
-            symbol_high = symbol_low + Decimal(model[symbol]['probability'])
-            
-            if symbol_low <= value < symbol_high:
-                decoded.append(symbol)
-                
-                # Scale value back to [0,1) for next symbol
-                range_width = symbol_high - symbol_low
-                if range_width > 0:
-                    value = (value - symbol_low) / range_width
-                
-                # Update model to match encoder
-                model = update_adaptive_model(model, symbol)
-                break
-    
-    return decoded
+    return jsonify({'files': results, 'totals': totals})
 
+# ===============================================
+# PROJECT 3 - Universal Source Coding (Fixed)
+# ===============================================
+# First symbols / bytes of every arithmetic-coding stream kept for the response
+ARITHMETIC_PREVIEW_SYMBOLS = 50
+ARITHMETIC_PREVIEW_BYTES = 13
+# Model orders below the requested one are compared on this many leading symbols
+ORDER_SAMPLE_SYMBOLS = 1 << 14
+
+
+def head_chunks(chunks, limit):
+    """The chunks of a stream cut off after its first limit symbols"""
+    for chunk in chunks:
+        if limit <= 0:
+            return
+        yield chunk[:limit]
+        limit -= len(chunk)
 
-def calculate_arithmetic_efficiency(original_sequence, encoded_binary):
-    """Calculate compression efficiency for arithmetic coding
+
+def arithmetic_code_stream(chunks, alphabet, order=0):
+    """Adaptive arithmetic coding of a stream of symbol chunks, verified by a
+    decoder running alongside the encoder
     
-    Efficiency = (encoded bits) / (fixed-length bits)
-    Values < 1 indicate compression
-    Values > 1 indicate expansion
+    Symbols are coded as indices into the sorted alphabet by an incremental
+    32-bit range coder. Bytes are handed to the decoder as soon as the
+    encoder completes them, and only the symbols the decoder has not caught
+    up with yet are kept for the comparison, so memory does not grow with
+    the input.
     
     Args:
-        original_sequence: Original sequence of symbols
-        encoded_binary: Binary string from encoding
+        chunks: Iterable of chunks (strings, lists of symbols, or bytes)
+        alphabet: Sorted list of every symbol in the stream; bytes chunks
+            are coded by value, with alphabet BYTE_ALPHABET
+        order: Context order of the model (0: adaptive order-0 model,
+            k > 0: PPM over the previous 1..k symbols)
         
     Returns:
-        Efficiency ratio
+        Dictionary with 'length', 'encoded_bits', 'encoded_preview', 'head',
+        'decoded_head', 'is_lossless' and 'encode_seconds' (time spent in
+        the encoder alone)
     """
-    encoded_bits = len(encoded_binary)
-    
-    # Calculate fixed-length bits needed
-    alphabet_size = len(set(original_sequence))
-    if alphabet_size <= 1:
-        fixed_bits_per_symbol = 1
-    else:
-        fixed_bits_per_symbol = math.ceil(math.log2(alphabet_size))
-    
-    fixed_bits_total = len(original_sequence) * fixed_bits_per_symbol
-    
-    if fixed_bits_total > 0:
-        efficiency = encoded_bits / fixed_bits_total
-    else:
-        efficiency = 1.0
+    symbol_index = {symbol: i for i, symbol in enumerate(alphabet)}
+    encoder = RangeEncoder(len(alphabet), order)
+    decoder = RangeDecoder(len(alphabet), order=order)
+    head, decoded_head, encoded_head = [], [], bytearray()
+    unchecked = []
+    is_lossless = True
+    
+    def check(data, decoded):
+        nonlocal is_lossless
+        encoded_head.extend(data[:ARITHMETIC_PREVIEW_BYTES - len(encoded_head)])
+        decoded_head.extend(alphabet[i] for i in decoded[:ARITHMETIC_PREVIEW_SYMBOLS - len(decoded_head)])
+        is_lossless = is_lossless and decoded == unchecked[:len(decoded)]
+        del unchecked[:len(decoded)]
+    
+    encode_seconds = 0.0
+    for chunk in chunks:
+        head.extend(chunk[:ARITHMETIC_PREVIEW_SYMBOLS - len(head)])
+        if isinstance(chunk, (bytes, bytearray)):
+            indices = chunk
+        else:
+            indices = [symbol_index[symbol] for symbol in chunk]
+        unchecked.extend(indices)
+        start = time.perf_counter()
+        data = encoder.encode(indices).take_bytes()
+        encode_seconds += time.perf_counter() - start
+        check(data, decoder.feed(data, encoder.held_zeros))
+    start = time.perf_counter()
+    data = encoder.finish()
+    encode_seconds += time.perf_counter() - start
+    check(data, decoder.feed(data) + decoder.finish(encoder.length))
     
-    return efficiency
+    return {
+        'length': encoder.length,
+        'encoded_bits': encoder.bit_length,
+        'encoded_preview': bits_preview(encoded_head, encoder.bit_length, 100),
+        'head': head,
+        'decoded_head': decoded_head,
+        'is_lossless': is_lossless and not unchecked,
+        'encode_seconds': encode_seconds
+    }
+
+
+def symbol_rate(coded):
+    """Encoder throughput (symbols/s) of an arithmetic_code_stream result"""
+    return round(coded['length'] / coded['encode_seconds']) if coded['encode_seconds'] > 0 else None
 
 
 @app.route('/analyze_project3_part1', methods=['POST'])
+@cached_result
 def analyze_project3_part1():
-    """Project 3 Part 1: Adaptive Arithmetic Coding - FIXED VERSION"""
+    """Project 3 Part 1: Adaptive Arithmetic Coding - FIXED VERSION
+    
+    An uploaded file is streamed: one pass counts its alphabet, then the
+    requested model order encodes and verifies it chunk by chunk, so it can
+    be any size. In byte mode the raw bytes are coded over BYTE_ALPHABET. model_order=k codes each sequence with PPM context models
+    of orders 1..k on top of the order-0 model; orders 0..k are compared on
+    the first ORDER_SAMPLE_SYMBOLS symbols.
+    """
+    try:
+        model_order = parse_model_order()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Get input text
     text = request.form.get('text', '')
     
-    if not text:
+    mode = 'text'
+    if text:
+        custom_counts = count_symbols(text)
+        custom_chunks = lambda: [text]
+    else:
         if 'file' not in request.files:
             return jsonify({'error': 'No file or text provided'}), 400
 
@@ -987,9 +1483,18 @@ def analyze_project3_part1():
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
 
-        text = file.read().decode('utf-8')
+        # Byte mode codes every byte value as one symbol
+        try:
+            mode = parse_coding_mode()
+            custom_counts, _ = count_stream(file.stream, mode)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def custom_chunks():
+            file.stream.seek(0)
+            return iter_blocks(file.stream, mode)
     
-    if not text:
+    if not custom_counts:
         return jsonify({'error': 'Empty input'}), 400
 
     # Prepare S3 sequence (clean the text)
@@ -1000,57 +1505,87 @@ def analyze_project3_part1():
     test_sequences = {
         'S1': ['A', 'B', 'B', 'C', 'A'],
         'S2': ['A', 'B', 'C', 'A', 'B', 'A', 'C', 'B', 'A', 'B', 'C', 'C', 'A', 'C', 'B', 'A', 'A', 'B', 'B', 'C', 'C', 'A', 'B', 'A', 'A', 'B', 'B'],
-        'S3': list(s3_cleaned),
-        'Custom': list(text)
+        'S3': list(s3_cleaned)
     }
+    # (chunk source, symbol counts, coded alphabet) of every sequence
+    inputs = {name: (lambda sequence=sequence: [sequence], count_symbols(sequence), sorted(set(sequence)))
+              for name, sequence in test_sequences.items()}
+    inputs['Custom'] = (custom_chunks, custom_counts,
+                        BYTE_ALPHABET if mode == 'bytes' else sorted(custom_counts))
     
     results = {}
     
-    for seq_name, sequence in test_sequences.items():
+    for seq_name, (chunks, counts, alphabet) in inputs.items():
         try:
-            # Encode
-            binary, debug_info = adaptive_arithmetic_encode(sequence)
+            # Encode with the requested order, decoding alongside to verify
+            coded = arithmetic_code_stream(chunks(), alphabet, model_order)
             
-            # Decode to verify
-            alphabet = debug_info.get('alphabet', sorted(list(set(sequence))))
-            decoded_sequence = adaptive_arithmetic_decode(binary, len(sequence), alphabet)
+            # Compare the orders up to model_order on a prefix of the input
+            orders = []
+            for order in range(model_order + 1) if model_order else []:
+                sample = arithmetic_code_stream(head_chunks(chunks(), ORDER_SAMPLE_SYMBOLS), alphabet, order)
+                orders.append({
+                    'order': order,
+                    'sample_length': sample['length'],
+                    'encoded_length': sample['encoded_bits'],
+                    'bits_per_symbol': round(sample['encoded_bits'] / sample['length'], 4),
+                    'is_lossless': sample['is_lossless'],
+                    'symbols_per_second': symbol_rate(sample)
+                })
+            length = coded['length']
+            encoded_bits = coded['encoded_bits']
             
-            # Calculate efficiency
-            efficiency = calculate_arithmetic_efficiency(sequence, binary)
+            # Static rANS/tANS with the counted frequencies, for comparison
+            try:
+                ans = ans_code_stream(chunks(), counts)
+                ans_results = {
+                    'rans_length': ans['rans_bits'],
+                    'rans_bits_per_symbol': round(ans['rans_bits'] / length, 4) if length > 0 else 0,
+                    'tans_length': ans['tans_bits'],
+                    'tans_bits_per_symbol': round(ans['tans_bits'] / length, 4) if length > 0 else 0,
+                    'ans_lossless': ans['is_lossless']
+                }
+            except ValueError as e:
+                ans_results = {'ans_error': str(e)}
             
             # Calculate theoretical entropy
-            char_counts = Counter(sequence)
-            total = len(sequence)
-            probs = [count/total for count in char_counts.values()]
-            entropy = -sum(p * math.log2(p) for p in probs if p > 0)
+            entropy = entropy_from_counts(counts)
             
-            # Calculate compression metrics
-            alphabet_size = len(set(sequence))
+            # Calculate compression metrics; efficiency < 1 means compression
+            alphabet_size = len(alphabet)
             fixed_bits_per_symbol = math.ceil(math.log2(alphabet_size)) if alphabet_size > 1 else 1
-            fixed_bits_total = len(sequence) * fixed_bits_per_symbol
+            fixed_bits_total = length * fixed_bits_per_symbol
             
-            compression_ratio = (1 - len(binary) / fixed_bits_total) * 100 if fixed_bits_total > 0 else 0
+            efficiency = encoded_bits / fixed_bits_total if fixed_bits_total > 0 else 1.0
+            compression_ratio = (1 - encoded_bits / fixed_bits_total) * 100 if fixed_bits_total > 0 else 0
             
             # Prepare result
+            head, decoded_head = coded['head'], coded['decoded_head']
+            if alphabet is BYTE_ALPHABET:
+                head, decoded_head = [display_symbol(b) for b in head], [display_symbol(b) for b in decoded_head]
             results[seq_name] = {
-                'sequence': sequence[:50] + (['...'] if len(sequence) > 50 else []),
-                'sequence_display': ' '.join(str(s) for s in sequence[:30]) + (' ...' if len(sequence) > 30 else ''),
-                'encoded_binary': binary[:100] + ('...' if len(binary) > 100 else ''),
-                'decoded_sequence': decoded_sequence[:50] + (['...'] if len(decoded_sequence) > 50 else []),
-                'sequence_length': len(sequence),
-                'encoded_length': len(binary),
+                'sequence': head + (['...'] if length > len(head) else []),
+                'sequence_display': ' '.join(str(s) for s in head[:30]) + (' ...' if length > 30 else ''),
+                'encoded_binary': coded['encoded_preview'],
+                'decoded_sequence': decoded_head + (['...'] if length > len(decoded_head) else []),
+                'sequence_length': length,
+                'encoded_length': encoded_bits,
                 'fixed_length': fixed_bits_total,
                 'efficiency': round(efficiency, 4),
                 'entropy': round(entropy, 4),
                 'compression_ratio': round(compression_ratio, 2),
-                'is_lossless': sequence == decoded_sequence,
+                'is_lossless': coded['is_lossless'],
                 'alphabet_size': alphabet_size,
-                'bits_per_symbol': round(len(binary) / len(sequence), 4) if len(sequence) > 0 else 0
+                'bits_per_symbol': round(encoded_bits / length, 4) if length > 0 else 0,
+                'model_order': model_order,
+                'symbols_per_second': symbol_rate(coded),
+                'orders': orders,
+                **ans_results
             }
         except Exception as e:
             results[seq_name] = {
                 'error': str(e),
-                'sequence_length': len(sequence)
+                'sequence_length': sum(counts.values())
             }
     
     # Add summary statistics
@@ -1069,46 +1604,54 @@ def analyze_project3_part1():
 def lempel_ziv_encode(sequence):
     """Encode sequence using Lempel-Ziv (LZ78) algorithm
     
+    Phrases are extended through a (code, symbol) -> code trie, so each
+    symbol costs one lookup whatever the phrase length.
+    
     Args:
-        sequence: List of symbols to encode
+        sequence: Symbols to encode: a string or list of characters, or
+            bytes (symbols are then byte values)
         
     Returns:
         Tuple of (encoded_pairs, dictionary)
         encoded_pairs: List of (code, symbol) tuples
-        dictionary: Final dictionary mapping strings to codes
+        dictionary: Final dictionary mapping phrases (strings, or bytes) to codes
     """
-    if not sequence:
+    if not len(sequence):
         return [], {}
+    if isinstance(sequence, list):
+        sequence = ''.join(sequence)
     
-    # Initialize dictionary with empty string
-    dictionary = {'': 0}
+    # Initialize dictionary with the empty phrase
+    dictionary = {sequence[:0]: 0}
+    children = {}
     next_code = 1
     
     # Track encoding output
     encoded = []
-    current_string = ''
+    code, start = 0, 0
     
-    for symbol in sequence:
-        combined_string = current_string + symbol
+    for i, symbol in enumerate(sequence):
+        child = children.get((code, symbol))
         
-        if combined_string in dictionary:
-            # Continue building the current string
-            current_string = combined_string
+        if child is not None:
+            # Continue building the current phrase
+            code = child
         else:
-            # Output: (code for current_string, next symbol)
-            encoded.append((dictionary[current_string], symbol))
+            # Output: (code for the current phrase, next symbol)
+            encoded.append((code, symbol))
             
-            # Add new string to dictionary
-            dictionary[combined_string] = next_code
+            # Add the extended phrase to the dictionary
+            children[code, symbol] = next_code
+            dictionary[sequence[start:i + 1]] = next_code
             next_code += 1
             
-            # Reset to empty string
-            current_string = ''
+            # Restart from the empty phrase
+            code, start = 0, i + 1
     
-    # Handle any remaining string
-    if current_string:
-        # Output the code for remaining string with no following symbol
-        encoded.append((dictionary[current_string], None))
+    # Handle any remaining phrase
+    if start < len(sequence):
+        # Output the code for remaining phrase with no following symbol
+        encoded.append((code, None))
     
     return encoded, dictionary
 
@@ -1126,91 +1669,88 @@ def lempel_ziv_decode(encoded, alphabet):
     if not encoded:
         return []
     
-    # Initialize dictionary with empty string
-    dictionary = {0: ''}
+    # Initialize dictionary with the empty phrase (phrases are symbol tuples)
+    dictionary = {0: ()}
     next_code = 1
     
     decoded = []
     
     for code, symbol in encoded:
-        # Get the string corresponding to the code
+        # Get the phrase corresponding to the code
         if code in dictionary:
             decoded_string = dictionary[code]
         else:
             # This shouldn't happen in valid LZ78
-            decoded_string = ''
+            decoded_string = ()
         
-        # Output the decoded string
-        decoded.extend(list(decoded_string))
+        # Output the decoded phrase
+        decoded.extend(decoded_string)
         
         # If there's a following symbol, output it and add to dictionary
         if symbol is not None:
             decoded.append(symbol)
             
-            # Add new string to dictionary
-            new_string = decoded_string + symbol
+            # Add new phrase to dictionary
+            new_string = decoded_string + (symbol,)
             dictionary[next_code] = new_string
             next_code += 1
     
     return decoded
 
-def lempel_ziv_encode_to_binary(sequence):
-    """Encode sequence to binary using Lempel-Ziv
+def lempel_ziv_encode_packed(sequence, alphabet=None):
+    """Encode sequence to a packed bitstream using Lempel-Ziv
+    
+    Each (code, symbol) pair is written as the Elias-gamma code of code+1
+    followed by the symbol's fixed-width alphabet index. The final
+    (code, None) pair, if any, has no symbol field.
     
     Args:
-        sequence: List of symbols to encode
+        sequence: Symbols to encode (see lempel_ziv_encode)
+        alphabet: Symbols the indices refer to (default: those of sequence),
+            e.g. the alphabet of a whole file coded block by block, or
+            BYTE_ALPHABET for bytes
         
     Returns:
-        Binary string representation
+        Tuple of (packed_bytes, n_bits)
     """
-    if not sequence:
-        return ""
+    if not len(sequence):
+        return b"", 0
     
     # Get the encoding
     encoded, dictionary = lempel_ziv_encode(sequence)
     
-    # Determine alphabet
-    alphabet = sorted(list(set(sequence)))
+    # Determine alphabet; byte values are their own indices
+    symbol_index = None
+    if alphabet is not BYTE_ALPHABET:
+        alphabet = sorted(set(sequence) if alphabet is None else alphabet)
+        symbol_index = {symbol: i for i, symbol in enumerate(alphabet)}
     
     # Calculate bits needed for symbols
     symbol_bits = math.ceil(math.log2(len(alphabet))) if len(alphabet) > 1 else 1
     
-    # Create symbol to binary mapping
-    symbol_to_binary = {symbol: format(i, f'0{symbol_bits}b') 
-                        for i, symbol in enumerate(alphabet)}
-    
-    # Elias-gamma encode helpers (use code+1 so 0 -> 1)
-    def gamma_encode_int(k):
-        # k is positive integer >= 1
-        n = k.bit_length() - 1  # floor(log2(k))
-        # prefix n zeros, then binary(k) in (n+1) bits
-        return ('0' * n) + format(k, f'0{n+1}b')
-    
-    # Convert encoded pairs to binary
-    parts = []
+    writer = BitWriter()
     for code, symbol in encoded:
-        # encode code as gamma(code+1) to handle code==0
-        parts.append(gamma_encode_int(code + 1))
-        # encode symbol field fixed width
+        # Elias-gamma of k = code+1: floor(log2(k)) zeros, then k itself
+        k = code + 1
+        writer.write(k, 2 * k.bit_length() - 1)
         if symbol is not None:
-            parts.append(symbol_to_binary[symbol])
-        else:
-            parts.append('0' * symbol_bits)
+            writer.write(symbol if symbol_index is None else symbol_index[symbol], symbol_bits)
     
-    return ''.join(parts)
+    return writer.getvalue(), len(writer)
 
 
-def lempel_ziv_decode_from_binary(binary, alphabet):
-    """Decode binary string using Lempel-Ziv
+def lempel_ziv_decode_packed(data, n_bits, alphabet):
+    """Decode a packed Lempel-Ziv bitstream
     
     Args:
-        binary: Binary string to decode
+        data: Packed bytes from lempel_ziv_encode_packed
+        n_bits: Number of valid bits in data
         alphabet: List of symbols in the alphabet
         
     Returns:
         List of decoded symbols
     """
-    if not binary or not alphabet:
+    if not n_bits or not alphabet:
         return []
     
     alphabet = sorted(alphabet)
@@ -1218,67 +1758,39 @@ def lempel_ziv_decode_from_binary(binary, alphabet):
     # Calculate bits per symbol (fixed)
     symbol_bits = math.ceil(math.log2(len(alphabet))) if len(alphabet) > 1 else 1
     
-    # Create binary to symbol mapping
-    binary_to_symbol = {format(i, f'0{symbol_bits}b'): symbol 
-                        for i, symbol in enumerate(alphabet)}
+    reader = BitReader(data, n_bits)
+    decoded = []
+    dictionary = {0: ()}
+    next_code = 1
     
-    # Elias-gamma decode helper
-    def gamma_decode_at(s, pos):
-        # returns (value, new_pos) where value is decoded integer >=1
-        L = len(s)
-        # count leading zeros to find n
+    while reader.bits_remaining:
+        # Elias-gamma decode: count leading zeros, then read n+1 bits
         n = 0
-        while pos < L and s[pos] == '0':
+        while reader.bits_remaining and reader.read_bit() == 0:
             n += 1
-            pos += 1
-        # now read n+1 bits (including the '1' we just hit or next bit)
-        if pos + (n + 1) > L:
-            return None, pos  # incomplete
-        val_bits = s[pos:pos + n + 1]
-        pos += n + 1
-        val = int(val_bits, 2)
-        return val, pos
-    
-    decoded = []
-    dictionary = {0: ''}
-    next_code = 1
-    i = 0
-    L = len(binary)
-    
-    # parse until we run out of full (gamma-coded code + symbol_bits)
-    while i < L:
-        # decode gamma-coded integer
-        code_val, new_i = gamma_decode_at(binary, i)
-        if code_val is None:
+        if n > reader.bits_remaining:
             break  # incomplete code at end
-        i = new_i
-        code = code_val - 1  # original code (0 allowed)
-        
-        # ensure we have symbol_bits available
-        if i + symbol_bits > L:
-            break  # incomplete symbol at end
-        symbol_str = binary[i:i + symbol_bits]
-        i += symbol_bits
+        code = ((1 << n) | reader.read(n)) - 1
         
-        # get decoded string for code
-        decoded_string = dictionary.get(code, '')
-        if decoded_string:
-            decoded.extend(list(decoded_string))
+        decoded_string = dictionary.get(code, ())
+        decoded.extend(decoded_string)
         
-        # symbol handling
-        if symbol_str != '0' * symbol_bits and symbol_str in binary_to_symbol:
-            symbol = binary_to_symbol[symbol_str]
-            decoded.append(symbol)
-            # add new dictionary entry
-            dictionary[next_code] = decoded_string + symbol
-            next_code += 1
-        else:
-            # (code, None) pair - no new entry
-            pass
+        # A pair without a symbol field can only be the last one
+        if not reader.bits_remaining:
+            break
+        if symbol_bits > reader.bits_remaining:
+            break  # incomplete symbol at end
+        index = reader.read(symbol_bits)
+        if index >= len(alphabet):
+            break
+        symbol = alphabet[index]
+        decoded.append(symbol)
+        dictionary[next_code] = decoded_string + (symbol,)
+        next_code += 1
     
     return decoded
 
-def calculate_lz_efficiency(original_sequence, encoded_binary):
+def calculate_lz_efficiency(original_sequence, encoded_bits, alphabet=None):
     """Calculate compression efficiency for Lempel-Ziv coding
     
     Efficiency = (encoded bits) / (fixed-length bits)
@@ -1287,15 +1799,14 @@ def calculate_lz_efficiency(original_sequence, encoded_binary):
     
     Args:
         original_sequence: Original sequence of symbols
-        encoded_binary: Binary string from encoding
+        encoded_bits: Length in bits of the encoded stream
+        alphabet: Symbols coded (default: those of the sequence)
         
     Returns:
         Efficiency ratio
     """
-    encoded_bits = len(encoded_binary)
-    
     # Calculate fixed-length bits needed
-    alphabet_size = len(set(original_sequence))
+    alphabet_size = len(set(original_sequence) if alphabet is None else alphabet)
     if alphabet_size <= 1:
         fixed_bits_per_symbol = 1
     else:
@@ -1320,30 +1831,38 @@ def get_lz_dictionary_stats(dictionary):
     Returns:
         Dictionary with statistics
     """
-    # Count actual entries (excluding empty string)
-    actual_entries = sum(1 for k, v in dictionary.items() if k != '' and v != 0)
+    # Count actual entries (excluding the empty phrase)
+    actual_entries = sum(1 for k, v in dictionary.items() if len(k) and v != 0)
     
     # Get max code value
     max_code = max(dictionary.values()) if dictionary else 0
     
-    # Get longest string
+    # Get longest phrase (byte phrases are shown symbol by symbol)
     longest_string = max((k for k in dictionary.keys()), key=len, default='')
+    longest_length = len(longest_string)
+    if isinstance(longest_string, bytes):
+        longest_string = ' '.join(display_symbol(b) for b in longest_string)
     
     return {
         'total_entries': len(dictionary),
         'actual_patterns': actual_entries,
         'max_code': max_code,
         'longest_pattern': longest_string,
-        'longest_length': len(longest_string)
+        'longest_length': longest_length
     }
 
 
 @app.route('/analyze_project3_part2', methods=['POST'])
+@cached_result
 def analyze_project3_part2():
-    """Project 3 Part 2: Lempel-Ziv Coding - FIXED VERSION"""
+    """Project 3 Part 2: Lempel-Ziv Coding - FIXED VERSION
+    
+    In byte mode an uploaded file is coded as raw bytes over BYTE_ALPHABET.
+    """
     
     # Get input text
     text = request.form.get('text', '')
+    custom_alphabet = None
     
     if not text:
         if 'file' not in request.files:
@@ -1353,7 +1872,15 @@ def analyze_project3_part2():
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
 
-        text = file.read().decode('utf-8')
+        # Byte mode codes every byte value as one symbol
+        try:
+            text = file.read()
+            if parse_coding_mode() == 'bytes':
+                custom_alphabet = BYTE_ALPHABET
+            else:
+                text = text.decode('utf-8')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
     if not text:
         return jsonify({'error': 'Empty input'}), 400
@@ -1367,55 +1894,58 @@ def analyze_project3_part2():
         'S1': ['A', 'B', 'B', 'C', 'A'],
         'S2': ['A', 'B', 'C', 'A', 'B', 'A', 'C', 'B', 'A', 'B', 'C', 'C', 'A', 'C', 'B', 'A', 'A', 'B', 'B', 'C', 'C', 'A', 'B', 'A', 'A', 'B', 'B'],
         'S3': list(s3_cleaned),
-        'Custom': list(text)
+        'Custom': text if custom_alphabet is BYTE_ALPHABET else list(text)
     }
     
     results = {}
     
     for seq_name, sequence in test_sequences.items():
         try:
+            alphabet = custom_alphabet if seq_name == 'Custom' and custom_alphabet else sorted(set(sequence))
+            
             # Encode
             encoded_pairs, dictionary = lempel_ziv_encode(sequence)
-            binary = lempel_ziv_encode_to_binary(sequence)
+            packed, encoded_bits = lempel_ziv_encode_packed(sequence, alphabet)
             
             # Get dictionary statistics
             dict_stats = get_lz_dictionary_stats(dictionary)
             
             # Decode to verify
-            alphabet = sorted(list(set(sequence)))
             decoded_sequence = lempel_ziv_decode(encoded_pairs, alphabet)
             
             # Also test binary decode
-            decoded_from_binary = lempel_ziv_decode_from_binary(binary, alphabet)
+            decoded_from_binary = lempel_ziv_decode_packed(packed, encoded_bits, alphabet)
             
             # Calculate efficiency
-            efficiency = calculate_lz_efficiency(sequence, binary)
+            efficiency = calculate_lz_efficiency(sequence, encoded_bits, alphabet)
             
             # Calculate theoretical entropy
-            char_counts = Counter(sequence)
-            total = len(sequence)
-            probs = [count/total for count in char_counts.values()]
-            entropy = -sum(p * math.log2(p) for p in probs if p > 0)
+            entropy = sequence_entropy(sequence)
+            
+            # Byte sequences decode to lists of byte values
+            if isinstance(sequence, bytes):
+                decoded_sequence, decoded_from_binary = bytes(decoded_sequence), bytes(decoded_from_binary)
             
             # Calculate compression metrics
-            alphabet_size = len(set(sequence))
+            alphabet_size = len(alphabet)
             fixed_bits_per_symbol = math.ceil(math.log2(alphabet_size)) if alphabet_size > 1 else 1
             fixed_bits_total = len(sequence) * fixed_bits_per_symbol
             
-            compression_ratio = (1 - len(binary) / fixed_bits_total) * 100 if fixed_bits_total > 0 else 0
+            compression_ratio = (1 - encoded_bits / fixed_bits_total) * 100 if fixed_bits_total > 0 else 0
             
             # Format encoded pairs for display
             pairs_display = str(encoded_pairs[:10]) + ('...' if len(encoded_pairs) > 10 else '')
+            show = display_symbol if isinstance(sequence, bytes) else str
             
             # Prepare result
             results[seq_name] = {
-                'sequence': sequence[:50] + (['...'] if len(sequence) > 50 else []),
-                'sequence_display': ' '.join(str(s) for s in sequence[:30]) + (' ...' if len(sequence) > 30 else ''),
+                'sequence': [show(s) for s in sequence[:50]] + (['...'] if len(sequence) > 50 else []),
+                'sequence_display': ' '.join(show(s) for s in sequence[:30]) + (' ...' if len(sequence) > 30 else ''),
                 'encoded_pairs': pairs_display,
-                'encoded_binary': binary[:100] + ('...' if len(binary) > 100 else ''),
-                'decoded_sequence': decoded_sequence[:50] + (['...'] if len(decoded_sequence) > 50 else []),
+                'encoded_binary': bits_preview(packed, encoded_bits, 100),
+                'decoded_sequence': [show(s) for s in decoded_sequence[:50]] + (['...'] if len(decoded_sequence) > 50 else []),
                 'sequence_length': len(sequence),
-                'encoded_length': len(binary),
+                'encoded_length': encoded_bits,
                 'fixed_length': fixed_bits_total,
                 'efficiency': round(efficiency, 4),
                 'entropy': round(entropy, 4),
@@ -1428,7 +1958,7 @@ def analyze_project3_part2():
                 'longest_pattern': dict_stats['longest_pattern'],
                 'longest_pattern_length': dict_stats['longest_length'],
                 'num_encoded_pairs': len(encoded_pairs),
-                'bits_per_symbol': round(len(binary) / len(sequence), 4) if len(sequence) > 0 else 0
+                'bits_per_symbol': round(encoded_bits / len(sequence), 4) if len(sequence) > 0 else 0
             }
         except Exception as e:
             results[seq_name] = {
@@ -1448,6 +1978,280 @@ def analyze_project3_part2():
     
     return jsonify(results)
     
+# ===============================================
+# CONTAINER - Compressed Files (/compress, /decompress)
+# ===============================================
+COMPRESSED_EXTENSION = '.ssbx'
+# Container / decompressed output stays in memory up to this size, then spills to disk
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
+def fano_code_from_counts(char_counts):
+    """Shannon-Fano codebook rebuilt deterministically from character counts"""
+    pmf = pmf_from_counts(dict(sorted(char_counts.items())))
+    return build_fano_code(sorted(pmf.items(), key=lambda x: x[1], reverse=True))
+
+
+def container_codebook(method, model, mode='text'):
+    """Rebuild the prefix codebook described by a container model
+    
+    Huffman models store canonical code lengths, Shannon-Fano models the
+    character counts the code was built from.
+    """
+    byte_symbols = mode == 'bytes'
+    if method == 'fano':
+        return fano_code_from_counts(dict(unpack_symbol_table(model, 'Q', byte_symbols)))
+
+    lengths = dict(unpack_symbol_table(model, 'B', byte_symbols))
+    if lengths:
+        longest = max(lengths.values())
+        # Valid prefix-code lengths satisfy the Kraft inequality
+        if min(lengths.values()) < 1 or sum(1 << (longest - l) for l in lengths.values()) > (1 << longest):
+            raise ValueError('Corrupt code lengths in container header')
+    return canonical_codebook(lengths)
+
+
+def build_container_model(method, char_counts):
+    """Build a prefix codebook and its serialized container model
+    
+    Returns:
+        Tuple of (codebook, model_bytes)
+    """
+    if method == 'huffman':
+        codebook = build_huffman_code(char_counts)
+        return codebook, pack_symbol_table(((char, len(code)) for char, code in codebook.items()), 'B')
+    return fano_code_from_counts(char_counts), pack_symbol_table(char_counts.items(), 'Q')
+
+
+def compress_block(text, method, codebook):
+    """Encode one block for a container (runs in a worker process)
+    
+    Without a shared codebook the block gets its own code, built from its
+    own character counts, and carries the model in its index entry.
+    
+    Returns:
+        Tuple of (ContainerBlock, packed_bytes)
+    """
+    model = b''
+    if codebook is None:
+        codebook, model = build_container_model(method, count_symbols(text))
+    data, n_bits = encode_block(text, codebook)
+    return ContainerBlock(len(text), n_bits, model), data
+
+
+def compress_lz78_block(text, alphabet):
+    """LZ78-encode one block for a container (runs in a worker process)
+    
+    Every block starts with an empty dictionary; symbol indices refer to
+    the alphabet of the whole file.
+    
+    Returns:
+        Tuple of (ContainerBlock, packed_bytes)
+    """
+    data, n_bits = lempel_ziv_encode_packed(text, alphabet)
+    return ContainerBlock(len(text), n_bits, b''), data
+
+
+def decompress_lz78_block(data, block, alphabet):
+    """Decode and length-check one LZ78 container block (runs in a worker
+    process); an alphabet of byte values decodes to bytes"""
+    symbols = lempel_ziv_decode_packed(data, block.bits, alphabet)
+    text = bytes(symbols) if alphabet and isinstance(alphabet[0], int) else ''.join(symbols)
+    if len(text) != block.length:
+        raise ValueError(f'Decoded {len(text)} characters in a block of {block.length}')
+    return text
+
+
+def decompress_block(data, block, method, codebook, mode):
+    """Decode and length-check one container block (runs in a worker process)"""
+    if codebook is None:
+        codebook = container_codebook(method, block.model, mode)
+    text = decode_block(data, block.bits, codebook)
+    if len(text) != block.length:
+        raise ValueError(f'Decoded {len(text)} characters in a block of {block.length}')
+    return text
+
+
+def stream_checksum(stream):
+    """CRC-32 of an upload's bytes, read block by block"""
+    stream.seek(0)
+    checksum = 0
+    while True:
+        block = stream.read(CHUNK_SIZE)
+        if not block:
+            break
+        checksum = crc32_update(checksum, block)
+    stream.seek(0)
+    return checksum
+
+
+def iter_block_payloads(stream, blocks):
+    """Yield (packed_bytes, block) for every block of a container payload"""
+    for block in blocks:
+        data = stream.read((block.bits + 7) // 8)
+        if len(data) * 8 < block.bits:
+            raise ValueError('Truncated container payload')
+        yield data, block
+
+
+def iter_decoded_blocks(stream, header):
+    """Yield the text (bytes, or latin-1 text, in byte mode) of every block
+    of a container, in order
+    
+    Prefix-code and LZ78 blocks are byte-aligned and self-contained, so
+    they are decoded in parallel in the worker pool. Adaptive Huffman
+    carries its tree across the whole text and is stored (and decoded) as
+    a single block.
+    """
+    if header.method == 'lz78':
+        alphabet = unpack_symbol_table(header.model, '', header.mode == 'bytes')
+        blocks = ((data, block, alphabet) for data, block in iter_block_payloads(stream, header.blocks))
+        yield from imap_blocks(decompress_lz78_block, blocks)
+        return
+    if header.method == 'adaptive_huffman':
+        for data, block in iter_block_payloads(stream, header.blocks):
+            yield from adaptive_huffman_decode(data, block.bits, CHUNK_SIZE)
+        return
+    
+    codebook = container_codebook(header.method, header.model, header.mode) if header.model else None
+    blocks = ((data, block, header.method, codebook, header.mode)
+              for data, block in iter_block_payloads(stream, header.blocks))
+    yield from imap_blocks(decompress_block, blocks)
+
+
+def decompress_stream(stream, output):
+    """Decode a container into the original file bytes written to output,
+    verifying it
+    
+    Returns:
+        The parsed ContainerHeader
+    """
+    header = read_header(stream)
+    encoding = CODING_MODES[header.mode]
+    
+    checksum, length = 0, 0
+    for text in iter_decoded_blocks(stream, header):
+        data = text if isinstance(text, bytes) else text.encode(encoding)
+        checksum = crc32_update(checksum, data)
+        length += len(text)
+        output.write(data)
+    
+    if length != header.original_length:
+        raise ValueError(f'Decoded {length} characters, expected {header.original_length}')
+    if checksum != header.checksum:
+        raise ValueError('Checksum mismatch: the compressed file is corrupt')
+    return header
+
+
+@app.route('/compress', methods=['POST'])
+def compress():
+    """Compress an uploaded file into a downloadable container file
+    
+    Huffman and Shannon-Fano blocks are encoded in parallel, against one
+    global code or, with block_codebooks=1, a code per block; LZ78 blocks
+    are encoded in parallel too, each with a fresh dictionary. With
+    mode=bytes any file is coded as raw byte values.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    method = request.form.get('method', 'huffman').strip().lower()
+    if method not in METHOD_IDS:
+        return jsonify({'error': f"method must be one of {', '.join(METHOD_IDS)}"}), 400
+    block_codebooks = form_flag('block_codebooks')
+    try:
+        mode = parse_coding_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    encoding = CODING_MODES[mode]
+
+    stream = file.stream
+    try:
+        char_counts, _ = count_stream(stream, mode)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'File is not valid UTF-8 text (use mode=bytes)'}), 400
+    total_chars = sum(char_counts.values())
+    if not total_chars:
+        return jsonify({'error': 'Empty file'}), 400
+    checksum = stream_checksum(stream)
+
+    # The upload is closed once the view returns, so the container is built
+    # in spooled files and streamed from there
+    payload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    blocks = []
+    if method == 'lz78':
+        # Independent blocks, each with its own dictionary
+        model = pack_symbol_table(char_counts, '')
+        alphabet = sorted(char_counts)
+        chunks = ((chunk, alphabet) for chunk in iter_blocks(stream, mode))
+        for block, data in imap_blocks(compress_lz78_block, chunks):
+            blocks.append(block)
+            payload.write(data)
+    elif method == 'adaptive_huffman':
+        # One pass, no model: output is written as each chunk is encoded
+        model = b''
+        encoder = AdaptiveHuffmanEncoder()
+        for chunk in iter_text_chunks(stream, encoding=encoding):
+            payload.write(encoder.encode(chunk).take_bytes())
+        payload.write(encoder.finish())
+        blocks.append(ContainerBlock(total_chars, encoder.bit_length, b''))
+    else:
+        codebook, model = (None, b'') if block_codebooks else build_container_model(method, char_counts)
+        chunks = ((chunk, method, codebook) for chunk in iter_blocks(stream, mode))
+        for block, data in imap_blocks(compress_block, chunks):
+            blocks.append(block)
+            payload.write(data)
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    output.write(write_header(method, model, total_chars, checksum, blocks, mode))
+    payload.seek(0)
+    shutil.copyfileobj(payload, output)
+    payload.close()
+    output.seek(0)
+
+    response = send_file(output, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=file.filename + COMPRESSED_EXTENSION)
+    response.headers['X-Original-Length'] = str(total_chars)
+    response.headers['X-Payload-Bits'] = str(sum(block.bits for block in blocks))
+    response.headers['X-Blocks'] = str(len(blocks))
+    response.headers['X-Coding-Mode'] = mode
+    return response
+
+
+@app.route('/decompress', methods=['POST'])
+def decompress():
+    """Restore the original file of an uploaded container file"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        header = decompress_stream(file.stream, output)
+    except ValueError as e:
+        output.close()
+        return jsonify({'error': str(e)}), 400
+
+    name = file.filename
+    byte_mode = header.mode == 'bytes'
+    if name.endswith(COMPRESSED_EXTENSION):
+        name = name[:-len(COMPRESSED_EXTENSION)]
+    else:
+        name += '.bin' if byte_mode else '.txt'
+    output.seek(0)
+    response = send_file(output, mimetype='application/octet-stream' if byte_mode else 'text/plain',
+                         as_attachment=True, download_name=name)
+    response.headers['X-Compression-Method'] = header.method
+    return response
+
+
 # ===============================================
 # PROJECT 5 - BPSK BER Simulation
 # ===============================================
@@ -753,8 +753,12 @@ $(document).ready(function () {
 
         text += "Lossless Verification:\n";
         text += "─".repeat(70) + "\n";
-        text += `Shannon-Fano:         ${data.fano_lossless ? 'YES ✓' : 'NO ✗'}\n`;
-        text += `Huffman:              ${data.huffman_lossless ? 'YES ✓' : 'NO ✗'}\n\n`;
+        if (data.verified) {
+            text += `Shannon-Fano:         ${data.fano_lossless ? 'YES ✓' : 'NO ✗'}\n`;
+            text += `Huffman:              ${data.huffman_lossless ? 'YES ✓' : 'NO ✗'}\n\n`;
+        } else {
+            text += "Not run (send verify=1 for a full encode/decode round trip)\n\n";
+        }
 
         text += "Code Table Comparison (Top 20 Characters):\n";
         text += "─".repeat(70) + "\n";
@@ -2385,7 +2389,21 @@ function formatProject3Results(data, partNumber) {
                 (data.Custom.efficiency < 1.0 ? " (Compression)" : " (Expansion)") + "\n";
             text += "  Compression Ratio: " + data.Custom.compression_ratio.toFixed(2) + "%\n";
             text += "  Lossless: " + (data.Custom.is_lossless ? "YES ✓" : "NO ✗") + "\n";
-            text += "  Encoded Binary: " + data.Custom.encoded_binary + "\n\n";
+            text += "  Encoded Binary: " + data.Custom.encoded_binary + "\n";
+            if (data.Custom.orders && data.Custom.orders.length > 1) {
+                text += "  Bits per Symbol by Model Order (first " + data.Custom.orders[0].sample_length + " symbols):\n";
+                data.Custom.orders.forEach(o => {
+                    text += "    Order " + o.order + ": " + o.bits_per_symbol.toFixed(4) +
+                        " (" + o.symbols_per_second + " symbols/s)\n";
+                });
+            }
+            if (data.Custom.ans_error) {
+                text += "  Static rANS/tANS: " + data.Custom.ans_error + "\n";
+            } else if (data.Custom.rans_bits_per_symbol !== undefined) {
+                text += "  Static rANS: " + data.Custom.rans_bits_per_symbol.toFixed(4) + " bits/symbol\n";
+                text += "  Static tANS: " + data.Custom.tans_bits_per_symbol.toFixed(4) + " bits/symbol\n";
+            }
+            text += "\n";
         }
 
         // Display summary if available
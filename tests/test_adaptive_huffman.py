@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from utils.adaptive_huffman import AdaptiveHuffmanEncoder, AdaptiveHuffmanDecoder, adaptive_huffman_decode
+
+TEXT = 'Streams of héllo wörld ✓ 𝄞 and abracadabra\n' * 300
+
+
+def encode(text, chunk_size):
+    """Encode chunk by chunk; returns (list of byte pieces, bit length)."""
+    encoder = AdaptiveHuffmanEncoder()
+    pieces = [encoder.encode(text[start:start + chunk_size]).take_bytes()
+              for start in range(0, len(text), chunk_size)]
+    pieces.append(encoder.finish())
+    assert encoder.length == len(text)
+    return pieces, encoder.bit_length
+
+
+@pytest.mark.parametrize('text', [TEXT, 'a', 'ab' * 1000, ''.join(map(chr, range(32, 2000)))])
+@pytest.mark.parametrize('chunk_size', [1, 13, 100000])
+def test_streaming_roundtrip(text, chunk_size):
+    pieces, n_bits = encode(text, chunk_size)
+    decoder = AdaptiveHuffmanDecoder()
+    decoded = ''.join(decoder.feed(piece) for piece in pieces[:-1])
+    assert decoded + decoder.finish(pieces[-1], n_bits) == text
+
+
+@pytest.mark.parametrize('piece_bytes', [1, 7, 1 << 16])
+def test_piecewise_decode(piece_bytes):
+    pieces, n_bits = encode(TEXT, 1000)
+    assert ''.join(adaptive_huffman_decode(b''.join(pieces), n_bits, piece_bytes)) == TEXT
+
+
+def test_repeated_symbol_costs_little():
+    pieces, n_bits = encode('x' * 10000, 10000)
+    assert n_bits < 10000 + 64
+
+
+def test_truncated_stream_is_rejected():
+    pieces, n_bits = encode(TEXT, 1000)
+    data = b''.join(pieces)
+    with pytest.raises(ValueError):
+        ''.join(adaptive_huffman_decode(data[:len(data) // 2], n_bits))
+
+
+def test_stream_ending_inside_a_codeword_is_rejected():
+    # The first symbol is sent as the empty NYT code plus its 21-bit code point
+    pieces, n_bits = encode('é', 1)
+    with pytest.raises(ValueError):
+        AdaptiveHuffmanDecoder().finish(b''.join(pieces), n_bits - 3)
+
+
+def test_random_corruption_never_crashes():
+    rng = random.Random(4)
+    pieces, n_bits = encode(TEXT, 1000)
+    data = bytearray(b''.join(pieces))
+    for _ in range(20):
+        damaged = bytearray(data)
+        damaged[rng.randrange(len(damaged))] ^= 1 << rng.randrange(8)
+        try:
+            decoded = ''.join(adaptive_huffman_decode(bytes(damaged), n_bits))
+        except ValueError:
+            continue
+        assert decoded != TEXT
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from utils import ans
+from utils.ans import RansTable, TansTable, ans_lanes, normalize_frequencies
+
+PROBS = [0.4, 0.2, 0.1, 0.1, 0.1, 0.05, 0.03, 0.02]
+
+
+@pytest.fixture(autouse=True, params=['compiled', 'numpy'])
+def decode_path(request, monkeypatch):
+    # Without numba the decoders fall back to the lane-vectorized NumPy loops
+    if request.param == 'numpy':
+        monkeypatch.setattr(ans, 'njit', None)
+    return request.param
+
+
+def sample(length, seed=1):
+    indices = np.random.default_rng(seed).choice(len(PROBS), size=length, p=PROBS)
+    counts = np.bincount(indices, minlength=len(PROBS)) + 1
+    return indices, counts.tolist()
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+@pytest.mark.parametrize('length', [1, 5, 4096, 50000])
+def test_roundtrip(table_class, length):
+    indices, counts = sample(length)
+    table = table_class(counts)
+    data, n_bits = table.encode(indices)
+    assert len(data) * 8 >= n_bits
+    assert np.array_equal(table.decode(data, n_bits, length), indices)
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+def test_empty_input(table_class):
+    table = table_class([3, 1])
+    data, n_bits = table.encode(np.zeros(0, dtype=np.int64))
+    assert len(table.decode(data, n_bits, 0)) == 0
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+def test_lanes_follow_input_length(table_class):
+    assert (ans_lanes(1), ans_lanes(4096), ans_lanes(4097)) == (1, 1, 2)
+    indices, counts = sample(3 * 4096 + 1)
+    data, n_bits = table_class(counts).encode(indices)
+    assert np.array_equal(table_class(counts).decode(data, n_bits, len(indices)), indices)
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+@pytest.mark.parametrize('cut_bytes', [1, 2, 64])
+def test_truncated_input_is_rejected(table_class, cut_bytes):
+    indices, counts = sample(50000)
+    table = table_class(counts)
+    data, n_bits = table.encode(indices)
+    with pytest.raises(ValueError, match='Truncated|Corrupt'):
+        table.decode(data[:-cut_bytes], n_bits - 8 * cut_bytes, len(indices))
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+def test_stream_shorter_than_the_states_is_rejected(table_class):
+    indices, counts = sample(50000)
+    table = table_class(counts)
+    data, _ = table.encode(indices)
+    with pytest.raises(ValueError, match='Truncated'):
+        table.decode(data[:10], 80, len(indices))
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+@pytest.mark.parametrize('where', [0.0, 0.5, 1.0])
+def test_corrupt_input_is_rejected(table_class, where):
+    indices, counts = sample(50000)
+    table = table_class(counts)
+    data, n_bits = table.encode(indices)
+    damaged = bytearray(data)
+    damaged[int(where * (len(data) - 1))] ^= 0x10
+    with pytest.raises(ValueError, match='Corrupt|Truncated'):
+        table.decode(bytes(damaged), n_bits, len(indices))
+
+
+def test_wrong_length_is_rejected():
+    indices, counts = sample(1000)
+    table = RansTable(counts)
+    data, n_bits = table.encode(indices)
+    with pytest.raises(ValueError):
+        table.decode(data, n_bits, len(indices) + 1)
+
+
+@pytest.mark.parametrize('scale_bits', [12, 16])
+def test_normalized_frequencies_keep_every_symbol(scale_bits):
+    counts = [10 ** 6, 1, 1, 5, 0]
+    freqs = normalize_frequencies(counts, scale_bits)
+    assert freqs.sum() == 1 << scale_bits
+    assert (freqs[:4] >= 1).all() and freqs[4] == 0
+
+
+@pytest.mark.parametrize('table_class', [RansTable, TansTable])
+def test_symbol_missing_from_the_table_is_rejected(table_class):
+    with pytest.raises(ValueError, match='missing'):
+        table_class([5, 1, 2, 0]).encode(np.array([0, 1, 3, 2]))
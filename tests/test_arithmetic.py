@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from utils.arithmetic import RangeEncoder, RangeDecoder
+
+N_SYMBOLS = 256
+
+
+def skewed_indices(seed=1, length=20000):
+    """Long runs of the lowest and highest symbols (zero and 0xFF output
+    bytes, the held-zero and carry paths) mixed with random symbols."""
+    rng = random.Random(seed)
+    indices = []
+    while len(indices) < length:
+        run = rng.choice([0, N_SYMBOLS - 1, None])
+        if run is None:
+            indices.extend(rng.randrange(N_SYMBOLS) for _ in range(rng.randint(1, 200)))
+        else:
+            indices.extend([run] * rng.randint(20, 2000))
+    return indices[:length]
+
+
+def chunked_roundtrip(indices, order, chunk_size):
+    """Encode chunk by chunk, feeding each chunk's bytes to a decoder running
+    alongside; returns (decoded indices, largest held_zeros seen)."""
+    encoder = RangeEncoder(N_SYMBOLS, order)
+    decoder = RangeDecoder(N_SYMBOLS, order=order)
+    decoded, most_held = [], 0
+    for start in range(0, len(indices), chunk_size):
+        data = encoder.encode(indices[start:start + chunk_size]).take_bytes()
+        most_held = max(most_held, encoder.held_zeros)
+        decoded += decoder.feed(data, encoder.held_zeros)
+    decoded += decoder.feed(encoder.finish())
+    decoded += decoder.finish(encoder.length)
+    return decoded, most_held
+
+
+@pytest.mark.parametrize('order', [0, 1, 3])
+@pytest.mark.parametrize('chunk_size', [1, 7, 97])
+def test_chunked_roundtrip(order, chunk_size):
+    indices = skewed_indices()
+    decoded, most_held = chunked_roundtrip(indices, order, chunk_size)
+    assert decoded == indices
+    assert most_held > 0
+
+
+def test_decoder_keeps_up_through_zero_runs():
+    # A run of the lowest symbol only produces held-back zero bytes; the
+    # decoder still decodes it before the run ends
+    encoder = RangeEncoder(N_SYMBOLS)
+    decoder = RangeDecoder(N_SYMBOLS)
+    decoded = decoder.feed(encoder.encode([5, 9, 2]).take_bytes(), encoder.held_zeros)
+    for _ in range(40):
+        decoded += decoder.feed(encoder.encode([0] * 500).take_bytes(), encoder.held_zeros)
+    assert encoder.held_zeros > 100
+    assert len(decoded) > 15000
+    decoded += decoder.feed(encoder.finish()) + decoder.finish(encoder.length)
+    assert decoded == [5, 9, 2] + [0] * 20000
+
+
+@pytest.mark.parametrize('order', [0, 4])
+def test_one_shot_roundtrip(order):
+    rng = random.Random(order)
+    indices = [rng.randrange(N_SYMBOLS) for _ in range(5000)]
+    encoder = RangeEncoder(N_SYMBOLS, order).encode(indices)
+    data = encoder.take_bytes() + encoder.finish()
+    decoder = RangeDecoder(N_SYMBOLS, len(indices), order)
+    assert decoder.feed(data) + decoder.finish() == indices
+    assert len(data) * 8 - 8 < encoder.bit_length <= len(data) * 8
+
+
+def test_single_symbol_alphabet():
+    encoder = RangeEncoder(1).encode([0] * 1000)
+    data = encoder.take_bytes() + encoder.finish()
+    decoder = RangeDecoder(1, 1000)
+    assert decoder.feed(data) + decoder.finish() == [0] * 1000
+
+
+@pytest.mark.parametrize('order', [0, 9])
+def test_bad_parameters_are_rejected(order):
+    with pytest.raises(ValueError):
+        RangeEncoder(0 if order == 0 else N_SYMBOLS, order)
@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils import bitstream
+from utils.bitstream import BitReader, BitWriter, CodeTable, PrefixDecoder
+from utils.prefix_codes import canonical_codebook, huffman_code_lengths, shannon_fano_codebook
+
+
+@pytest.fixture(autouse=True, params=['compiled', 'python'])
+def decode_path(request, monkeypatch):
+    # Without numba PrefixDecoder runs its pure-Python codeword loop
+    if request.param == 'python':
+        monkeypatch.setattr(bitstream, 'njit', None)
+    return request.param
+
+
+def pack(bits):
+    """Pack a '0'/'1' string MSB-first into (bytes, n_bits)."""
+    n_bits = len(bits)
+    value = int(bits, 2) << (-n_bits % 8) if bits else 0
+    return value.to_bytes((n_bits + 7) // 8, 'big'), n_bits
+
+
+def random_codebook(seed):
+    rng = random.Random(seed)
+    counts = {chr(0x41 + i): max(1, int(rng.random() ** rng.choice([1, 8, 24]) * 10 ** 7))
+              for i in range(rng.randint(2, 300))}
+    if seed % 2:
+        return canonical_codebook(huffman_code_lengths(counts)), counts
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    return shannon_fano_codebook(ranked), counts
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('table_bits', [1, 4, 10])
+def test_roundtrip(seed, table_bits):
+    codebook, counts = random_codebook(seed)
+    rng = random.Random(seed)
+    text = ''.join(rng.choices(list(counts), weights=list(counts.values()), k=3000))
+    packed, n_bits = CodeTable(codebook).encode(text)
+    decoder = PrefixDecoder(codebook, table_bits)
+    assert decoder.decode_text(packed, n_bits) == text
+    assert decoder.decode(packed, n_bits) == list(text)
+
+
+def test_byte_symbols():
+    data = bytes(range(256)) * 3 + b'\x00' * 500
+    codebook = canonical_codebook(huffman_code_lengths({b: data.count(b) for b in set(data)}))
+    bits = ''.join(codebook[b] for b in data)
+    assert PrefixDecoder(codebook).decode_bytes(*pack(bits)) == data
+
+
+@pytest.mark.parametrize('bits', ['11', '0110', '00011'])
+def test_invalid_codeword(bits):
+    # 11 is not a codeword (the code is incomplete)
+    decoder = PrefixDecoder({'a': '0', 'b': '10'})
+    with pytest.raises(ValueError, match=f'Invalid codeword at bit {bits.index("11")}'):
+        decoder.decode(*pack(bits))
+
+
+def test_invalid_long_codeword():
+    # Codewords longer than the table bits, with a gap after 1110
+    codebook = {'a': '0', 'b': '10', 'c': '110', 'd': '11100', 'e': '11101'}
+    decoder = PrefixDecoder(codebook, table_bits=2)
+    assert decoder.decode(*pack('011101' + '11100')) == ['a', 'e', 'd']
+    with pytest.raises(ValueError, match='Invalid codeword at bit 1'):
+        decoder.decode(*pack('0' + '11110'))
+
+
+@pytest.mark.parametrize('bits', ['0111', '011', '01'])
+def test_truncated_codeword(bits):
+    # 'e' (1111) cut off after the leading 'a'
+    codebook = {'a': '0', 'b': '10', 'c': '110', 'd': '1110', 'e': '1111'}
+    with pytest.raises(ValueError, match=f'Truncated codeword at bit 1 of {len(bits)}'):
+        PrefixDecoder(codebook).decode(*pack(bits))
+
+
+def test_empty_streams():
+    decoder = PrefixDecoder({'a': '0', 'b': '1'})
+    assert decoder.decode(b'', 0) == []
+    assert PrefixDecoder({}).decode(b'', 0) == []
+    with pytest.raises(ValueError):
+        PrefixDecoder({}).decode(b'\x00', 3)
+
+
+def test_single_symbol_code():
+    decoder = PrefixDecoder({'x': '0'})
+    assert decoder.decode_text(*pack('0' * 17)) == 'x' * 17
+
+
+def test_bit_writer_reader_roundtrip():
+    rng = random.Random(2)
+    fields = [(rng.getrandbits(width), width) for width in (rng.randint(1, 40) for _ in range(500))]
+    writer = BitWriter()
+    for value, width in fields:
+        writer.write(value, width)
+    reader = BitReader(writer.getvalue(), len(writer))
+    assert [reader.read(width) for _, width in fields] == [value for value, _ in fields]
+    assert not reader.bits_remaining
+
+
+def test_decode_ids_dtype():
+    codebook = {'a': '0', 'b': '10', 'c': '11'}
+    ids = PrefixDecoder(codebook).decode_ids(*pack('010110'))
+    assert np.issubdtype(ids.dtype, np.integer)
+    assert ids.tolist() == [0, 1, 2, 0]
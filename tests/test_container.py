@@ -0,0 +1,97 @@
+import io
+import struct
+
+import pytest
+
+import app as server
+from utils.container import (
+    VERSION, ContainerBlock, read_header, write_header, pack_symbol_table, unpack_symbol_table
+)
+from utils.streaming import CHUNK_SIZE
+
+TEXT = ('Streams of héllo wörld ✓ 𝄞 and abracadabra\n' * 400).encode('utf-8')
+BINARY = bytes(range(256)) * 40 + b'\x00\xff' * 500
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+def compress(client, data, **fields):
+    response = client.post('/compress', data={'file': (io.BytesIO(data), 'sample.txt'), **fields},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_data()[:200]
+    return response.get_data()
+
+
+def decompress(client, container):
+    return client.post('/decompress', data={'file': (io.BytesIO(container), 'sample.txt.ssbx')},
+                       content_type='multipart/form-data')
+
+
+@pytest.mark.parametrize('method', ['huffman', 'fano', 'lz78', 'adaptive_huffman'])
+@pytest.mark.parametrize('mode, data', [('text', TEXT), ('bytes', BINARY)])
+def test_roundtrip(client, method, mode, data):
+    container = compress(client, data, method=method, mode=mode)
+    header = read_header(io.BytesIO(container))
+    assert (header.method, header.mode, header.original_length) == (method, mode, len(data.decode(
+        'utf-8' if mode == 'text' else 'latin-1')))
+
+    response = decompress(client, container)
+    assert response.status_code == 200
+    assert response.get_data() == data
+
+
+@pytest.mark.parametrize('method', ['huffman', 'lz78'])
+def test_multi_block_roundtrip(client, method):
+    data = (TEXT * (CHUNK_SIZE // len(TEXT) + 2))[:CHUNK_SIZE + 5000]
+    container = compress(client, data, method=method, mode='bytes', block_codebooks='1')
+    assert len(read_header(io.BytesIO(container)).blocks) == 2
+    assert decompress(client, container).get_data() == data
+
+
+def test_header_roundtrip():
+    model = pack_symbol_table({'a': 3, 'é': 1}.items(), 'Q')
+    blocks = [ContainerBlock(3, 5, b''), ContainerBlock(1, 2, b'xyz')]
+    header = read_header(io.BytesIO(write_header('fano', model, 4, 0x1234, blocks, 'bytes')))
+    assert header.method == 'fano' and header.mode == 'bytes'
+    assert (header.original_length, header.checksum, header.blocks) == (4, 0x1234, blocks)
+    assert unpack_symbol_table(header.model, 'Q') == [('a', 3), ('é', 1)]
+
+
+def corrupt_payload(container):
+    data = bytearray(container)
+    data[-20] ^= 0x10
+    return bytes(data)
+
+
+def bad_version(container):
+    return container[:4] + bytes([VERSION + 1]) + container[5:]
+
+
+def bad_flags(container):
+    return container[:6] + bytes([0x80]) + container[7:]
+
+
+def bad_block_lengths(container):
+    # Original length field (after magic, version, method and flags)
+    (length,) = struct.unpack_from('<Q', container, 7)
+    return container[:7] + struct.pack('<Q', length + 1) + container[15:]
+
+
+@pytest.mark.parametrize('damage', [
+    corrupt_payload,
+    bad_version,
+    bad_flags,
+    bad_block_lengths,
+    lambda container: container[:-50],
+    lambda container: container[:30],
+    lambda container: b'JUNK' + container[4:],
+])
+@pytest.mark.parametrize('method', ['huffman', 'fano', 'lz78', 'adaptive_huffman'])
+def test_corrupt_container_is_rejected(client, method, damage):
+    container = compress(client, TEXT, method=method)
+    response = decompress(client, damage(container))
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
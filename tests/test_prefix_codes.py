@@ -0,0 +1,110 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from utils.prefix_codes import (
+    canonical_codebook, huffman_code_lengths, length_limited_code_lengths, shannon_fano_codebook
+)
+
+
+def kraft_sum(lengths):
+    return sum(Fraction(1, 2 ** length) for length in lengths.values())
+
+
+def cost(freqs, lengths):
+    return sum(freqs[sym] * lengths[sym] for sym in freqs)
+
+
+def random_freqs(seed, n):
+    rng = random.Random(seed)
+    # Geometric-ish weights force long unconstrained Huffman codes
+    return {f's{i}': max(1, int(rng.random() ** rng.choice([1, 4, 16]) * 10 ** 6)) for i in range(n)}
+
+
+@pytest.mark.parametrize('seed', range(12))
+@pytest.mark.parametrize('max_length', [4, 6, 9, 15])
+def test_package_merge_respects_the_limit(seed, max_length):
+    n = random.Random(seed).randint(2, 1 << min(max_length, 7))
+    freqs = random_freqs(seed, n)
+    lengths = length_limited_code_lengths(freqs, max_length)
+    assert set(lengths) == set(freqs)
+    assert max(lengths.values()) <= max_length
+    assert min(lengths.values()) >= 1
+    assert kraft_sum(lengths) <= 1
+    # Never better than the unconstrained optimum
+    assert cost(freqs, lengths) >= cost(freqs, huffman_code_lengths(freqs))
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_package_merge_matches_huffman_without_a_binding_limit(seed):
+    freqs = random_freqs(seed, 40)
+    huffman = huffman_code_lengths(freqs)
+    lengths = length_limited_code_lengths(freqs, max(huffman.values()))
+    assert cost(freqs, lengths) == cost(freqs, huffman)
+
+
+def test_package_merge_fibonacci_weights():
+    # Fibonacci weights give a Huffman code of depth n - 1
+    fib = [1, 1]
+    while len(fib) < 20:
+        fib.append(fib[-1] + fib[-2])
+    freqs = {i: w for i, w in enumerate(fib)}
+    assert max(huffman_code_lengths(freqs).values()) == 19
+    lengths = length_limited_code_lengths(freqs, 8)
+    assert max(lengths.values()) == 8 and kraft_sum(lengths) <= 1
+
+
+def test_package_merge_edge_cases():
+    assert length_limited_code_lengths({'a': 5}, 3) == {'a': 1}
+    assert length_limited_code_lengths({'a': 1, 'b': 1, 'c': 1, 'd': 1}, 2) == dict.fromkeys('abcd', 2)
+    with pytest.raises(ValueError):
+        length_limited_code_lengths(dict.fromkeys('abcde', 1), 2)
+
+
+def recursive_fano(symbols_probs, prefix='', codebook=None):
+    """The direct recursive Shannon-Fano builder (linear scan per split)."""
+    if codebook is None:
+        codebook = {}
+    if len(symbols_probs) == 1:
+        codebook[symbols_probs[0][0]] = prefix or '0'
+        return codebook
+    total = sum(p for _, p in symbols_probs)
+    cumulative = 0
+    split = 0
+    for i, (_, p) in enumerate(symbols_probs):
+        cumulative += p
+        if cumulative >= total / 2:
+            split = i + 1
+            break
+    recursive_fano(symbols_probs[:split], prefix + '0', codebook)
+    recursive_fano(symbols_probs[split:], prefix + '1', codebook)
+    return codebook
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_fano_matches_recursive_builder(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 300)
+    counts = [rng.choice([1, 1, 2, 3, rng.randint(1, 10 ** 6)]) for _ in range(n)]
+    ranked = sorted(((chr(0x100 + i), c) for i, c in enumerate(counts)), key=lambda x: -x[1])
+    if seed % 2:
+        # Float PMF weights, as the analysis views pass them
+        total = sum(counts)
+        ranked = [(sym, c / total) for sym, c in ranked]
+    assert shannon_fano_codebook(ranked) == recursive_fano(ranked)
+
+
+def test_fano_ties_and_tiny_inputs():
+    for ranked in ([('a', 1)], [('a', 1), ('b', 1)], [('a', 0.25), ('b', 0.25), ('c', 0.25), ('d', 0.25)],
+                   [('d', 0.7), ('a', 0.1), ('b', 0.1), ('c', 0.1)], [(sym, 0.1) for sym in 'abcdefghij']):
+        assert shannon_fano_codebook(ranked) == recursive_fano(ranked)
+    assert shannon_fano_codebook([]) == {}
+
+
+def test_canonical_codebook_is_prefix_free():
+    lengths = length_limited_code_lengths(random_freqs(3, 100), 9)
+    codebook = canonical_codebook(lengths)
+    assert {sym: len(code) for sym, code in codebook.items()} == lengths
+    codes = sorted(codebook.values())
+    assert not any(b.startswith(a) for a, b in zip(codes, codes[1:]))
@@ -0,0 +1,219 @@
+from utils.bitstream import BitWriter, BitReader
+
+# Raw code point sent after the NYT code the first time a character is seen
+NEW_SYMBOL_BITS = 21
+# Input bytes per decoded piece yielded by adaptive_huffman_decode
+DECODE_PIECE_BYTES = 1 << 16
+
+
+class AdaptiveHuffmanTree:
+    """One-pass (FGK) Huffman tree, updated after every symbol.
+
+    Nodes live in slots ordered by decreasing node number: slot 0 is the
+    root and new nodes are appended, so weights never increase along the
+    slots (the sibling property). The two children of an internal node
+    always occupy consecutive slots; swapping two subtrees swaps slot
+    contents, so parent links stay put. leaders maps each weight to the
+    first slot holding it, which makes finding the block leader O(1).
+    """
+
+    def __init__(self):
+        self.weight = [0]
+        self.parent = [-1]
+        self.child = [-1]      # first child slot, -1 for leaves
+        self.symbol = [None]   # None marks the NYT (not yet transmitted) leaf
+        self.nyt = 0
+        self.leaf_of = {}
+        self.leaders = {0: 0}
+
+    def code(self, sym):
+        """Codeword of sym as (value, n_bits); unseen symbols get the NYT
+        code followed by their code point."""
+        q = self.leaf_of.get(sym)
+        escape = q is None
+        if escape:
+            q = self.nyt
+        value, n_bits = 0, 0
+        parent, child = self.parent, self.child
+        while q:
+            p = parent[q]
+            value |= (q - child[p]) << n_bits
+            n_bits += 1
+            q = p
+        if escape:
+            value = (value << NEW_SYMBOL_BITS) | ord(sym)
+            n_bits += NEW_SYMBOL_BITS
+        return value, n_bits
+
+    def update(self, sym):
+        """Count one more occurrence of sym, restoring the sibling property."""
+        q = self.leaf_of.get(sym)
+        if q is None:
+            # The NYT leaf becomes an internal node over the new leaf and a new NYT
+            s = self.nyt
+            leaf, nyt = len(self.weight), len(self.weight) + 1
+            self.weight += [1, 0]
+            self.parent += [s, s]
+            self.child += [-1, -1]
+            self.symbol += [sym, None]
+            self.child[s] = leaf
+            self.weight[s] = 1
+            self.nyt = nyt
+            self.leaf_of[sym] = leaf
+            self.leaders[0] = nyt
+            self.leaders.setdefault(1, s)
+            if s == 0:
+                return
+            q = self.parent[s]
+
+        weight, parent, leaders = self.weight, self.parent, self.leaders
+        n_slots = len(weight)
+        while True:
+            w = weight[q]
+            leader = leaders[w]
+            if leader == parent[q]:
+                # q is the NYT's sibling; its parent shares its weight
+                leader += 1
+            if leader != q:
+                self._swap(q, leader)
+                q = leader
+
+            # Move q from the weight-w block to the weight-(w + 1) block
+            weight[q] = w + 1
+            if leaders[w] == q:
+                j = q + 1
+                while j < n_slots and weight[j] > w:
+                    j += 1
+                if j < n_slots and weight[j] == w:
+                    leaders[w] = j
+                else:
+                    del leaders[w]
+            if leaders.get(w + 1, n_slots) > q:
+                leaders[w + 1] = q
+
+            if not q:
+                return
+            q = parent[q]
+
+    def _swap(self, i, j):
+        """Exchange the subtrees in slots i and j (equal weights)."""
+        child, symbol = self.child, self.symbol
+        child[i], child[j] = child[j], child[i]
+        symbol[i], symbol[j] = symbol[j], symbol[i]
+        for slot in (i, j):
+            if child[slot] < 0:
+                self.leaf_of[symbol[slot]] = slot
+            else:
+                self.parent[child[slot]] = slot
+                self.parent[child[slot] + 1] = slot
+
+
+class AdaptiveHuffmanEncoder:
+    """Streaming one-pass Huffman encoder; feed text as it arrives."""
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.writer = BitWriter()
+        self.length = 0
+
+    def encode(self, text):
+        code, update, write = self.tree.code, self.tree.update, self.writer.write
+        for ch in text:
+            write(*code(ch))
+            update(ch)
+        self.length += len(text)
+        return self
+
+    @property
+    def bit_length(self):
+        return len(self.writer)
+
+    def take_bytes(self):
+        """Completed output bytes so far (removed from the buffer)."""
+        return self.writer.take_bytes()
+
+    def finish(self):
+        """Remaining output bytes, with the last byte zero-padded."""
+        return self.writer.getvalue()
+
+
+class AdaptiveHuffmanDecoder:
+    """Streaming one-pass Huffman decoder; feed the encoder's bytes as they
+    arrive (e.g. from take_bytes()).
+
+    Only complete codewords are decoded; the bits of a codeword cut off by
+    the end of the bytes so far are kept until more arrive.
+    """
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self._pending = b''   # bytes holding the undecoded bits
+        self._offset = 0      # bits of _pending already decoded
+        self._base = 0        # stream bits before _pending
+
+    def feed(self, data):
+        """Decode the complete codewords available so far."""
+        return self._decode(data)
+
+    def finish(self, data, bit_length):
+        """Decode the rest of a stream of bit_length bits in total.
+
+        Raises:
+            ValueError: If the stream is corrupt or ends inside a codeword
+        """
+        return self._decode(data, bit_length)
+
+    def _decode(self, data, bit_length=None):
+        buffer = self._pending + bytes(data)
+        n_bits = len(buffer) * 8 if bit_length is None else bit_length - self._base
+        if n_bits > len(buffer) * 8:
+            raise ValueError('Corrupt or truncated adaptive Huffman stream')
+        tree = self.tree
+        reader = BitReader(buffer, n_bits)
+        reader.position = start = self._offset
+        read_bit, update = reader.read_bit, tree.update
+        child, symbol = tree.child, tree.symbol
+        decoded = []
+        try:
+            while reader.bits_remaining:
+                start = reader.position
+                q = 0
+                while child[q] >= 0:
+                    q = child[q] + read_bit()
+                if q == tree.nyt:
+                    ch = chr(reader.read(NEW_SYMBOL_BITS))
+                else:
+                    ch = symbol[q]
+                update(ch)
+                decoded.append(ch)
+        except EOFError:
+            if bit_length is not None:
+                raise ValueError('Corrupt or truncated adaptive Huffman stream')
+            # Wait for the rest of this codeword
+            reader.position = start
+        except ValueError:
+            raise ValueError('Corrupt or truncated adaptive Huffman stream')
+        keep = reader.position >> 3
+        self._pending = buffer[keep:]
+        self._offset = reader.position & 7
+        self._base += 8 * keep
+        return ''.join(decoded)
+
+
+def adaptive_huffman_decode(data, n_bits, piece_bytes=DECODE_PIECE_BYTES):
+    """Decode an adaptive Huffman bitstream, yielding text piece by piece
+    (one piece per piece_bytes of input).
+
+    Raises:
+        ValueError: If the stream is corrupt or ends inside a codeword
+    """
+    decoder = AdaptiveHuffmanDecoder()
+    data = bytes(data[:(n_bits + 7) // 8])
+    last = max(0, (len(data) - 1) // piece_bytes * piece_bytes)
+    for start in range(0, last, piece_bytes):
+        piece = decoder.feed(data[start:start + piece_bytes])
+        if piece:
+            yield piece
+    piece = decoder.finish(data[last:], n_bits)
+    if piece:
+        yield piece
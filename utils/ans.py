@@ -0,0 +1,481 @@
+import numpy as np
+
+from utils.bitstream import pack_codes
+
+try:
+    from numba import njit
+except ImportError:  # optional: decode with the lane-vectorized NumPy loops
+    njit = None
+
+# Frequencies are quantized to a total of 2^scale_bits, at least this many
+ANS_SCALE_BITS = 12
+MAX_ANS_SCALE_BITS = 16
+# Table slots per symbol aimed for (log2), which bounds the quantization loss
+ANS_SCALE_MARGIN_BITS = 4
+# Symbols are dealt round-robin to interleaved coder states (lanes) that are
+# stepped together as one vector; each lane costs its final state in the
+# output, so short inputs get few lanes
+SYMBOLS_PER_LANE = 4096
+MAX_LANES = 1024
+
+# rANS: 32-bit states in [RANS_LOW, RANS_LOW << 16), renormalized 16 bits at a time
+RANS_LOW = 1 << 16
+
+
+# ==================== 1) Frequency tables ====================
+
+def ans_scale_bits(n_symbols):
+    """Table size (log2) for an alphabet: about 2^ANS_SCALE_MARGIN_BITS slots
+    per symbol, at least ANS_SCALE_BITS and at most MAX_ANS_SCALE_BITS."""
+    needed = (max(n_symbols, 1) - 1).bit_length()
+    if needed > MAX_ANS_SCALE_BITS:
+        raise ValueError(f'Alphabet of {n_symbols} symbols is too large for the ANS coder')
+    return max(ANS_SCALE_BITS, min(MAX_ANS_SCALE_BITS, needed + ANS_SCALE_MARGIN_BITS))
+
+
+def normalize_frequencies(counts, scale_bits):
+    """Quantize symbol counts to frequencies summing to 2^scale_bits.
+
+    Every counted symbol keeps a frequency of at least one; the rounding
+    error is taken from (or given to) the most frequent symbols.
+
+    Args:
+        counts: Count of every symbol index
+        scale_bits: log2 of the frequency total
+
+    Returns:
+        int64 array of frequencies, zero for symbols never counted
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = 1 << scale_bits
+    freqs = np.where(counts > 0, np.maximum(1, counts * total // max(int(counts.sum()), 1)), 0)
+    error = total - int(freqs.sum())
+    for index in np.argsort(-counts, kind='stable'):
+        if not error:
+            break
+        # Never push a counted symbol below one
+        step = error if error > 0 else max(error, 1 - int(freqs[index]))
+        freqs[index] += step
+        error -= step
+    return freqs
+
+
+def ans_lanes(length):
+    """Number of interleaved states used for a block of length symbols."""
+    return int(min(MAX_LANES, max(1, -(-length // SYMBOLS_PER_LANE))))
+
+
+class _AnsTable:
+    """Quantized frequencies shared by the rANS and tANS coders."""
+
+    def __init__(self, counts):
+        counts = np.asarray(counts, dtype=np.int64)
+        self.n_symbols = len(counts)
+        self.scale_bits = ans_scale_bits(int(np.count_nonzero(counts)))
+        self.freqs = normalize_frequencies(counts, self.scale_bits)
+        self.cumulative = np.concatenate([[0], np.cumsum(self.freqs)[:-1]]).astype(np.int64)
+        # Symbol owning every slot of [0, 2^scale_bits)
+        self.slot_symbols = np.repeat(np.arange(self.n_symbols), self.freqs).astype(np.int32)
+        # int32 tables for the compiled kernels
+        self.freqs32 = self.freqs.astype(np.int32)
+        self.cumulative32 = self.cumulative.astype(np.int32)
+
+    def _steps(self, indices):
+        """Split indices into lane steps: step t holds symbols t*L .. t*L + L - 1."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and self.freqs[indices].min() == 0:
+            raise ValueError('Symbol missing from the ANS frequency table')
+        lanes = ans_lanes(len(indices))
+        return indices, lanes, [indices[t:t + lanes] for t in range(0, len(indices), lanes)]
+
+
+# Scalar kernels, compiled with numba when it is installed. Symbol i is on
+# lane i - start of the step starting at start; tables and streams keep
+# their compact dtypes (uint32 states, uint16 words, uint8 bytes) and are
+# only widened in registers.
+
+def _rans_encode_symbols(indices, states, freqs, cumulative, bounds, scale_bits, words):
+    """rANS-encode indices backwards into the end of words (uint16).
+
+    Returns the position of the first word written, or -1 for a symbol
+    missing from the table.
+    """
+    lanes = len(states)
+    length = len(indices)
+    position = len(words)
+    for start in range(length - (length - 1) % lanes - 1, -1, -lanes):
+        for lane in range(min(lanes, length - start) - 1, -1, -1):
+            symbol = indices[start + lane]
+            if symbol < 0 or symbol >= len(freqs) or freqs[symbol] == 0:
+                return -1
+            x = states[lane]
+            f = freqs[symbol]
+            if x >= bounds[symbol]:
+                position -= 1
+                words[position] = x & 0xFFFF
+                x >>= 16
+            states[lane] = ((x // f) << scale_bits) + x % f + cumulative[symbol]
+    return position
+
+
+def _rans_decode_symbols(states, stream, n_words, slot_symbols, freqs, cumulative, scale_bits, decoded):
+    """rANS-decode len(decoded) symbols from n_words words followed by at
+    least `lanes` zero words.
+
+    Renormalization is branchless (a word is always loaded, and kept only
+    if the state needs it), since whether a lane renormalizes is as
+    unpredictable as the data. Returns the number of words read, or -1 if
+    the stream runs out.
+    """
+    lanes = len(states)
+    length = len(decoded)
+    mask = (1 << scale_bits) - 1
+    position = 0
+    for start in range(0, length, lanes):
+        for lane in range(min(lanes, length - start)):
+            x = states[lane]
+            slot = x & mask
+            symbol = slot_symbols[slot]
+            decoded[start + lane] = symbol
+            x = freqs[symbol] * (x >> scale_bits) + slot - cumulative[symbol]
+            need = x < RANS_LOW
+            word = stream[position]
+            states[lane] = ((x << 16) | word) if need else x
+            position += need
+        if position > n_words:
+            return -1
+    return position
+
+
+def _tans_encode_symbols(indices, states, freqs, cumulative, freq_bits, encode_states, scale_bits,
+                         values, lengths):
+    """tANS-encode indices backwards: the bits shifted out for symbol i go
+    to values[i] / lengths[i]. The states run in [0, 2^scale_bits).
+
+    Returns 0, or -1 for a symbol missing from the table.
+    """
+    lanes = len(states)
+    length = len(indices)
+    size = 1 << scale_bits
+    for start in range(length - (length - 1) % lanes - 1, -1, -lanes):
+        for lane in range(min(lanes, length - start)):
+            symbol = indices[start + lane]
+            if symbol < 0 or symbol >= len(freqs) or freqs[symbol] == 0:
+                return -1
+            x = states[lane] + size
+            f = freqs[symbol]
+            n_bits = scale_bits + 1 - freq_bits[symbol]
+            if (x >> n_bits) < f:
+                n_bits -= 1
+            values[start + lane] = x & ((1 << n_bits) - 1)
+            lengths[start + lane] = n_bits
+            states[lane] = encode_states[cumulative[symbol] + (x >> n_bits) - f]
+    return 0
+
+
+def _pack_bits(values, lengths, out):
+    """Write values[i] (lengths[i] <= 17 bits each) MSB first into out,
+    32 bits at a time."""
+    acc = 0
+    acc_bits = 0
+    position = 0
+    for i in range(len(values)):
+        acc = (acc << lengths[i]) | values[i]
+        acc_bits += lengths[i]
+        if acc_bits >= 32:
+            acc_bits -= 32
+            word = acc >> acc_bits
+            out[position] = (word >> 24) & 0xFF
+            out[position + 1] = (word >> 16) & 0xFF
+            out[position + 2] = (word >> 8) & 0xFF
+            out[position + 3] = word & 0xFF
+            position += 4
+            acc &= (1 << acc_bits) - 1
+    while acc_bits >= 8:
+        acc_bits -= 8
+        out[position] = (acc >> acc_bits) & 0xFF
+        position += 1
+    if acc_bits:
+        out[position] = (acc << (8 - acc_bits)) & 0xFF
+
+
+def _tans_decode_symbols(states, padded, stream_bits, decode_symbols, decode_bits, decode_base, decoded):
+    """tANS-decode len(decoded) symbols from a bitstream padded by
+    tans_padding(lanes) zero bytes.
+
+    Returns the number of bits read, or -1 if the stream runs out.
+    """
+    lanes = len(states)
+    length = len(decoded)
+    position = 0
+    for start in range(0, length, lanes):
+        if position > stream_bits:
+            return -1
+        for lane in range(min(lanes, length - start)):
+            x = states[lane]
+            decoded[start + lane] = decode_symbols[x]
+            n_bits = decode_bits[x]
+            first = position >> 3
+            window = ((padded[first] << 24) | (padded[first + 1] << 16) |
+                      (padded[first + 2] << 8) | padded[first + 3])
+            states[lane] = decode_base[x] + ((window >> (32 - (position & 7) - n_bits)) & ((1 << n_bits) - 1))
+            position += n_bits
+    return position if position <= stream_bits else -1
+
+
+def tans_padding(lanes):
+    """Zero bytes after a tANS bitstream that one step past its end can read:
+    at most MAX_ANS_SCALE_BITS + 1 bits per lane, then a 4-byte window."""
+    return (lanes * (MAX_ANS_SCALE_BITS + 1) + 7) // 8 + 4
+
+
+if njit is not None:
+    _rans_encode_symbols = njit(cache=True, nogil=True)(_rans_encode_symbols)
+    _rans_decode_symbols = njit(cache=True, nogil=True)(_rans_decode_symbols)
+    _tans_encode_symbols = njit(cache=True, nogil=True)(_tans_encode_symbols)
+    _tans_decode_symbols = njit(cache=True, nogil=True)(_tans_decode_symbols)
+    _pack_bits = njit(cache=True, nogil=True)(_pack_bits)
+
+
+# ==================== 2) rANS ====================
+
+class RansTable(_AnsTable):
+    """Static interleaved rANS coder over symbol indices.
+
+    Each lane is a 32-bit rANS state; symbol i is coded by lane i % lanes.
+    The encoder runs backwards over the lane steps and the decoder forwards,
+    sharing one stream of 16-bit words: within a step, renormalizing lanes
+    emit (or read) one word each, in lane order. Decoding a step is a slot
+    table lookup and one multiply-add per lane.
+
+    Output: the final state of every lane (uint32), then the words (uint16),
+    little-endian.
+    """
+
+    def encode(self, indices):
+        """Encode symbol indices into (packed_bytes, n_bits)."""
+        if njit is not None:
+            indices = np.asarray(indices, dtype=np.int64)
+            states = np.full(ans_lanes(len(indices)), RANS_LOW, dtype=np.uint32)
+            # At most one word per symbol
+            words = np.empty(len(indices), dtype='<u2')
+            bounds = ((RANS_LOW >> self.scale_bits) << 16) * self.freqs
+            first = _rans_encode_symbols(indices, states, self.freqs32, self.cumulative32, bounds,
+                                         self.scale_bits, words)
+            if first < 0:
+                raise ValueError('Symbol missing from the ANS frequency table')
+            data = states.astype('<u4').tobytes() + words[first:].tobytes()
+            return data, 8 * len(data)
+
+        indices, lanes, steps = self._steps(indices)
+        scale_bits = np.uint64(self.scale_bits)
+        freqs = self.freqs.astype(np.uint64)
+        cumulative = self.cumulative.astype(np.uint64)
+        # State bound before encoding: x must stay below (RANS_LOW >> n << 16) * f
+        bounds = ((np.uint64(RANS_LOW) >> scale_bits) << np.uint64(16)) * freqs
+
+        states = np.full(lanes, RANS_LOW, dtype=np.uint64)
+        words = []
+        for step in reversed(steps):
+            active = len(step)
+            x = states[:active]
+            emit = x >= bounds[step]
+            # Reversed now, so the final reversal leaves them in lane order
+            words.append((x[emit] & np.uint64(0xFFFF)).astype(np.uint16)[::-1])
+            x = np.where(emit, x >> np.uint64(16), x)
+            f = freqs[step]
+            states[:active] = ((x // f) << scale_bits) + x % f + cumulative[step]
+
+        stream = np.concatenate(words)[::-1] if words else np.zeros(0, dtype=np.uint16)
+        data = states.astype('<u4').tobytes() + stream.astype('<u2').tobytes()
+        return data, 8 * len(data)
+
+    def decode(self, data, n_bits, length):
+        """Decode length symbol indices from packed rANS output.
+
+        Raises:
+            ValueError: If the data is truncated or corrupt
+        """
+        lanes = ans_lanes(length)
+        data = bytes(data[:n_bits // 8])
+        if length == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(data) < 4 * lanes or (len(data) - 4 * lanes) % 2:
+            raise ValueError('Truncated rANS stream')
+        if njit is not None:
+            states = np.frombuffer(data[:4 * lanes], dtype='<u4').astype(np.uint32)
+            n_words = (len(data) - 4 * lanes) // 2
+            stream = np.frombuffer(data[4 * lanes:] + bytes(2 * lanes), dtype='<u2')
+            decoded = np.empty(length, dtype=np.int64)
+            position = _rans_decode_symbols(states, stream, n_words, self.slot_symbols, self.freqs32,
+                                            self.cumulative32, self.scale_bits, decoded)
+            if position < 0:
+                raise ValueError('Truncated rANS stream')
+            if position != n_words or np.any(states != RANS_LOW):
+                raise ValueError('Corrupt rANS stream')
+            return decoded
+
+        states = np.frombuffer(data[:4 * lanes], dtype='<u4').astype(np.uint64)
+        stream = np.frombuffer(data[4 * lanes:], dtype='<u2').astype(np.uint64)
+
+        scale_bits = np.uint64(self.scale_bits)
+        mask = np.uint64((1 << self.scale_bits) - 1)
+        slot_symbols = self.slot_symbols
+        freqs = self.freqs.astype(np.uint64)
+        cumulative = self.cumulative.astype(np.uint64)
+        decoded = np.empty(length, dtype=np.int64)
+        position = 0
+        for start in range(0, length, lanes):
+            active = min(lanes, length - start)
+            x = states[:active]
+            slots = x & mask
+            symbols = slot_symbols[slots]
+            decoded[start:start + active] = symbols
+            x = freqs[symbols] * (x >> scale_bits) + slots - cumulative[symbols]
+            need = np.flatnonzero(x < np.uint64(RANS_LOW))
+            if position + len(need) > len(stream):
+                raise ValueError('Truncated rANS stream')
+            x[need] = (x[need] << np.uint64(16)) | stream[position:position + len(need)]
+            position += len(need)
+            states[:active] = x
+        if position != len(stream) or np.any(states != RANS_LOW):
+            raise ValueError('Corrupt rANS stream')
+        return decoded
+
+
+# ==================== 3) tANS ====================
+
+def _bit_length(values):
+    """Bit length of every (positive) entry of an int64 array."""
+    return np.floor(np.log2(np.maximum(values, 1))).astype(np.int64) + 1
+
+
+def _read_bits(padded, offsets, counts):
+    """Read counts[i] (<= 24) bits at bit offsets[i] of a zero-padded uint8 array."""
+    first = offsets >> 3
+    window = ((padded[first] << 24) | (padded[first + 1] << 16) |
+              (padded[first + 2] << 8) | padded[first + 3])
+    return (window >> (32 - (offsets & 7) - counts)) & ((1 << counts) - 1)
+
+
+class TansTable(_AnsTable):
+    """Static interleaved tANS coder: a finite-state machine over 2^R states.
+
+    Symbols are spread over the R-bit state table with the usual FSE step,
+    so symbol s occupies freqs[s] scattered states. Decoding state X is
+    three table reads (symbol, bit count, next-state base) plus reading
+    that many bits; encoding shifts out bits until the state falls in
+    [f, 2f) and maps it through the symbol's state list.
+
+    Lanes work as in RansTable, with a bitstream instead of words. Output:
+    the final state of every lane (uint16), then the bits.
+    """
+
+    def __init__(self, counts):
+        super().__init__(counts)
+        size = 1 << self.scale_bits
+        # Spread: visit the table with an odd step that is coprime with its size
+        step = (size >> 1) + (size >> 3) + 3
+        spread = np.empty(size, dtype=np.int64)
+        spread[(np.arange(size) * step) & (size - 1)] = self.slot_symbols
+
+        # Occurrence k of symbol s in table order stands for state f_s + k
+        order = np.argsort(spread, kind='stable')
+        ranks = np.empty(size, dtype=np.int64)
+        ranks[order] = np.arange(size) - self.cumulative[spread[order]]
+        sub_states = self.freqs[spread] + ranks
+        self.decode_symbols = spread
+        self.decode_bits = self.scale_bits + 1 - _bit_length(sub_states)
+        self.decode_base = (sub_states << self.decode_bits) - size
+        # encode_states[cumulative[s] + k] = table position of occurrence k of s
+        self.encode_states = order
+        self.freq_bits = _bit_length(self.freqs)
+        # int32 tables for the compiled kernels
+        self.kernel_tables = tuple(table.astype(np.int32) for table in (
+            self.freq_bits, order, spread, self.decode_bits, self.decode_base))
+
+    def encode(self, indices):
+        """Encode symbol indices into (packed_bytes, n_bits)."""
+        if njit is not None:
+            indices = np.asarray(indices, dtype=np.int64)
+            lanes = ans_lanes(len(indices))
+            freq_bits, encode_states = self.kernel_tables[:2]
+            states = np.zeros(lanes, dtype=np.int32)
+            values = np.empty(len(indices), dtype=np.uint32)
+            lengths = np.empty(len(indices), dtype=np.uint8)
+            if _tans_encode_symbols(indices, states, self.freqs32, self.cumulative32, freq_bits,
+                                    encode_states, self.scale_bits, values, lengths) < 0:
+                raise ValueError('Symbol missing from the ANS frequency table')
+            n_bits = int(lengths.sum(dtype=np.int64))
+            packed = np.empty((n_bits + 7) // 8, dtype=np.uint8)
+            _pack_bits(values, lengths, packed)
+            return states.astype('<u2').tobytes() + packed.tobytes(), 16 * lanes + n_bits
+
+        indices, lanes, steps = self._steps(indices)
+        size = 1 << self.scale_bits
+        freqs, cumulative, freq_bits = self.freqs, self.cumulative, self.freq_bits
+
+        states = np.full(lanes, size, dtype=np.int64)
+        values, lengths = [], []
+        for step in reversed(steps):
+            active = len(step)
+            x = states[:active]
+            f = freqs[step]
+            # Shift out bits until f <= x >> n_bits < 2f
+            n_bits = self.scale_bits + 1 - freq_bits[step]
+            n_bits -= (x >> n_bits) < f
+            values.append(x & ((1 << n_bits) - 1))
+            lengths.append(n_bits)
+            states[:active] = size + self.encode_states[cumulative[step] + (x >> n_bits) - f]
+
+        values = np.concatenate(values[::-1]) if values else np.zeros(0, dtype=np.int64)
+        lengths = np.concatenate(lengths[::-1]) if lengths else np.zeros(0, dtype=np.int64)
+        packed, n_bits = pack_codes(values, lengths)
+        header = (states - size).astype('<u2').tobytes()
+        return header + packed.tobytes(), 16 * lanes + n_bits
+
+    def decode(self, data, n_bits, length):
+        """Decode length symbol indices from packed tANS output.
+
+        Raises:
+            ValueError: If the data is truncated or corrupt
+        """
+        lanes = ans_lanes(length)
+        if length == 0:
+            return np.zeros(0, dtype=np.int64)
+        if n_bits < 16 * lanes or len(data) * 8 < n_bits:
+            raise ValueError('Truncated tANS stream')
+        data = bytes(data)
+        states = np.frombuffer(data[:2 * lanes], dtype='<u2').astype(np.int32)
+        if states.max() >= 1 << self.scale_bits:
+            raise ValueError('Corrupt tANS stream')
+        stream_bits = n_bits - 16 * lanes
+        padded = np.frombuffer(data[2 * lanes:2 * lanes + (stream_bits + 7) // 8] + bytes(tans_padding(lanes)),
+                               dtype=np.uint8)
+
+        decoded = np.empty(length, dtype=np.int64)
+        if njit is not None:
+            position = _tans_decode_symbols(states, padded, stream_bits, *self.kernel_tables[2:], decoded)
+            if position < 0:
+                raise ValueError('Truncated tANS stream')
+            if position != stream_bits or np.any(states):
+                raise ValueError('Corrupt tANS stream')
+            return decoded
+
+        states, padded = states.astype(np.int64), padded.astype(np.int64)
+        decode_symbols, decode_bits, decode_base = self.decode_symbols, self.decode_bits, self.decode_base
+        position = 0
+        for start in range(0, length, lanes):
+            active = min(lanes, length - start)
+            x = states[:active]
+            decoded[start:start + active] = decode_symbols[x]
+            counts = decode_bits[x]
+            ends = position + np.cumsum(counts)
+            if ends[-1] > stream_bits:
+                raise ValueError('Truncated tANS stream')
+            states[:active] = decode_base[x] + _read_bits(padded, ends - counts, counts)
+            position = int(ends[-1])
+        # The encoder started every lane in state 0
+        if position != stream_bits or np.any(states):
+            raise ValueError('Corrupt tANS stream')
+        return decoded
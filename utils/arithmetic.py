@@ -0,0 +1,455 @@
+# The coder keeps a 32-bit window [low, low + range) of the code interval
+RANGE_BITS = 32
+RANGE_MASK = (1 << RANGE_BITS) - 1
+# A byte is shifted out whenever range drops below this (renormalization)
+RANGE_BOTTOM = 1 << (RANGE_BITS - 8)
+# Model totals stay below this, so range // total keeps at least 8 bits
+MAX_TOTAL = 1 << 16
+
+
+# ==================== 1) Adaptive frequency model ====================
+
+class AdaptiveFrequencyModel:
+    """Adaptive counts of n_symbols symbols, each starting at one.
+
+    Symbol i owns [cumulative(i), cumulative(i) + count(i)) out of total.
+    The counts live in a binary indexed (Fenwick) tree: tree[j] holds the
+    sum of the j & -j counts ending at symbol j - 1, so cumulative counts,
+    updates and the symbol lookup by target count are all O(log M).
+
+    When the total reaches MAX_TOTAL every count is halved (rounding up, so
+    none drops to zero); encoder and decoder rescale at the same point.
+    """
+
+    def __init__(self, n_symbols, increment=1):
+        if not 0 < n_symbols <= MAX_TOTAL // 2:
+            raise ValueError(f'Alphabet of {n_symbols} symbols is not supported by the range coder')
+        self.increment = increment
+        self.n_symbols = n_symbols
+        # Largest power of two <= n_symbols, the first step of find()
+        self._top = 1 << (n_symbols.bit_length() - 1)
+        self._build([1] * n_symbols)
+
+    def _build(self, counts):
+        """Set all counts, building the tree in O(M)."""
+        n = self.n_symbols
+        tree = [0] + counts
+        for j in range(1, n + 1):
+            parent = j + (j & -j)
+            if parent <= n:
+                tree[parent] += tree[j]
+        self.counts = counts
+        self.tree = tree
+        self.total = sum(counts)
+
+    def cumulative(self, index):
+        """Total count of the symbols below index."""
+        tree = self.tree
+        total = 0
+        while index:
+            total += tree[index]
+            index &= index - 1
+        return total
+
+    def interval(self, index):
+        """(cumulative count, count) of a symbol."""
+        return self.cumulative(index), self.counts[index]
+
+    def find(self, target):
+        """Index of the symbol whose interval contains target (0 <= target < total)."""
+        tree, n = self.tree, self.n_symbols
+        position, step = 0, self._top
+        while step:
+            j = position + step
+            if j <= n and tree[j] <= target:
+                position = j
+                target -= tree[j]
+            step >>= 1
+        return position
+
+    # Coding protocol shared with ContextModel: events() lists the
+    # (cumulative, count, total) intervals coded for a symbol and decode()
+    # reverses it through the decoder's target(total) / narrow(cum, count)
+    max_events = 1
+
+    def events(self, index):
+        return ((self.cumulative(index), self.counts[index], self.total),)
+
+    def decode(self, target, narrow):
+        index = self.find(target(self.total))
+        narrow(*self.interval(index))
+        return index
+
+    def update(self, index):
+        """Count one more occurrence of a symbol."""
+        increment, tree, n = self.increment, self.tree, self.n_symbols
+        self.counts[index] += increment
+        j = index + 1
+        while j <= n:
+            tree[j] += increment
+            j += j & -j
+        self.total += increment
+        if self.total >= MAX_TOTAL:
+            self._build([(count + 1) // 2 for count in self.counts])
+
+
+# ==================== 2) Order-k context (PPM) model ====================
+
+MAX_CONTEXT_ORDER = 8
+# Hashed context slots per order; contexts that collide share their counts
+CONTEXT_SLOT_BITS = 16
+# A context's counts are halved once its coding total reaches this
+MAX_CONTEXT_TOTAL = 1 << 13
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+
+
+class ContextModel:
+    """PPM-style model over the previous 1..max_order symbols.
+
+    Each context keeps the counts of the symbols seen after it. A symbol is
+    coded in the longest context that has seen it; every longer context
+    that has not codes an escape first, whose count is the number of
+    distinct symbols in the context (PPM method C). Contexts never seen
+    before code nothing, and the adaptive order-0 model, where every
+    symbol has a count, ends the chain. Exclusion is not applied.
+
+    Contexts are hashed into 2^CONTEXT_SLOT_BITS slots per order, so
+    memory stays bounded whatever the input length; encoder and decoder
+    see the same collisions.
+    """
+
+    def __init__(self, n_symbols, max_order):
+        if not 0 < max_order <= MAX_CONTEXT_ORDER:
+            raise ValueError(f'Context order must be between 1 and {MAX_CONTEXT_ORDER}')
+        self.order0 = AdaptiveFrequencyModel(n_symbols)
+        self.n_symbols = n_symbols
+        self.max_order = max_order
+        self.max_events = max_order + 1
+        # tables[order - 1] maps a slot to [total count, {symbol: count}]
+        self.tables = [{} for _ in range(max_order)]
+        self.history = []
+        self._slots = None
+
+    def _context_slots(self):
+        """(table, slot) of every available context, longest first."""
+        if self._slots is None:
+            slots = []
+            key = 0
+            for order, symbol in enumerate(reversed(self.history), 1):
+                key = key * self.n_symbols + symbol
+                mixed = ((key ^ (order << 56)) * _HASH_MULTIPLIER) & _HASH_MASK
+                slots.append((self.tables[order - 1], mixed >> (64 - CONTEXT_SLOT_BITS)))
+            self._slots = slots[::-1]
+        return self._slots
+
+    def events(self, index):
+        events = []
+        for table, slot in self._context_slots():
+            entry = table.get(slot)
+            if entry is None:
+                continue
+            seen, counts = entry
+            total = seen + len(counts)
+            count = counts.get(index)
+            if count is not None:
+                cum = 0
+                for symbol, c in counts.items():
+                    if symbol == index:
+                        break
+                    cum += c
+                events.append((cum, count, total))
+                return events
+            # Escape: the top len(counts) of the context's total
+            events.append((seen, len(counts), total))
+        events.extend(self.order0.events(index))
+        return events
+
+    def decode(self, target, narrow):
+        for table, slot in self._context_slots():
+            entry = table.get(slot)
+            if entry is None:
+                continue
+            seen, counts = entry
+            value = target(seen + len(counts))
+            if value >= seen:
+                narrow(seen, len(counts))
+                continue
+            cum = 0
+            for symbol, c in counts.items():
+                if value < cum + c:
+                    narrow(cum, c)
+                    return symbol
+                cum += c
+        return self.order0.decode(target, narrow)
+
+    def update(self, index):
+        """Count the symbol in every context and advance the history."""
+        for table, slot in self._context_slots():
+            entry = table.get(slot)
+            if entry is None:
+                table[slot] = [1, {index: 1}]
+                continue
+            counts = entry[1]
+            counts[index] = counts.get(index, 0) + 1
+            entry[0] += 1
+            if entry[0] + len(counts) >= MAX_CONTEXT_TOTAL:
+                for symbol in counts:
+                    counts[symbol] = (counts[symbol] + 1) // 2
+                entry[0] = sum(counts.values())
+        self.order0.update(index)
+
+        self.history.append(index)
+        if len(self.history) > self.max_order:
+            del self.history[0]
+        self._slots = None
+
+
+def make_model(n_symbols, order=0):
+    """Adaptive model of the given context order (0: AdaptiveFrequencyModel)."""
+    if order:
+        return ContextModel(n_symbols, order)
+    return AdaptiveFrequencyModel(n_symbols)
+
+
+# ==================== 3) Range coder ====================
+
+# Bytes a decoder may read while renormalizing after one coding event:
+# every interval keeps width >= (RANGE_BOTTOM // MAX_TOTAL) * 1 = 2^8
+MAX_RENORM_BYTES = 2
+
+
+def _shift_low(low, cache, pending, out):
+    """Move the top byte of low out of the coder window.
+
+    The byte just below a possible carry is held back (cache) together with
+    the run of 0xFF bytes after it (pending) until a carry out of low either
+    happens or becomes impossible.
+
+    Returns:
+        Updated (low, cache, pending)
+    """
+    if low < 0xFF000000 or low > RANGE_MASK:
+        carry = low >> RANGE_BITS
+        out.append((cache + carry) & 0xFF)
+        if pending:
+            out.extend(bytes([(0xFF + carry) & 0xFF]) * pending)
+        return (low << 8) & RANGE_MASK, (low >> 24) & 0xFF, 0
+    return (low << 8) & RANGE_MASK, cache, pending + 1
+
+
+class RangeEncoder:
+    """Incremental adaptive arithmetic encoder (32-bit range coder).
+
+    Symbols are coded with the adaptive order-0 model, or with an order-k
+    ContextModel when order > 0.
+
+    Feed symbol indices chunk by chunk with encode(); take_bytes() returns
+    the bytes completed so far, so memory stays constant however long the
+    input is (a trailing run of zero bytes is only counted). finish() picks
+    the final code value with the most trailing zero bits and trims them
+    (the decoder reads missing bits as zeros); bit_length is set once it
+    has been called.
+    """
+
+    def __init__(self, n_symbols, order=0):
+        self.model = make_model(n_symbols, order)
+        self.low, self.width = 0, RANGE_MASK
+        # The first held byte is the integer part of the code value (always zero)
+        self.cache, self.pending = 0, 0
+        self.buffer = bytearray()
+        self._leading_byte = True
+        # Zero bytes after the last released one, held back as a count
+        self.held_zeros = 0
+        self.length = 0
+        self.byte_length = 0
+        self._last_byte = 0
+        self.bit_length = None
+
+    def encode(self, indices):
+        """Encode an iterable of symbol indices in [0, n_symbols)."""
+        model, out = self.model, self.buffer
+        events, update = model.events, model.update
+        low, width, cache, pending = self.low, self.width, self.cache, self.pending
+        count = 0
+        for index in indices:
+            for cum, freq, total in events(index):
+                r = width // total
+                low += r * cum
+                width = r * freq
+                while width < RANGE_BOTTOM:
+                    width <<= 8
+                    low, cache, pending = _shift_low(low, cache, pending, out)
+            update(index)
+            count += 1
+        self.low, self.width, self.cache, self.pending = low, width, cache, pending
+        self.length += count
+        return self
+
+    def take_bytes(self):
+        """Completed output bytes so far (removed from the buffer).
+
+        A trailing run of zero bytes is only counted (held_zeros), since
+        finish() may trim it; it is released in front of the next non-zero
+        byte.
+        """
+        out = self.buffer
+        if self._leading_byte and out:
+            del out[0]
+            self._leading_byte = False
+        end = len(out.rstrip(b'\0'))
+        if not end:
+            self.held_zeros += len(out)
+            out.clear()
+            return b''
+        data = bytes(self.held_zeros) + bytes(out[:end])
+        self.held_zeros = len(out) - end
+        out.clear()
+        self.byte_length += len(data)
+        self._last_byte = data[-1]
+        return data
+
+    def finish(self):
+        """Flush the coder and return the remaining output bytes."""
+        low, width = self.low, self.width
+        high = low + width - 1
+        shift = RANGE_BITS
+        while (high >> shift) << shift < low:
+            shift -= 1
+        low = (high >> shift) << shift
+        cache, pending = self.cache, self.pending
+        for _ in range(5):
+            low, cache, pending = _shift_low(low, cache, pending, self.buffer)
+        data = self.take_bytes()
+        self.buffer.clear()
+        last = self._last_byte
+        self.bit_length = 8 * self.byte_length - ((last & -last).bit_length() - 1) if self.byte_length else 0
+        return data
+
+
+class RangeDecoder:
+    """Incremental decoder for RangeEncoder output.
+
+    feed() accepts the packed bytes chunk by chunk and returns the symbol
+    indices they determine; a symbol is only decoded once the bytes its
+    renormalization reads have arrived. finish() decodes the remaining
+    symbols, reading zeros past the end of the data.
+
+    Args:
+        n_symbols: Alphabet size
+        length: Number of symbols to decode, if known up front; otherwise
+            it is passed to finish()
+        order: Context order of the model (0 for the order-0 model)
+    """
+
+    def __init__(self, n_symbols, length=None, order=0):
+        self.model = make_model(n_symbols, order)
+        self.length = length
+        self.decoded = 0
+        self.buffer = bytearray()
+        self.position = 0
+        self._held_zeros = 0
+        self.code = None
+        self.width = RANGE_MASK
+
+    def feed(self, data, zeros=0):
+        """Add packed bytes; returns the list of newly decoded indices.
+
+        zeros is the count of zero bytes the encoder holds back after data
+        (RangeEncoder.held_zeros). They are read ahead, so decoding keeps up
+        through a long zero run, and skipped when the encoder releases them
+        in front of later data.
+        """
+        del self.buffer[:self.position]
+        self.position = 0
+        if data:
+            self.buffer += memoryview(data)[self._held_zeros:]
+            self.buffer += bytes(zeros)
+        else:
+            self.buffer += bytes(max(0, zeros - self._held_zeros))
+        self._held_zeros = zeros
+        return self._decode(final=False)
+
+    def finish(self, length=None):
+        """Decode the remaining symbols up to length in total.
+
+        Raises:
+            ValueError: If the stream is corrupt
+        """
+        if length is not None:
+            self.length = length
+        return self._decode(final=True)
+
+    def _decode(self, final):
+        buffer = self.buffer
+        if self.code is None:
+            if len(buffer) < RANGE_BITS // 8 and not final:
+                return []
+            buffer += bytes(max(0, RANGE_BITS // 8 - len(buffer)))
+            self.code = int.from_bytes(buffer[:RANGE_BITS // 8], 'big')
+            self.position = RANGE_BITS // 8
+
+        model = self.model
+        decode, update = model.decode, model.update
+        code, width, position = self.code, self.width, self.position
+        r = 0
+
+        def target(total):
+            nonlocal r
+            r = width // total
+            value = code // r
+            if value >= total:
+                raise ValueError('Corrupt arithmetic-coded stream')
+            return value
+
+        def narrow(cum, freq):
+            nonlocal code, width, position
+            code -= r * cum
+            width = r * freq
+            while width < RANGE_BOTTOM:
+                code = (code << 8) | buffer[position]
+                position += 1
+                width <<= 8
+
+        remaining = -1 if self.length is None else self.length - self.decoded
+        lookahead = MAX_RENORM_BYTES * model.max_events
+        limit = len(buffer) - lookahead
+        decoded = []
+        while remaining:
+            if position > limit:
+                if not final:
+                    break
+                # Past the end of the data every byte reads as zero
+                buffer += bytes(256)
+                limit = len(buffer) - lookahead
+            index = decode(target, narrow)
+            update(index)
+            decoded.append(index)
+            remaining -= 1
+        self.code, self.width, self.position = code, width, position
+        self.decoded += len(decoded)
+        return decoded
+
+
+def range_encode(indices, n_symbols, order=0):
+    """Encode symbol indices in one call.
+
+    Returns:
+        Tuple of (packed_bytes, n_bits)
+    """
+    encoder = RangeEncoder(n_symbols, order)
+    data = encoder.encode(indices).finish()
+    return data, encoder.bit_length
+
+
+def range_decode(data, n_bits, n_symbols, length, order=0):
+    """Decode length symbol indices from a range_encode() bitstream.
+
+    Raises:
+        ValueError: If the stream is corrupt
+    """
+    data = bytearray(data[:(n_bits + 7) // 8])
+    if n_bits % 8:
+        data[-1] &= 0xFF << (8 - n_bits % 8) & 0xFF
+    decoder = RangeDecoder(n_symbols, length, order)
+    return decoder.feed(data) + decoder.finish()
@@ -0,0 +1,490 @@
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional: decode with the pure-Python codeword loop
+    njit = None
+
+# ==================== 1) Bit-level writer / reader ====================
+
+class BitWriter:
+    """Append variable-length codes, most significant bit first, to a bytearray."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._acc_bits = 0
+        self.bit_length = 0
+
+    def write(self, value, n_bits):
+        """Append the low n_bits of value."""
+        self._acc = (self._acc << n_bits) | (value & ((1 << n_bits) - 1))
+        self._acc_bits += n_bits
+        self.bit_length += n_bits
+        while self._acc_bits >= 8:
+            self._acc_bits -= 8
+            self.buffer.append((self._acc >> self._acc_bits) & 0xFF)
+        self._acc &= (1 << self._acc_bits) - 1
+
+    def write_bits(self, bitstring):
+        """Append a '0'/'1' string."""
+        if bitstring:
+            self.write(int(bitstring, 2), len(bitstring))
+
+    def write_packed(self, packed_bits, n_bits):
+        """Append the first n_bits of a packed uint8 buffer."""
+        data = np.frombuffer(bytes(packed_bits[:(n_bits + 7) // 8]), dtype=np.uint8)
+        full, rest = divmod(n_bits, 8)
+        if full:
+            body = data[:full]
+            r = self._acc_bits
+            if r:
+                # Shift every byte right by the r pending bits
+                prev = np.concatenate([[self._acc], body[:-1]]).astype(np.uint16)
+                shifted = ((prev << (8 - r)) | (body >> r)) & 0xFF
+                self.buffer += shifted.astype(np.uint8).tobytes()
+                self._acc = int(body[-1]) & ((1 << r) - 1)
+            else:
+                self.buffer += body.tobytes()
+            self.bit_length += 8 * full
+        if rest:
+            self.write(int(data[full]) >> (8 - rest), rest)
+
+    def take_bytes(self):
+        """Remove and return the completed bytes, e.g. to stream them out."""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def getvalue(self):
+        """Packed bytes; the last byte is zero-padded."""
+        if self._acc_bits:
+            return bytes(self.buffer) + bytes([(self._acc << (8 - self._acc_bits)) & 0xFF])
+        return bytes(self.buffer)
+
+    def __len__(self):
+        return self.bit_length
+
+
+class BitReader:
+    """Read bits, most significant bit first, from a packed buffer."""
+
+    def __init__(self, data, bit_length=None):
+        self.data = bytes(data)
+        self.bit_length = len(self.data) * 8 if bit_length is None else bit_length
+        self.position = 0
+
+    @property
+    def bits_remaining(self):
+        return self.bit_length - self.position
+
+    def read(self, n_bits):
+        """Read n_bits as an unsigned integer."""
+        if n_bits > self.bits_remaining:
+            raise EOFError('Read past the end of the bitstream')
+        value = 0
+        pos = self.position
+        remaining = n_bits
+        while remaining:
+            byte = self.data[pos >> 3]
+            offset = pos & 7
+            take = min(8 - offset, remaining)
+            value = (value << take) | ((byte >> (8 - offset - take)) & ((1 << take) - 1))
+            pos += take
+            remaining -= take
+        self.position = pos
+        return value
+
+    def read_bit(self):
+        if self.position >= self.bit_length:
+            raise EOFError('Read past the end of the bitstream')
+        bit = (self.data[self.position >> 3] >> (7 - (self.position & 7))) & 1
+        self.position += 1
+        return bit
+
+
+def bit_slice(packed_bits, start, stop):
+    """Bits [start, stop) of a packed buffer, realigned to a new packed array."""
+    n_bits = stop - start
+    first = start >> 3
+    data = np.frombuffer(bytes(packed_bits[first:(stop + 7) >> 3]), dtype=np.uint8)
+    r = start & 7
+    if r:
+        following = np.concatenate([data[1:], [0]]).astype(np.uint16)
+        data = (((data.astype(np.uint16) << r) | (following >> (8 - r))) & 0xFF).astype(np.uint8)
+    data = data[:(n_bits + 7) // 8].copy()
+    if n_bits & 7:
+        data[-1] &= (0xFF << (8 - (n_bits & 7))) & 0xFF
+    return data
+
+
+# ==================== 2) Vectorized code packing ====================
+
+# Symbols packed per vectorized step; bounds the temporary arrays
+PACK_BLOCK_SYMBOLS = 1 << 16
+
+
+def _pack_words(values, lengths, offset):
+    """Pack codes MSB first into uint64 words, the first one starting at bit
+    `offset` (< 64) of word 0. Lengths must be in 1..64."""
+    ends = offset + np.cumsum(lengths)
+    starts = ends - lengths
+    words = np.zeros((int(ends[-1]) + 63) >> 6, dtype=np.uint64)
+    index = starts >> 6
+    # Bits left free after the code in its first word; negative if it spills
+    room = 64 - (starts & 63) - lengths
+    values = values & (np.uint64(0xFFFFFFFFFFFFFFFF) >> (64 - lengths).astype(np.uint64))
+    heads = np.where(room >= 0, values << np.maximum(room, 0).astype(np.uint64),
+                     values >> np.maximum(-room, 0).astype(np.uint64))
+    # Codes sharing a word have disjoint bits, so OR-reduce each run of equal indices
+    firsts = np.concatenate([[0], np.flatnonzero(index[1:] != index[:-1]) + 1])
+    words[index[firsts]] = np.bitwise_or.reduceat(heads, firsts)
+    # At most one code spills into each following word
+    spill = np.flatnonzero(room < 0)
+    words[index[spill] + 1] |= values[spill] << (64 + room[spill]).astype(np.uint64)
+    return words
+
+
+class CodePacker:
+    """Incremental packing of variable-length codes into 64-bit words.
+
+    Blocks of codes are packed with a few vectorized passes each; completed
+    words are kept as bytes and the last partial word is carried over, so
+    memory is the packed output plus one block.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._carry = np.uint64(0)
+        self.bit_length = 0
+
+    def add(self, values, lengths):
+        """Append codes (values[i] is lengths[i] <= 64 bits long, MSB first)."""
+        values = np.asarray(values, dtype=np.uint64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        keep = lengths > 0
+        if not keep.all():
+            values, lengths = values[keep], lengths[keep]
+        if lengths.size == 0:
+            return self
+        offset = self.bit_length & 63
+        words = _pack_words(values, lengths, offset)
+        words[0] |= self._carry
+        self.bit_length += int(lengths.sum())
+        full = len(words) - 1 if self.bit_length & 63 else len(words)
+        self._parts.append(words[:full].astype('>u8').tobytes())
+        self._carry = words[full] if full < len(words) else np.uint64(0)
+        return self
+
+    def finish(self):
+        """Return (packed_bits, n_bits); the last byte is zero-padded."""
+        tail = np.array([self._carry], dtype='>u8').tobytes() if self.bit_length & 63 else b''
+        data = b''.join(self._parts) + tail
+        return np.frombuffer(data[:(self.bit_length + 7) // 8], dtype=np.uint8), self.bit_length
+
+
+def pack_codes(values, lengths):
+    """Concatenate variable-length codes (MSB first) into a packed uint8 array.
+
+    Args:
+        values: Integer codeword of each symbol
+        lengths: Codeword length of each symbol (at most 64 bits)
+
+    Returns:
+        Tuple of (packed_bits, n_bits)
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    packer = CodePacker()
+    for start in range(0, len(lengths), PACK_BLOCK_SYMBOLS):
+        packer.add(values[start:start + PACK_BLOCK_SYMBOLS], lengths[start:start + PACK_BLOCK_SYMBOLS])
+    return packer.finish()
+
+
+class CodeTable:
+    """Symbol-indexed arrays of a prefix codebook.
+
+    Codebooks over single characters ({char: '0101'}, indexed by code point)
+    or over byte values ({0..255: '0101'}, indexed by the byte) are encoded
+    block by block with a CodePacker without building a '0'/'1' string;
+    bytes buffers are indexed directly as uint8 arrays. Other codebooks, or
+    codewords longer than 64 bits, are encoded through a BitWriter instead.
+    A symbol missing from the codebook raises KeyError.
+    """
+
+    def __init__(self, codebook):
+        self.codebook = codebook
+        self.byte_symbols = all(isinstance(s, int) and 0 <= s < 256 for s in codebook)
+        text_symbols = all(isinstance(s, str) and len(s) == 1 for s in codebook)
+        self.vectorized = ((self.byte_symbols or text_symbols) and
+                           max((len(c) for c in codebook.values()), default=0) <= 64)
+        if self.vectorized:
+            index = int if self.byte_symbols else ord
+            size = 256 if self.byte_symbols else max((ord(s) for s in codebook), default=-1) + 1
+            self.values = np.zeros(size, dtype=np.uint64)
+            self.lengths = np.zeros(size, dtype=np.int64)
+            for sym, code in codebook.items():
+                self.values[index(sym)] = int(code, 2)
+                self.lengths[index(sym)] = len(code)
+
+    def _add_block(self, packer, indices):
+        """Pack the codes of one block of code points / byte values."""
+        if indices.size == 0:
+            return
+        if indices.max() >= len(self.lengths):
+            bad = indices[np.flatnonzero(indices >= len(self.lengths))[0]]
+            raise KeyError(chr(bad))
+        lengths = self.lengths[indices]
+        if lengths.min() == 0:
+            bad = int(indices[np.flatnonzero(lengths == 0)[0]])
+            raise KeyError(bad if self.byte_symbols else chr(bad))
+        packer.add(self.values[indices], lengths)
+
+    def encode(self, sequence):
+        """Encode a string, list of symbols or bytes buffer into (packed_bits, n_bits).
+
+        Raises:
+            KeyError: If a symbol has no codeword
+        """
+        if self.vectorized:
+            if self.byte_symbols and isinstance(sequence, (bytes, bytearray)):
+                data = np.frombuffer(sequence, dtype=np.uint8)
+                packer = CodePacker()
+                for start in range(0, len(data), PACK_BLOCK_SYMBOLS):
+                    self._add_block(packer, data[start:start + PACK_BLOCK_SYMBOLS])
+                return packer.finish()
+            if not self.byte_symbols:
+                text = sequence if isinstance(sequence, str) else ''.join(sequence)
+                if len(text) == len(sequence):
+                    packer = CodePacker()
+                    for start in range(0, len(text), PACK_BLOCK_SYMBOLS):
+                        block = text[start:start + PACK_BLOCK_SYMBOLS].encode('utf-32-le')
+                        self._add_block(packer, np.frombuffer(block, dtype=np.uint32))
+                    return packer.finish()
+
+        writer = BitWriter()
+        for sym in sequence:
+            writer.write_bits(self.codebook[sym])
+        return np.frombuffer(writer.getvalue(), dtype=np.uint8), len(writer)
+
+
+# ==================== 3) Table-driven decoding ====================
+
+# Bits resolved by one primary-table lookup
+DECODE_TABLE_BITS = 10
+# Longest codeword the compiled loop handles: its W-bit window is cut from
+# 7 bytes (56 bits) at any bit offset
+COMPILED_DECODE_WIDTH = 48
+
+
+def _decode_codewords(padded, n_bits, width, table_bits, table, starts, lengths, decoded):
+    """Scalar decoding of every codeword with the primary table, falling
+    back to a binary search over the left-justified starts.
+
+    Compiled with numba when it is installed. `padded` holds the stream
+    followed by 7 zero bytes. Returns (count, position, status): status 0
+    when every bit was decoded, 1 for an invalid codeword and 2 for a
+    truncated one, both starting at bit `position`.
+    """
+    window_mask = (1 << width) - 1
+    count = 0
+    position = 0
+    while position < n_bits:
+        first = position >> 3
+        word = 0
+        for j in range(7):
+            word = (word << 8) | padded[first + j]
+        window = (word >> (56 - (position & 7) - width)) & window_mask
+        entry = table[window >> (width - table_bits)]
+        if entry:
+            symbol = entry >> 8
+            length = entry & 0xFF
+        else:
+            symbol = np.searchsorted(starts, window, side='right') - 1
+            if symbol < 0:
+                return count, position, 1
+            length = lengths[symbol]
+            if window - starts[symbol] >= 1 << (width - length):
+                return count, position, 1
+        if position + length > n_bits:
+            return count, position, 2
+        decoded[count] = symbol
+        count += 1
+        position += length
+    return count, position, 0
+
+
+if njit is not None:
+    _decode_codewords = njit(cache=True, nogil=True)(_decode_codewords)
+
+
+class PrefixDecoder:
+    """Multi-bit lookup-table decoder for a {symbol: '0101'} prefix code.
+
+    decode() reads one codeword per step: it peeks the next `table_bits`
+    bits, and a primary table indexed by them gives the symbol and length
+    of every codeword of at most that many bits in one lookup (for
+    canonical codes the table depends only on the code lengths). Longer
+    codewords fall back to the canonical first-code/offset search over the
+    longer lengths; codes that are not canonical (Shannon-Fano) fall back
+    to a binary search over the codewords left-justified to the longest
+    length W, whose intervals are disjoint and sorted. The step then
+    advances by the code length. A bit pattern that is not a codeword, or
+    a codeword cut off by the end of the stream, raises ValueError. With
+    numba installed the loop is compiled (codes up to
+    COMPILED_DECODE_WIDTH bits).
+    """
+
+    def __init__(self, codebook, table_bits=DECODE_TABLE_BITS):
+        self.width = W = max((len(code) for code in codebook.values()), default=1)
+        # Codeword starts left-justified to W bits, in code order
+        entries = sorted((int(code, 2) << (W - len(code)), len(code), sym)
+                         for sym, code in codebook.items())
+        self.symbols = [sym for _, _, sym in entries]
+        self.lengths = [length for _, length, _ in entries]
+        self.starts = [start for start, _, _ in entries]
+        self.is_text = all(isinstance(s, str) and len(s) == 1 for s in self.symbols)
+        if self.is_text:
+            self.codepoints = np.array([ord(s) for s in self.symbols], dtype=np.uint32)
+        self.is_bytes = all(isinstance(s, int) and 0 <= s < 256 for s in self.symbols)
+        if self.is_bytes:
+            self.byte_values = np.array(self.symbols, dtype=np.uint8)
+        if not entries:
+            return
+
+        values = [int(codebook[sym], 2) for sym in self.symbols]
+        self.table_bits = k = min(table_bits, W)
+
+        # Primary table: symbol id << 8 | length, 0 = longer codeword (or invalid)
+        table = [0] * (1 << k)
+        for i, (value, length) in enumerate(zip(values, self.lengths)):
+            if length <= k:
+                first = value << (k - length)
+                table[first:first + (1 << (k - length))] = [(i << 8) | length] * (1 << (k - length))
+        self.table = table
+
+        # Canonical codes: the codes of each length are consecutive integers
+        # (id offset, first code, count) per length above the table
+        self.long_lengths = []
+        for length in range(k + 1, W + 1):
+            ids = [i for i, n in enumerate(self.lengths) if n == length]
+            if not ids:
+                continue
+            if (ids != list(range(ids[0], ids[-1] + 1)) or
+                    [values[i] for i in ids] != list(range(values[ids[0]], values[ids[0]] + len(ids)))):
+                self.long_lengths = None
+                break
+            self.long_lengths.append((length, ids[0], values[ids[0]], len(ids)))
+
+        if njit is not None and W <= COMPILED_DECODE_WIDTH:
+            self.compiled = (np.array(table, dtype=np.int64), np.array(self.starts, dtype=np.int64),
+                             np.array(self.lengths, dtype=np.int64))
+        else:
+            self.compiled = None
+
+    def _decode_long(self, window, position):
+        """Symbol id and length of a codeword longer than table_bits, given
+        the next W bits."""
+        W = self.width
+        if self.long_lengths is not None:
+            for length, offset, first, count in self.long_lengths:
+                delta = (window >> (W - length)) - first
+                if 0 <= delta < count:
+                    return offset + delta, length
+        else:
+            i = bisect_right(self.starts, window) - 1
+            if i >= 0 and window - self.starts[i] < 1 << (W - self.lengths[i]):
+                return i, self.lengths[i]
+        raise ValueError(f'Invalid codeword at bit {position}')
+
+    def decode_ids(self, packed_bits, n_bits):
+        """Decode a packed bitstream into an array of symbol ids."""
+        if n_bits == 0:
+            return np.zeros(0, dtype=np.int64)
+        if not self.symbols:
+            raise ValueError('Cannot decode a non-empty bitstream with an empty codebook')
+        if self.compiled is not None:
+            return self._decode_compiled(packed_bits, n_bits)
+
+        W, k = self.width, self.table_bits
+        table, decode_long = self.table, self._decode_long
+        table_mask, window_mask = (1 << k) - 1, (1 << W) - 1
+        # Refill 32 bytes (or W bits) at a time; zero padding reads past the end
+        refill = max(32, (W + 7) // 8)
+        data = bytes(packed_bits[:(n_bits + 7) // 8]) + bytes(2 * refill)
+        ids = array('q')
+        append = ids.append
+        acc = acc_bits = byte_pos = position = 0
+        while position < n_bits:
+            if acc_bits < W:
+                acc = ((acc & ((1 << acc_bits) - 1)) << (8 * refill)) | \
+                    int.from_bytes(data[byte_pos:byte_pos + refill], 'big')
+                acc_bits += 8 * refill
+                byte_pos += refill
+            entry = table[(acc >> (acc_bits - k)) & table_mask]
+            if entry:
+                length = entry & 0xFF
+                append(entry >> 8)
+            else:
+                symbol_id, length = decode_long((acc >> (acc_bits - W)) & window_mask, position)
+                append(symbol_id)
+            acc_bits -= length
+            position += length
+        if position > n_bits:
+            raise ValueError(f'Truncated codeword at bit {position - length} of {n_bits}')
+        return np.frombuffer(ids, dtype=np.int64)
+
+    def _decode_compiled(self, packed_bits, n_bits):
+        """decode_ids() with the numba-compiled codeword loop."""
+        table, starts, lengths = self.compiled
+        padded = np.zeros((n_bits + 7) // 8 + 7, dtype=np.uint8)
+        padded[:(n_bits + 7) // 8] = np.frombuffer(bytes(packed_bits[:(n_bits + 7) // 8]), dtype=np.uint8)
+        decoded = np.empty(n_bits // min(self.lengths) + 1, dtype=np.int32)
+        count, position, status = _decode_codewords(padded, n_bits, self.width, self.table_bits,
+                                                    table, starts, lengths, decoded)
+        if status == 1:
+            raise ValueError(f'Invalid codeword at bit {position}')
+        if status == 2:
+            raise ValueError(f'Truncated codeword at bit {position} of {n_bits}')
+        return decoded[:count]
+
+    def decode(self, packed_bits, n_bits):
+        """Decode a packed bitstream into a list of symbols."""
+        symbols = self.symbols
+        return [symbols[i] for i in self.decode_ids(packed_bits, n_bits).tolist()]
+
+    def decode_text(self, packed_bits, n_bits):
+        """Decode a bitstream of single-character symbols into a string."""
+        return self.ids_to_text(self.decode_ids(packed_bits, n_bits))
+
+    def decode_bytes(self, packed_bits, n_bits):
+        """Decode a bitstream of byte-value symbols (0..255) into bytes."""
+        return self.byte_values[self.decode_ids(packed_bits, n_bits)].tobytes()
+
+    def ids_to_text(self, ids):
+        """Join the symbols of decoded ids into a string."""
+        if not self.is_text:
+            return ''.join(self.symbols[i] for i in ids.tolist())
+        return self.codepoints[ids].astype('<u4').tobytes().decode('utf-32-le')
+
+
+# ==================== 4) Helpers ====================
+
+def bits_to_string(bits):
+    """Render a 0/1 uint8 array as a '0'/'1' string."""
+    return (np.asarray(bits, dtype=np.uint8) + ord('0')).tobytes().decode('ascii')
+
+
+def bits_head(packed_bits, n_bits, limit):
+    """Return the first `limit` bits of a packed bit array as a '0'/'1' string."""
+    shown = min(n_bits, limit)
+    packed_bits = np.frombuffer(bytes(packed_bits[:(shown + 7) // 8]), dtype=np.uint8)
+    return bits_to_string(np.unpackbits(packed_bits, count=shown))
+
+
+def bits_preview(packed_bits, n_bits, limit=500):
+    """Return the first `limit` bits as a '0'/'1' string, with '...' if truncated."""
+    return bits_head(packed_bits, n_bits, limit) + ('...' if n_bits > limit else '')
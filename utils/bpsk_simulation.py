@@ -4,6 +4,7 @@ matplotlib.use('Agg')  # Use non-GUI backend
 import matplotlib.pyplot as plt
 import os
 import uuid
+from utils.rng import make_rng
 
 # ==================== 1) Encoding functions====================
 
@@ -145,11 +146,13 @@ def bpsk_modulate(bits, Es=1.0):
     bits = np.asarray(bits) & 1
     return np.sqrt(Es) * (2*bits - 1)
 
-def add_awgn(signal, EbN0_dB, Eb=1.0):
+def add_awgn(signal, EbN0_dB, Eb=1.0, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
     EbN0_linear = 10**(EbN0_dB/10)
     N0 = Eb / EbN0_linear
     noise_var = N0 / 2
-    noise = np.sqrt(noise_var) * np.random.randn(len(signal))
+    noise = np.sqrt(noise_var) * rng.standard_normal(len(signal))
     return signal + noise
 
 def bpsk_demodulate(received):
@@ -168,8 +171,11 @@ def simulate_awgn_ber(EbN0_dB_list,
                       encoder=None, 
                       decoder=None,
                       rate_k=1,
-                      rate_n=1):
+                      rate_n=1,
+                      rng=None):
 
+    if rng is None:
+        rng = np.random.default_rng()
     bers = []
     Es = Es_from_rate(rate_k, rate_n)
 
@@ -178,7 +184,7 @@ def simulate_awgn_ber(EbN0_dB_list,
         num_bits = (num_bits // rate_k + 1) * rate_k
 
     for EbN0 in EbN0_dB_list:
-        bits = np.random.randint(0, 2, num_bits)
+        bits = rng.integers(0, 2, num_bits)
 
         if encoder is not None:
             coded_bits = encoder(bits)
@@ -186,7 +192,7 @@ def simulate_awgn_ber(EbN0_dB_list,
             coded_bits = bits
 
         tx = bpsk_modulate(coded_bits, Es)
-        rx = add_awgn(tx, EbN0)
+        rx = add_awgn(tx, EbN0, rng=rng)
         detected = bpsk_demodulate(rx)
 
         if decoder is not None:
@@ -201,19 +207,24 @@ def simulate_awgn_ber(EbN0_dB_list,
 
 # ==================== 4) BER over Rayleigh fading channel ====================
 
-def awgn_noise(signal_len, EbN0_dB, Eb=1.0):
+def awgn_noise(signal_len, EbN0_dB, Eb=1.0, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
     EbN0_linear = 10**(EbN0_dB/10)
     N0 = Eb / EbN0_linear
     noise_var = N0 / 2
-    return np.sqrt(noise_var) * np.random.randn(signal_len)
+    return np.sqrt(noise_var) * rng.standard_normal(signal_len)
 
 def simulate_rayleigh_ber(EbN0_dB_list,
                           num_bits=100000,
                           encoder=None,
                           decoder=None,
                           rate_k=1,
-                          rate_n=1):
+                          rate_n=1,
+                          rng=None):
 
+    if rng is None:
+        rng = np.random.default_rng()
     bers = []
     Es = Es_from_rate(rate_k, rate_n)
 
@@ -222,7 +233,7 @@ def simulate_rayleigh_ber(EbN0_dB_list,
         num_bits = (num_bits // rate_k + 1) * rate_k
 
     for EbN0 in EbN0_dB_list:
-        bits = np.random.randint(0, 2, num_bits)
+        bits = rng.integers(0, 2, num_bits)
 
         if encoder is not None:
             coded_bits = encoder(bits)
@@ -230,8 +241,8 @@ def simulate_rayleigh_ber(EbN0_dB_list,
             coded_bits = bits
 
         tx = bpsk_modulate(coded_bits, Es)
-        h = (np.random.randn(len(tx)) + 1j*np.random.randn(len(tx))) / np.sqrt(2)
-        noise = awgn_noise(len(tx), EbN0)
+        h = (rng.standard_normal(len(tx)) + 1j*rng.standard_normal(len(tx))) / np.sqrt(2)
+        noise = awgn_noise(len(tx), EbN0, rng=rng)
         rx = np.real(h)*tx + noise
         rx_eq = rx / np.real(h) # Zero-Forcing Equalizer
         detected = bpsk_demodulate(rx_eq)
@@ -261,11 +272,14 @@ def run_bpsk_simulation(config):
         - coding (str): 'none', 'repetition', 'hamming'
         - repetition_rate (str): '1/3', '1/5' (if coding is repetition)
         - hamming_type (str): '7,4', '15,11' (if coding is hamming)
+        - seed (int, optional): RNG seed; identical configs give identical BERs
         
     Returns:
-        - dict with 'ebn0', 'ber', 'plot_url'
+        - dict with 'ebn0', 'ber', 'plot_url', 'seed'
     """
     
+    rng, seed = make_rng(config.get('seed'))
+    
     start = float(config.get('snr_start', 0))
     end = float(config.get('snr_end', 10))
     step = float(config.get('snr_step', 2))
@@ -312,10 +326,10 @@ def run_bpsk_simulation(config):
 
     if channel == 'awgn':
         ber = simulate_awgn_ber(EbN0, encoder=encoder, decoder=decoder,
-                                rate_k=rate_k, rate_n=rate_n)
+                                rate_k=rate_k, rate_n=rate_n, rng=rng)
     else: # rayleigh
         ber = simulate_rayleigh_ber(EbN0, encoder=encoder, decoder=decoder,
-                                    rate_k=rate_k, rate_n=rate_n)
+                                    rate_k=rate_k, rate_n=rate_n, rng=rng)
                                     
     # Generate Plot
     plt.figure(figsize=(10, 6))
@@ -339,7 +353,8 @@ def run_bpsk_simulation(config):
     return {
         'ebn0': EbN0.tolist(),
         'ber': ber.tolist(),
-        'plot_url': url_for_static(plot_filename)
+        'plot_url': url_for_static(plot_filename),
+        'seed': seed
     }
 
 def url_for_static(filename):
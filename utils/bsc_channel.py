@@ -0,0 +1,191 @@
+import numpy as np
+from utils.frequency import entropy_from_counts
+
+# ==================== 1) Character <-> 6-bit mapping ====================
+
+VALID_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ ,.123456789'
+BITS_PER_CHAR = 6
+
+# Sorted alphabet: index i is transmitted as the 6-bit code format(i, '06b')
+ALPHABET = sorted(VALID_CHARS)
+
+# Code point -> alphabet index (-1 for characters outside the alphabet)
+_CHAR_INDEX = np.full(128, -1, dtype=np.int16)
+for _i, _ch in enumerate(ALPHABET):
+    _CHAR_INDEX[ord(_ch)] = _i
+
+# Alphabet index -> ASCII byte of the character
+_ALPHABET_BYTES = np.frombuffer(''.join(ALPHABET).encode('ascii'), dtype=np.uint8)
+
+
+def text_to_indices(text):
+    """Map text to alphabet indices, dropping characters outside VALID_CHARS."""
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    codepoints = codepoints[codepoints < 128]
+    indices = _CHAR_INDEX[codepoints]
+    return indices[indices >= 0].astype(np.uint8)
+
+
+def indices_to_text(indices):
+    """Map alphabet indices back to their characters."""
+    return _ALPHABET_BYTES[indices].tobytes().decode('ascii')
+
+
+def encode_indices(indices, bits_per_char=BITS_PER_CHAR):
+    """Encode alphabet indices as a packed (np.packbits) big-endian bit array.
+
+    Returns:
+        Tuple of (packed_bits, n_bits)
+    """
+    indices = np.asarray(indices, dtype=np.uint8)
+    # Left-align each code in its byte so unpackbits yields the top bits first
+    bits = np.unpackbits((indices << (8 - bits_per_char))[:, None], axis=1, count=bits_per_char)
+    return np.packbits(bits.ravel()), len(indices) * bits_per_char
+
+
+# Bit weights of one 6-bit code word, most significant bit first
+_BIT_WEIGHTS = 1 << np.arange(BITS_PER_CHAR - 1, -1, -1)
+
+
+def bits_to_indices(bits, bits_per_char=BITS_PER_CHAR):
+    """Group a 0/1 array into code words (last axis) and return their integer values."""
+    bits = np.asarray(bits, dtype=np.uint8)
+    words = bits.reshape(bits.shape[:-1] + (-1, bits_per_char))
+    return (words @ _BIT_WEIGHTS[-bits_per_char:]).astype(np.uint8)
+
+
+def decode_bits(packed_bits, n_chars):
+    """Decode a packed 6-bit stream back to alphabet indices.
+
+    The bits are reshaped to (n_chars, 6) and turned into indices with a dot
+    product against powers of two; indices_to_text() then maps them through
+    the 64-entry alphabet table.
+    """
+    return bits_to_indices(np.unpackbits(packed_bits, count=n_chars * BITS_PER_CHAR))
+
+
+# ==================== 2) Binary symmetric channel ====================
+
+# Error-mask bits drawn per RNG call; bounds the float scratch buffer to 8 MB
+CHANNEL_BLOCK_BITS = 1 << 20
+
+
+def bsc_transmit(packed_bits, n_bits, p, rng=None):
+    """Send a packed bit array through a BSC with crossover probability p.
+
+    The error mask is drawn a block at a time, packed, and XORed into a copy
+    of the input, so no per-bit Python work is done.
+
+    Returns:
+        Tuple of (received_packed_bits, num_errors)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    received = np.array(packed_bits, dtype=np.uint8, copy=True)
+    num_errors = 0
+
+    for start in range(0, n_bits, CHANNEL_BLOCK_BITS):
+        stop = min(start + CHANNEL_BLOCK_BITS, n_bits)
+        mask = rng.random(stop - start) < p
+        num_errors += int(np.count_nonzero(mask))
+
+        # Blocks are byte aligned, and packbits zero-pads the last one
+        packed_mask = np.packbits(mask)
+        offset = start // 8
+        received[offset:offset + len(packed_mask)] ^= packed_mask
+
+    return received, num_errors
+
+
+def binary_entropy(p):
+    """Binary entropy h(p) in bits; accepts scalars or arrays."""
+    p = np.asarray(p, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = -p * np.log2(p) - (1 - p) * np.log2(1 - p)
+    return np.where((p > 0) & (p < 1), h, 0.0)
+
+
+# ==================== 3) Empirical channel statistics ====================
+
+def joint_counts(sent, received, alphabet_size=None):
+    """Count transmitted/received index pairs in one bincount pass.
+
+    `received` may be 1-D (one channel run) or 2-D with one row per run; the
+    result is an (M, M) matrix, or (runs, M, M) for 2-D input, indexed by
+    [x, y].
+    """
+    if alphabet_size is None:
+        alphabet_size = len(ALPHABET)
+    received = np.asarray(received)
+    keys = np.asarray(sent, dtype=np.int64) * alphabet_size + received
+    cells = alphabet_size * alphabet_size
+    if received.ndim == 1:
+        return np.bincount(keys, minlength=cells).reshape(alphabet_size, alphabet_size)
+
+    runs = received.shape[0]
+    keys = keys + np.arange(runs, dtype=np.int64)[:, None] * cells
+    return np.bincount(keys.ravel(), minlength=runs * cells).reshape(runs, alphabet_size, alphabet_size)
+
+
+def channel_entropies(joint):
+    """Measured entropies (bits/character) of a joint count matrix [x, y].
+
+    Returns:
+        Dictionary with H(X,Y), H(Y|X), H(X|Y), H(Y) and I(X;Y)
+    """
+    joint = np.asarray(joint)
+    h_xy = entropy_from_counts(joint.ravel())
+    h_x = entropy_from_counts(joint.sum(axis=1))
+    h_y = entropy_from_counts(joint.sum(axis=0))
+    return {
+        'joint_entropy': h_xy,
+        'conditional_entropy': h_xy - h_x,
+        'equivocation': h_xy - h_y,
+        'output_entropy': h_y,
+        'mutual_information': h_x + h_y - h_xy
+    }
+
+
+# ==================== 4) Crossover sweep ====================
+
+
+def bsc_sweep(indices, p_values, rng=None):
+    """Send one encoded text through a BSC for every crossover probability.
+
+    The text is encoded once; each block of bits is then corrupted for all
+    p values at once with a (len(p_values), block_bits) error mask.
+
+    Returns:
+        Tuple of (bit_errors, char_errors, joint) where joint holds one
+        (64, 64) transmitted/received count matrix per p
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    indices = np.asarray(indices, dtype=np.uint8)
+    p = np.asarray(p_values, dtype=np.float64)[:, None]
+    packed_bits, _ = encode_indices(indices)
+
+    bit_errors = np.zeros(len(p), dtype=np.int64)
+    char_errors = np.zeros(len(p), dtype=np.int64)
+    joint = np.zeros((len(p), len(ALPHABET), len(ALPHABET)), dtype=np.int64)
+
+    # Multiple of 4 characters keeps every block byte aligned (4 * 6 = 24 bits)
+    block_chars = max(4, CHANNEL_BLOCK_BITS // (BITS_PER_CHAR * len(p)) // 4 * 4)
+
+    for start in range(0, len(indices), block_chars):
+        stop = min(start + block_chars, len(indices))
+        n_bits = (stop - start) * BITS_PER_CHAR
+        offset = start * BITS_PER_CHAR // 8
+        sent = np.unpackbits(packed_bits[offset:offset + (n_bits + 7) // 8], count=n_bits)
+
+        mask = rng.random((len(p), n_bits)) < p
+        received = sent ^ mask
+        bit_errors += np.count_nonzero(mask, axis=1)
+
+        received_indices = bits_to_indices(received)
+        char_errors += np.count_nonzero(received_indices != indices[start:stop], axis=1)
+        joint += joint_counts(indices[start:stop], received_indices)
+
+    return bit_errors, char_errors, joint
@@ -0,0 +1,138 @@
+import struct
+import zlib
+from collections import namedtuple
+
+# ==================== 1) Header layout ====================
+
+MAGIC = b'SSBX'
+VERSION = 1
+
+METHOD_HUFFMAN = 1
+METHOD_FANO = 2
+METHOD_LZ78 = 3
+METHOD_ADAPTIVE_HUFFMAN = 4
+
+METHOD_IDS = {'huffman': METHOD_HUFFMAN, 'fano': METHOD_FANO, 'lz78': METHOD_LZ78,
+              'adaptive_huffman': METHOD_ADAPTIVE_HUFFMAN}
+METHOD_NAMES = {method_id: name for name, method_id in METHOD_IDS.items()}
+
+# Header flags
+FLAG_BYTES = 1  # symbols are raw byte values, not UTF-8 characters
+
+# magic, version, method, flags, original length (characters or bytes),
+# CRC-32 of the original file bytes, model length (bytes), block count
+_HEADER = struct.Struct('<4sBBBQIII')
+# characters, payload bits, model length (bytes) of one block
+_BLOCK = struct.Struct('<QQI')
+
+ContainerHeader = namedtuple('ContainerHeader', 'method mode original_length checksum model blocks')
+ContainerBlock = namedtuple('ContainerBlock', 'length bits model')
+
+
+def write_header(method, model, original_length, checksum, blocks, mode='text'):
+    """Serialize a container header and its block index.
+
+    The payload follows the header: one packed bitstream per block, each
+    padded to a whole byte so blocks can be located and decoded independently.
+
+    Args:
+        method: Method name ('huffman', 'fano', 'lz78' or 'adaptive_huffman')
+        model: Serialized global model bytes (see pack_symbol_table); empty
+            when every block carries its own model
+        original_length: Number of characters (bytes in byte mode) of the original
+        checksum: CRC-32 of the original file bytes
+        blocks: List of ContainerBlock(length, bits, model)
+        mode: 'text' (UTF-8 characters) or 'bytes' (raw byte values)
+
+    Returns:
+        Header bytes
+    """
+    flags = FLAG_BYTES if mode == 'bytes' else 0
+    parts = [_HEADER.pack(MAGIC, VERSION, METHOD_IDS[method], flags, original_length,
+                          checksum, len(model), len(blocks)), model]
+    for block in blocks:
+        parts.append(_BLOCK.pack(block.length, block.bits, len(block.model)))
+        parts.append(block.model)
+    return b''.join(parts)
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise ValueError('Truncated container header')
+    return data
+
+
+def read_header(stream):
+    """Parse a container header, leaving the stream at the start of the payload.
+
+    Returns:
+        ContainerHeader with the method name, the raw model bytes and the
+        list of ContainerBlock entries
+    """
+    fixed = stream.read(_HEADER.size)
+    if len(fixed) < _HEADER.size:
+        raise ValueError('File is too short to be a compressed container')
+    magic, version, method, flags, original_length, checksum, model_length, block_count = _HEADER.unpack(fixed)
+    if magic != MAGIC:
+        raise ValueError('Not a compressed container (bad magic number)')
+    if version != VERSION:
+        raise ValueError(f'Unsupported container version {version}')
+    if method not in METHOD_NAMES:
+        raise ValueError(f'Unknown compression method {method}')
+    if flags & ~FLAG_BYTES:
+        raise ValueError(f'Unknown container flags {flags:#x}')
+    model = _read_exactly(stream, model_length)
+
+    blocks = []
+    for _ in range(block_count):
+        length, bits, block_model_length = _BLOCK.unpack(_read_exactly(stream, _BLOCK.size))
+        blocks.append(ContainerBlock(length, bits, _read_exactly(stream, block_model_length)))
+    if sum(block.length for block in blocks) != original_length:
+        raise ValueError('Block lengths do not add up to the original length')
+    mode = 'bytes' if flags & FLAG_BYTES else 'text'
+    return ContainerHeader(METHOD_NAMES[method], mode, original_length, checksum, model, blocks)
+
+
+def crc32_update(checksum, data):
+    """Running CRC-32 (start from 0)."""
+    return zlib.crc32(data, checksum)
+
+
+# ==================== 2) Model tables ====================
+
+def pack_symbol_table(pairs, value_format):
+    """Serialize (character, value) pairs, e.g. code lengths or counts.
+
+    Args:
+        pairs: Iterable of (symbol, integer value), or of bare symbols when
+            value_format is empty; symbols are single characters or byte values
+        value_format: struct format of the value ('B' for lengths, 'Q' for counts,
+            '' for a bare alphabet)
+    """
+    entry = struct.Struct('<I' + value_format)
+    pairs = sorted(pairs if value_format else ((sym,) for sym in pairs))
+    body = b''.join(entry.pack(sym if isinstance(sym, int) else ord(sym), *values)
+                    for sym, *values in pairs)
+    return struct.pack('<I', len(pairs)) + body
+
+
+def unpack_symbol_table(model, value_format, byte_symbols=False):
+    """Inverse of pack_symbol_table: a list of (character, value) pairs
+    (a list of characters when value_format is empty). With byte_symbols
+    the symbols are returned as byte values instead of characters."""
+    entry = struct.Struct('<I' + value_format)
+    symbol = int if byte_symbols else chr
+    try:
+        (count,) = struct.unpack_from('<I', model)
+        if len(model) != 4 + count * entry.size:
+            raise ValueError('Corrupt model table in container header')
+        table = []
+        for fields in entry.iter_unpack(model[4:]):
+            if byte_symbols and fields[0] > 0xFF:
+                raise ValueError('Corrupt model table in container header')
+            sym = symbol(fields[0])
+            table.append(sym if not value_format else (sym, fields[1]))
+    except (struct.error, OverflowError):
+        raise ValueError('Corrupt model table in container header')
+    return table
@@ -0,0 +1,190 @@
+import math
+import numpy as np
+from collections import Counter
+
+# ==================== 1) Code-point histograms ====================
+
+def text_to_codepoints(text):
+    """View text as a uint32 array of Unicode code points."""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+class FrequencyCounter:
+    """Incremental character histogram backed by np.bincount.
+
+    Counts are kept in a dense array indexed by code point, which grows to
+    the largest code point seen (at most 0x10FFFF entries).
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(256, dtype=np.int64)
+
+    def update(self, text):
+        """Add the characters of `text` to the histogram in one vectorized pass."""
+        codepoints = text_to_codepoints(text)
+        if codepoints.size == 0:
+            return self
+        chunk_counts = np.bincount(codepoints, minlength=len(self.counts))
+        if len(chunk_counts) > len(self.counts):
+            chunk_counts[:len(self.counts)] += self.counts
+            self.counts = chunk_counts
+        else:
+            self.counts += chunk_counts
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def to_dict(self):
+        """Return the non-zero counts as a {char: count} dictionary."""
+        present = np.flatnonzero(self.counts)
+        return {chr(cp): int(self.counts[cp]) for cp in present}
+
+
+def byte_histogram(data):
+    """Counts of the 256 byte values of a buffer, indexed by byte value."""
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+
+
+def histogram_to_dict(counts):
+    """Return the non-zero entries of a byte histogram as a {byte: count} dictionary."""
+    return {int(b): int(counts[b]) for b in np.flatnonzero(counts)}
+
+
+def count_symbols(sequence):
+    """Count a string, a list of single-character symbols or a bytes buffer.
+
+    Returns:
+        Dictionary mapping each symbol (character, or byte value) to its count
+    """
+    if isinstance(sequence, (bytes, bytearray)):
+        return histogram_to_dict(byte_histogram(sequence))
+    text = sequence if isinstance(sequence, str) else ''.join(sequence)
+    if len(text) != len(sequence):
+        # Multi-character symbols cannot be mapped to code points
+        return dict(Counter(sequence))
+    return FrequencyCounter().update(text).to_dict()
+
+
+# ==================== 2) PMF and entropy ====================
+
+def pmf_from_counts(counts):
+    """Normalize a {symbol: count} dictionary into a PMF."""
+    total = sum(counts.values())
+    return {sym: count/total for sym, count in counts.items()}
+
+
+def entropy_from_counts(counts):
+    """Entropy in bits/symbol of a histogram (array or {symbol: count} dict)."""
+    if isinstance(counts, dict):
+        counts = list(counts.values())
+    counts = np.asarray(counts, dtype=np.float64)
+    counts = counts[counts > 0]
+    if counts.size == 0:
+        return 0.0
+    probs = counts / counts.sum()
+    return float(-(probs * np.log2(probs)).sum())
+
+
+def sequence_entropy(sequence):
+    """Zeroth-order empirical entropy H(X) of a sequence."""
+    return entropy_from_counts(count_symbols(sequence))
+
+
+# ==================== 3) Higher-order (Markov) entropy ====================
+
+MAX_MARKOV_ORDER = 8
+
+
+def _group_sorted(keys, counts):
+    """Sum the counts of equal adjacent keys in a sorted key array."""
+    starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def _merge_counts(keys, counts):
+    """Combine duplicate keys of concatenated sorted (key, count) tables.
+
+    A stable sort (timsort) merges the already sorted runs in near-linear time.
+    """
+    order = np.argsort(keys, kind='stable')
+    return _group_sorted(keys[order], counts[order])
+
+
+class MarkovEntropyEstimator:
+    """Streaming n-gram counter for H(X_n | X_{n-k} ... X_{n-1}), k = 0..max_order.
+
+    Symbols are dense integer ids in [0, alphabet_size). The k+1 symbols of an
+    n-gram are combined into one uint64 key by rolling key * alphabet_size +
+    symbol, and each chunk's keys are counted with np.unique. The last
+    max_order symbols of every chunk are carried over so n-grams that cross
+    chunk boundaries are counted exactly once.
+    """
+
+    def __init__(self, alphabet_size, max_order=MAX_MARKOV_ORDER):
+        self.alphabet_size = max(int(alphabet_size), 2)
+        # Keys of (max_order + 1)-grams must fit in a uint64
+        fits = int(64 // math.log2(self.alphabet_size)) - 1
+        self.max_order = max(0, min(int(max_order), fits))
+        self._tail = np.zeros(0, dtype=np.uint64)
+        empty = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+        self._tables = [empty for _ in range(self.max_order + 1)]
+        self._pending = [[] for _ in range(self.max_order + 1)]
+        self._pending_size = [0] * (self.max_order + 1)
+
+    def update(self, symbols):
+        symbols = np.asarray(symbols, dtype=np.uint64)
+        if symbols.size == 0:
+            return self
+
+        seq = np.concatenate([self._tail, symbols])
+        keys = seq.copy()
+        for k in range(self.max_order + 1):
+            if k > 0:
+                keys = keys[:-1] * np.uint64(self.alphabet_size) + seq[k:]
+            # Only n-grams ending in the new symbols; the rest were counted before
+            first = max(0, len(self._tail) - k)
+            if first < len(keys):
+                self._add(k, *np.unique(keys[first:], return_counts=True))
+
+        self._tail = seq[-self.max_order:] if self.max_order else self._tail
+        return self
+
+    def _add(self, k, keys, counts):
+        self._pending[k].append((keys, counts))
+        self._pending_size[k] += len(keys)
+        # Merge once pending work matches the table size (amortized n log n)
+        if self._pending_size[k] >= max(len(self._tables[k][0]), 1 << 16):
+            self._flush(k)
+
+    def _flush(self, k):
+        if not self._pending[k]:
+            return
+        parts = [self._tables[k]] + self._pending[k]
+        self._tables[k] = _merge_counts(np.concatenate([p[0] for p in parts]),
+                                        np.concatenate([p[1] for p in parts]))
+        self._pending[k] = []
+        self._pending_size[k] = 0
+
+    def conditional_entropies(self):
+        """Plug-in H(X_n | previous k symbols) for every order k.
+
+        Returns:
+            List of dicts with 'order', 'conditional_entropy' and 'contexts'
+        """
+        results = []
+        for k in range(self.max_order + 1):
+            self._flush(k)
+            keys, counts = self._tables[k]
+            if keys.size == 0:
+                break
+            # Context of a (k+1)-gram is its first k symbols; keys are sorted,
+            # so equal contexts are adjacent
+            _, context_counts = _group_sorted(keys // np.uint64(self.alphabet_size), counts)
+            results.append({
+                'order': k,
+                'conditional_entropy': entropy_from_counts(counts) - entropy_from_counts(context_counts),
+                'contexts': int(len(context_counts)) if k > 0 else 1
+            })
+        return results
@@ -0,0 +1,229 @@
+import heapq
+from bisect import bisect_left
+from itertools import accumulate
+
+
+# ==================== 1) Huffman code lengths ====================
+
+def minimum_redundancy_lengths(weights):
+    """In-place Moffat-Katajainen Huffman code lengths.
+
+    Args:
+        weights: List of symbol weights sorted in ascending order
+
+    Returns:
+        The same list, overwritten with code lengths (non-increasing)
+    """
+    A = weights
+    n = len(A)
+    if n == 0:
+        return A
+    if n == 1:
+        A[0] = 1
+        return A
+
+    # Phase 1: build the tree, storing internal-node weights and parent pointers
+    A[0] += A[1]
+    root, leaf = 0, 2
+    for nxt in range(1, n - 1):
+        if leaf >= n or A[root] < A[leaf]:
+            A[nxt] = A[root]
+            A[root] = nxt
+            root += 1
+        else:
+            A[nxt] = A[leaf]
+            leaf += 1
+
+        if leaf >= n or (root < nxt and A[root] < A[leaf]):
+            A[nxt] += A[root]
+            A[root] = nxt
+            root += 1
+        else:
+            A[nxt] += A[leaf]
+            leaf += 1
+
+    # Phase 2: convert parent pointers to internal-node depths
+    A[n - 2] = 0
+    for nxt in range(n - 3, -1, -1):
+        A[nxt] = A[A[nxt]] + 1
+
+    # Phase 3: convert internal-node depths to leaf depths
+    avbl, used, depth = 1, 0, 0
+    root, nxt = n - 2, n - 1
+    while avbl > 0:
+        while root >= 0 and A[root] == depth:
+            used += 1
+            root -= 1
+        while avbl > used:
+            A[nxt] = depth
+            nxt -= 1
+            avbl -= 1
+        avbl = 2 * used
+        depth += 1
+        used = 0
+
+    return A
+
+
+def huffman_code_lengths(freqs):
+    """Huffman code length of every symbol, in O(n log n).
+
+    Args:
+        freqs: Dictionary mapping symbols to weights (counts or probabilities)
+
+    Returns:
+        Dictionary mapping symbols to code lengths
+    """
+    ranked = sorted(freqs.items(), key=lambda item: item[1])
+    lengths = minimum_redundancy_lengths([w for _, w in ranked])
+    return {sym: length for (sym, _), length in zip(ranked, lengths)}
+
+
+def length_limited_code_lengths(freqs, max_length):
+    """Optimal code lengths no longer than max_length bits (package-merge).
+
+    Each of the max_length - 1 rounds pairs the current list into packages
+    and merges them back with the original leaves. The 2n - 2 lightest items
+    of the final list are then selected; a symbol's code length is the number
+    of selected items that contain it. Runs in O(n * max_length).
+
+    Args:
+        freqs: Dictionary mapping symbols to weights
+        max_length: Maximum codeword length in bits
+
+    Returns:
+        Dictionary mapping symbols to code lengths
+    """
+    ranked = sorted(freqs.items(), key=lambda item: item[1])
+    n = len(ranked)
+    if n == 1:
+        return {ranked[0][0]: 1}
+    if (1 << max_length) < n:
+        raise ValueError(f'{n} symbols need codewords of at least {(n - 1).bit_length()} bits')
+
+    # Items are (weight, payload): a leaf index, or a (left, right) package
+    leaves = [(w, i) for i, (_, w) in enumerate(ranked)]
+    items = leaves
+    for _ in range(max_length - 1):
+        packages = [(items[j][0] + items[j + 1][0], (items[j], items[j + 1]))
+                    for j in range(0, len(items) - 1, 2)]
+        # Leaves come first on equal weights (heapq.merge is stable)
+        items = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+
+    lengths = [0] * n
+    stack = items[:2 * n - 2]
+    while stack:
+        _, payload = stack.pop()
+        if isinstance(payload, int):
+            lengths[payload] += 1
+        else:
+            stack.extend(payload)
+
+    return {sym: length for (sym, _), length in zip(ranked, lengths)}
+
+
+# ==================== 2) Canonical codes ====================
+
+def canonical_order(lengths):
+    """Symbols ordered by (code length, symbol), the canonical assignment order."""
+    return sorted(lengths, key=lambda sym: (lengths[sym], sym))
+
+
+def canonical_codebook(lengths):
+    """Assign canonical codewords from code lengths.
+
+    Codes of equal length are consecutive integers in symbol order, and each
+    longer length continues from the shorter ones shifted left, so only the
+    lengths are needed to rebuild the codebook.
+
+    Args:
+        lengths: Dictionary mapping symbols to code lengths
+
+    Returns:
+        Dictionary mapping symbols to '0'/'1' codeword strings
+    """
+    codebook = {}
+    code = 0
+    prev_length = 0
+    for sym in canonical_order(lengths):
+        length = lengths[sym]
+        code <<= length - prev_length
+        codebook[sym] = format(code, f'0{length}b')
+        code += 1
+        prev_length = length
+    return codebook
+
+
+# ==================== 3) Shannon-Fano codes ====================
+
+def _exact_weights(weights):
+    """Scale int/float weights to integers with a common factor.
+
+    Floats are dyadic rationals, so multiplying them all by the largest
+    denominator keeps every prefix sum exact.
+    """
+    ratios = [w.as_integer_ratio() if isinstance(w, float) else (int(w), 1) for w in weights]
+    scale = max(d for _, d in ratios) if ratios else 1
+    return [n * (scale // d) for n, d in ratios]
+
+
+def _float_split(weights, lo, hi):
+    """Split point of weights[lo:hi] computed with running float sums."""
+    running = list(accumulate(weights[lo:hi]))
+    # Running sums of non-negative weights are non-decreasing
+    return lo + bisect_left(running, sum(weights[lo:hi]) / 2) + 1
+
+
+def shannon_fano_codebook(ranked):
+    """Shannon-Fano codes by recursive halving of the cumulative weight.
+
+    Every part [lo, hi) is split after the first symbol whose cumulative
+    weight reaches half of the part's weight. With one exact prefix-sum array
+    built up front, each split is a binary search instead of a re-summing
+    linear scan, so the whole code is built in O(n log n).
+
+    Float weights (e.g. a PMF) are summed with rounding error, so near a
+    tie the split can depend on that error; those splits are re-checked with
+    running float sums over the part, which reproduces a direct
+    implementation of the rule exactly.
+
+    Args:
+        ranked: List of (symbol, weight) pairs, usually by decreasing weight
+
+    Returns:
+        Dictionary mapping symbols to '0'/'1' codeword strings, in the
+        left-to-right order of the code tree
+    """
+    n = len(ranked)
+    if n == 0:
+        return {}
+    weights = [w for _, w in ranked]
+    is_float = any(isinstance(w, float) for w in weights)
+    cumulative = [0]
+    for w in _exact_weights(weights):
+        cumulative.append(cumulative[-1] + w)
+
+    codebook = {}
+    stack = [(0, n, '')]
+    while stack:
+        lo, hi, prefix = stack.pop()
+        if hi - lo == 1:
+            codebook[ranked[lo][0]] = prefix or '0'
+            continue
+
+        # First k with cumulative[k] - cumulative[lo] >= (cumulative[hi] - cumulative[lo]) / 2
+        target = cumulative[lo] + cumulative[hi]
+        split = bisect_left(cumulative, -(-target // 2), lo + 1, hi)
+        if is_float:
+            # Float sums over the part are off by at most (hi - lo) ulps of its weight
+            tolerance = 4 * (hi - lo) * (cumulative[hi] - cumulative[lo]) >> 52
+            if (2 * cumulative[split] - target <= tolerance or
+                    target - 2 * cumulative[split - 1] <= tolerance):
+                split = _float_split(weights, lo, hi)
+        # Keep both parts non-empty
+        split = min(split, hi - 1)
+
+        # Right part is visited after the left one, as in the recursive form
+        stack.append((split, hi, prefix + '1'))
+        stack.append((lo, split, prefix + '0'))
+    return codebook
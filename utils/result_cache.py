@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bytes hashed per read when fingerprinting an upload
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def fingerprint(endpoint, params, streams=()):
+    """Content address of a request: endpoint, parameters and upload bytes.
+
+    Args:
+        endpoint: Request path
+        params: Iterable of (name, value) pairs (form fields, seed, ...)
+        streams: Binary streams to hash; each is rewound afterwards
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(endpoint.encode('utf-8') + b'\0')
+    for name, value in sorted(params):
+        digest.update(f'{name}={value}'.encode('utf-8') + b'\0')
+    for stream in streams:
+        digest.update(b'\1')
+        while True:
+            block = stream.read(HASH_CHUNK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+        stream.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of serialized responses under a byte budget."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached payload for key (marking it recently used), or None."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """Store a payload, evicting least recently used entries to fit the budget."""
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+            self._entries[key] = payload
+            self.current_bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
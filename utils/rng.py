@@ -0,0 +1,26 @@
+import secrets
+
+import numpy as np
+
+# Drawn seeds stay below 2^53 so JavaScript clients can echo them back exactly
+SEED_BITS = 53
+
+
+def make_rng(seed=None):
+    """Build a per-request numpy Generator.
+
+    When no seed is given a fresh one is drawn from OS entropy and returned,
+    so any run can be replayed exactly by passing that seed back.
+
+    Returns:
+        Tuple of (generator, seed)
+    """
+    if seed is None or seed == '':
+        seed = secrets.randbits(SEED_BITS)
+    try:
+        seed = int(seed)
+    except (TypeError, ValueError):
+        raise ValueError('seed must be a non-negative integer')
+    if seed < 0:
+        raise ValueError('seed must be a non-negative integer')
+    return np.random.default_rng(seed), seed
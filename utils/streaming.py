@@ -0,0 +1,54 @@
+import codecs
+
+# Bytes read from an upload per block; bounds per-request working memory
+CHUNK_SIZE = 1 << 20
+
+
+def iter_text_chunks(stream, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """Yield decoded text from a binary stream, one fixed-size block at a time.
+
+    An incremental decoder carries multi-byte characters split across block
+    boundaries over to the next block, so the concatenated chunks equal
+    stream.read().decode(encoding).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_byte_blocks(stream, chunk_size=CHUNK_SIZE):
+    """Yield the raw blocks of a binary stream (byte mode, no decoding)."""
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        yield block
+
+
+class TextHead:
+    """Keep the first `limit` characters of a stream for response previews."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+
+    def feed(self, text):
+        # One extra character is kept so preview() knows if it truncated
+        if self.length <= self.limit:
+            piece = text[:self.limit + 1 - self.length]
+            self.parts.append(piece)
+            self.length += len(piece)
+
+    def preview(self):
+        head = ''.join(self.parts)
+        return head[:self.limit] + ('...' if len(head) > self.limit else '')